@@ -0,0 +1,224 @@
+"""
+File-backed S3 stand-in: the subset of the REST API S3Uploader uses, over HTTP
+
+Point S3Uploader at it with S3_ENDPOINT_URL (path-style requests). Object
+bodies are written under a directory; metadata and multipart uploads are kept
+in memory for the lifetime of the server. Signatures and checksums are not
+verified.
+"""
+import os
+import uuid
+import hashlib
+import threading
+from datetime import datetime, timezone
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs, unquote
+from xml.sax.saxutils import escape
+
+_XMLNS = 'xmlns="http://s3.amazonaws.com/doc/2006-03-01/"'
+
+
+def _decode_aws_chunked(body: bytes) -> bytes:
+    """Strip aws-chunked framing (<hex size>[;ext]\\r\\n<data>\\r\\n ... 0\\r\\n<trailers>)"""
+    out = bytearray()
+    pos = 0
+    while True:
+        line_end = body.index(b"\r\n", pos)
+        size = int(body[pos:line_end].split(b";")[0], 16)
+        pos = line_end + 2
+        if size == 0:
+            return bytes(out)
+        out += body[pos:pos + size]
+        pos += size + 2
+
+
+class FakeS3Store:
+    """Objects of one or more buckets under root/<bucket>/<key>"""
+
+    def __init__(self, root: str):
+        self.root = root
+        self.objects = {}  # (bucket, key) -> {"size", "etag", "content_type", "metadata", "last_modified"}
+        self.uploads = {}  # upload id -> {"bucket", "key", "headers", "parts": {number: bytes}}
+        self.lock = threading.Lock()
+        self.bytes_received = 0
+
+    def path(self, bucket: str, key: str) -> str:
+        return os.path.join(self.root, bucket, *key.split("/"))
+
+    def put(self, bucket: str, key: str, data: bytes, headers, etag: str = None):
+        path = self.path(bucket, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(data)
+        info = {
+            "size": len(data),
+            "etag": etag or hashlib.md5(data).hexdigest(),
+            "content_type": headers.get("Content-Type", "binary/octet-stream"),
+            "metadata": {k.lower(): v for k, v in headers.items() if k.lower().startswith("x-amz-meta-")},
+            "last_modified": datetime.now(timezone.utc),
+        }
+        with self.lock:
+            self.objects[(bucket, key)] = info
+            self.bytes_received += len(data)
+        return info
+
+
+class FakeS3Server:
+    """Serve a FakeS3Store on 127.0.0.1 from a daemon thread"""
+
+    def __init__(self, root: str, port: int = 0):
+        store = self.store = FakeS3Store(root)
+
+        class _Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _target(self):
+                parts = urlsplit(self.path)
+                bucket, _, key = parts.path.lstrip("/").partition("/")
+                query = {k: v[0] for k, v in parse_qs(parts.query, keep_blank_values=True).items()}
+                return bucket, unquote(key), query
+
+            def _body(self) -> bytes:
+                data = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                if "aws-chunked" in self.headers.get("Content-Encoding", "") or \
+                        self.headers.get("x-amz-decoded-content-length"):
+                    data = _decode_aws_chunked(data)
+                return data
+
+            def _reply(self, status: int, body: bytes = b"", headers: dict = None):
+                self.send_response(status)
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                if body and self.command != "HEAD":
+                    self.wfile.write(body)
+
+            def _xml(self, status: int, xml: str):
+                self._reply(status, f'<?xml version="1.0" encoding="UTF-8"?>{xml}'.encode("utf-8"),
+                            {"Content-Type": "application/xml"})
+
+            def _not_found(self):
+                self._xml(404, "<Error><Code>NoSuchKey</Code><Message>Not found</Message></Error>")
+
+            def _object_headers(self, info) -> dict:
+                headers = {
+                    "ETag": f'"{info["etag"]}"',
+                    "Content-Type": info["content_type"],
+                    "Last-Modified": formatdate(info["last_modified"].timestamp(), usegmt=True),
+                }
+                headers.update(info["metadata"])
+                return headers
+
+            def do_PUT(self):
+                bucket, key, query = self._target()
+                data = self._body()
+                if "uploadId" in query:
+                    upload = store.uploads.get(query["uploadId"])
+                    if upload is None:
+                        return self._xml(404, "<Error><Code>NoSuchUpload</Code></Error>")
+                    upload["parts"][int(query["partNumber"])] = data
+                    with store.lock:
+                        store.bytes_received += len(data)
+                    return self._reply(200, headers={"ETag": f'"{hashlib.md5(data).hexdigest()}"'})
+                if not key:
+                    os.makedirs(os.path.join(store.root, bucket), exist_ok=True)
+                    return self._reply(200)
+                info = store.put(bucket, key, data, self.headers)
+                self._reply(200, headers={"ETag": f'"{info["etag"]}"'})
+
+            def do_POST(self):
+                bucket, key, query = self._target()
+                self._body()  # drain; the CompleteMultipartUpload part list is not needed
+                if "uploads" in query:
+                    upload_id = uuid.uuid4().hex
+                    store.uploads[upload_id] = {"bucket": bucket, "key": key, "headers": dict(self.headers), "parts": {}}
+                    return self._xml(200, (
+                        f"<InitiateMultipartUploadResult {_XMLNS}><Bucket>{escape(bucket)}</Bucket>"
+                        f"<Key>{escape(key)}</Key><UploadId>{upload_id}</UploadId></InitiateMultipartUploadResult>"
+                    ))
+                if "uploadId" in query:
+                    upload = store.uploads.pop(query["uploadId"], None)
+                    if upload is None:
+                        return self._xml(404, "<Error><Code>NoSuchUpload</Code></Error>")
+                    parts = [upload["parts"][n] for n in sorted(upload["parts"])]
+                    digest = hashlib.md5(b"".join(hashlib.md5(p).digest() for p in parts)).hexdigest()
+                    etag = f"{digest}-{len(parts)}"
+                    data = b"".join(parts)
+                    with store.lock:
+                        store.bytes_received -= len(data)  # already counted per part
+                    store.put(bucket, key, data, upload["headers"], etag=etag)
+                    return self._xml(200, (
+                        f"<CompleteMultipartUploadResult {_XMLNS}><Bucket>{escape(bucket)}</Bucket>"
+                        f"<Key>{escape(key)}</Key><ETag>\"{etag}\"</ETag></CompleteMultipartUploadResult>"
+                    ))
+                self._xml(400, "<Error><Code>NotImplemented</Code></Error>")
+
+            def do_DELETE(self):
+                bucket, key, query = self._target()
+                if "uploadId" in query:
+                    store.uploads.pop(query["uploadId"], None)
+                else:
+                    with store.lock:
+                        store.objects.pop((bucket, key), None)
+                    try:
+                        os.remove(store.path(bucket, key))
+                    except OSError:
+                        pass
+                self._reply(204)
+
+            def do_HEAD(self):
+                bucket, key, _ = self._target()
+                info = store.objects.get((bucket, key))
+                if info is None:
+                    return self._reply(404)
+                headers = self._object_headers(info)
+                self.send_response(200)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(info["size"]))
+                self.end_headers()
+
+            def do_GET(self):
+                bucket, key, query = self._target()
+                if not key:
+                    return self._list(bucket, query)
+                info = store.objects.get((bucket, key))
+                if info is None:
+                    return self._not_found()
+                with open(store.path(bucket, key), "rb") as f:
+                    data = f.read()
+                self._reply(200, data, self._object_headers(info))
+
+            def _list(self, bucket: str, query: dict):
+                prefix = query.get("prefix", "")
+                with store.lock:
+                    items = sorted((k, v) for (b, k), v in store.objects.items() if b == bucket and k.startswith(prefix))
+                contents = "".join(
+                    f"<Contents><Key>{escape(key)}</Key>"
+                    f"<LastModified>{info['last_modified'].strftime('%Y-%m-%dT%H:%M:%S.000Z')}</LastModified>"
+                    f"<ETag>\"{info['etag']}\"</ETag><Size>{info['size']}</Size>"
+                    f"<StorageClass>STANDARD</StorageClass></Contents>"
+                    for key, info in items
+                )
+                self._xml(200, (
+                    f"<ListBucketResult {_XMLNS}><Name>{escape(bucket)}</Name><Prefix>{escape(prefix)}</Prefix>"
+                    f"<KeyCount>{len(items)}</KeyCount><MaxKeys>{len(items) or 1000}</MaxKeys>"
+                    f"<IsTruncated>false</IsTruncated>{contents}</ListBucketResult>"
+                ))
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", port), _Handler)
+        self.httpd.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.httpd.server_port}"
+
+    def start(self) -> 'FakeS3Server':
+        threading.Thread(target=self.httpd.serve_forever, name="fake-s3", daemon=True).start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
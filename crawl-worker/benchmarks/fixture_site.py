@@ -0,0 +1,163 @@
+"""
+Synthetic truyenqq-style site served from a local thread pool HTTP server
+
+Every page is derived from its URL, so the site can have any number of series
+without generating anything up front:
+
+    /                                   homepage, one div.book_avatar per series
+    /truyen-tranh/series-<s>            div.works-chapter-list, li.author.row, .detail-content
+    /truyen-tranh/series-<s>-chap-<c>.html  one div.page-chapter per page
+    /covers/<s>.png, /pages/<s>/<c>/<p>.png  generated PNG images
+"""
+import re
+import struct
+import zlib
+import random
+import threading
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+_WORDS = ("Đảo", "Hải", "Tặc", "Thám", "Tử", "Lừng", "Danh", "Thanh", "Gươm", "Diệt", "Quỷ", "Vua", "Bóng", "Rổ")
+
+_SERIES_RE = re.compile(r"^/truyen-tranh/series-(\d+)$")
+_CHAPTER_RE = re.compile(r"^/truyen-tranh/series-(\d+)-chap-(\d+)\.html$")
+_COVER_RE = re.compile(r"^/covers/(\d+)\.png$")
+_PAGE_RE = re.compile(r"^/pages/(\d+)/(\d+)/(\d+)\.png$")
+
+
+def series_title(series: int) -> str:
+    rng = random.Random(series)
+    return " ".join(rng.choice(_WORDS) for _ in range(3)) + f" {series}"
+
+
+def _png_chunk(kind: bytes, data: bytes) -> bytes:
+    return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data) & 0xFFFFFFFF)
+
+
+@lru_cache(maxsize=4)
+def _noise(size: int) -> bytes:
+    return random.Random(size).randbytes(size)
+
+
+def png_image(seed: int, width: int, height: int) -> bytes:
+    """
+    Grayscale PNG of roughly width * height bytes
+
+    Rows are incompressible noise (like a real scan after JPEG) rotated by the
+    seed, so every page has a distinct digest without per-request RNG cost.
+    """
+    noise = _noise(width * height)
+    offset = seed % len(noise)
+    pixels = noise[offset:] + noise[:offset]
+    raw = b"".join(b"\x00" + pixels[y * width:(y + 1) * width] for y in range(height))
+    header = struct.pack(">IIBBBBB", width, height, 8, 0, 0, 0, 0)
+    return (b"\x89PNG\r\n\x1a\n" + _png_chunk(b"IHDR", header)
+            + _png_chunk(b"IDAT", zlib.compress(raw, 1)) + _png_chunk(b"IEND", b""))
+
+
+class FixtureSite:
+    """Shape of the synthetic catalogue and the HTML/image for each URL"""
+
+    def __init__(self, series: int = 20, chapters: int = 5, pages: int = 8,
+                 image_width: int = 800, image_height: int = 256):
+        """
+        Initialize site
+
+        Args:
+            series: Series on the homepage
+            chapters: Chapters per series
+            pages: Pages per chapter
+            image_width: Page width in pixels
+            image_height: Page height in pixels (a page is about width * height bytes)
+        """
+        self.series = series
+        self.chapters = chapters
+        self.pages = pages
+        self.image_width = image_width
+        self.image_height = image_height
+
+    def homepage(self) -> str:
+        items = "\n".join(
+            f'<div class="book_avatar"><a href="/truyen-tranh/series-{s}">'
+            f'<img src="/covers/{s}.png" alt="{series_title(s)}"></a></div>'
+            for s in range(1, self.series + 1)
+        )
+        return f"<html><body><div class=\"list_grid\">{items}</div></body></html>"
+
+    def series_page(self, series: int) -> str:
+        chapters = "\n".join(
+            f'<div class="works-chapter-item"><a href="/truyen-tranh/series-{series}-chap-{c}.html">'
+            f'Chương {c}</a></div>'
+            for c in range(self.chapters, 0, -1)
+        )
+        author = series % 7 + 1
+        return (
+            "<html><body>"
+            f'<ul><li class="author row"><a class="org" href="/tac-gia/{author}">Tác giả {author}</a></li></ul>'
+            f'<div class="detail-content"><p>{series_title(series)} — truyện thử nghiệm.</p></div>'
+            f'<div class="works-chapter-list">{chapters}</div>'
+            "</body></html>"
+        )
+
+    def chapter_page(self, series: int, chapter: int) -> str:
+        pages = "\n".join(
+            f'<div class="page-chapter"><img data-src="/pages/{series}/{chapter}/{p}.png" alt="page {p}"></div>'
+            for p in range(1, self.pages + 1)
+        )
+        return f"<html><body>{pages}</body></html>"
+
+    def image(self, series: int, chapter: int = 0, page: int = 0) -> bytes:
+        seed = (series * 100003 + chapter * 1009 + page) * 7919
+        return png_image(seed, self.image_width, self.image_height)
+
+    def resolve(self, path: str):
+        """(status, content_type, body) for a request path"""
+        if path == "/":
+            return 200, "text/html; charset=utf-8", self.homepage().encode("utf-8")
+        match = _SERIES_RE.match(path)
+        if match and 0 < int(match.group(1)) <= self.series:
+            return 200, "text/html; charset=utf-8", self.series_page(int(match.group(1))).encode("utf-8")
+        match = _CHAPTER_RE.match(path)
+        if match:
+            return 200, "text/html; charset=utf-8", self.chapter_page(*map(int, match.groups())).encode("utf-8")
+        match = _COVER_RE.match(path)
+        if match:
+            return 200, "image/png", self.image(int(match.group(1)))
+        match = _PAGE_RE.match(path)
+        if match:
+            return 200, "image/png", self.image(*map(int, match.groups()))
+        return 404, "text/plain", b"not found"
+
+
+class FixtureServer:
+    """Serve a FixtureSite on 127.0.0.1 from a daemon thread"""
+
+    def __init__(self, site: FixtureSite, port: int = 0):
+        site_ref = site
+
+        class _Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                status, content_type, body = site_ref.resolve(self.path.split("?")[0])
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", port), _Handler)
+        self.httpd.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.httpd.server_port}/"
+
+    def start(self) -> 'FixtureServer':
+        threading.Thread(target=self.httpd.serve_forever, name="fixture-site", daemon=True).start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
@@ -0,0 +1,265 @@
+"""
+End-to-end benchmark of the crawler stages against local stand-ins
+
+    python -m benchmarks.run --series 50 --chapters 10 --pages 12
+    python -m benchmarks.run --stages crawl,download --baseline benchmarks/results/<previous>.json
+
+Starts the synthetic site (benchmarks/fixture_site.py) and an S3 stand-in
+(benchmarks/fake_s3.py, or moto when --s3 moto and it is installed), then runs
+each stage as its own `python main.py <mode>` process in a scratch directory
+with a SQLite database. Per stage it records wall time, CPU time and peak RSS
+of the process (os.wait4) and, from the worker's own metrics textfile, HTML
+pages, images and bytes moved. Results are written as JSON for comparison
+across commits. POSIX only.
+"""
+import os
+import re
+import sys
+import json
+import time
+import shutil
+import socket
+import argparse
+import platform
+import tempfile
+import subprocess
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+
+from .fixture_site import FixtureSite, FixtureServer
+from .fake_s3 import FakeS3Server
+
+WORKER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MAIN = os.path.join(WORKER_DIR, "main.py")
+BUCKET = "bench"
+
+# stage -> (prefix of its results file, stage whose results it reads)
+STAGES = {
+    "crawl": ("crawl_results_", None),
+    "download": ("download_results_", "crawl"),
+    "upload": ("upload_results_", "download"),
+    "database": (None, "upload"),
+    "all": (None, None),
+}
+
+_SAMPLE_RE = re.compile(r'^(\w+)(?:\{(.*)\})? (\S+)$')
+_LABEL_RE = re.compile(r'(\w+)="((?:[^"\\]|\\.)*)"')
+
+
+def read_metrics(path: str) -> List[tuple]:
+    """(name, labels, value) samples of a Prometheus textfile"""
+    samples = []
+    if not os.path.exists(path):
+        return samples
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            match = _SAMPLE_RE.match(line.strip())
+            if match:
+                labels = dict(_LABEL_RE.findall(match.group(2) or ""))
+                samples.append((match.group(1), labels, float(match.group(3))))
+    return samples
+
+
+def metric_sum(samples: List[tuple], name: str, **labels) -> float:
+    return sum(value for sample_name, sample_labels, value in samples
+               if sample_name == name and all(sample_labels.get(k) == v for k, v in labels.items()))
+
+
+def latest_output(cwd: str, prefix: str) -> Optional[str]:
+    output_dir = os.path.join(cwd, "data", "output")
+    if not os.path.isdir(output_dir):
+        return None
+    files = sorted(fn for fn in os.listdir(output_dir) if fn.startswith(prefix) and fn.endswith(".json"))
+    return os.path.join(output_dir, files[-1]) if files else None
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=WORKER_DIR,
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def start_s3(kind: str, root: str):
+    """(endpoint_url, stop) of the S3 stand-in"""
+    if kind == "moto":
+        try:
+            from moto.server import ThreadedMotoServer
+        except ImportError:
+            raise SystemExit("moto is not installed (pip install 'moto[server]'); use --s3 fake")
+        with socket.socket() as s:
+            s.bind(("127.0.0.1", 0))
+            port = s.getsockname()[1]
+        server = ThreadedMotoServer(ip_address="127.0.0.1", port=port)
+        server.start()
+        return f"http://127.0.0.1:{port}", server.stop
+    server = FakeS3Server(root).start()
+    return server.url, server.stop
+
+
+def run_stage(mode: str, args: List[str], cwd: str, env: Dict[str, str]) -> Dict[str, Any]:
+    """Run one `main.py` stage and measure it"""
+    os.makedirs(cwd, exist_ok=True)
+    metrics_file = os.path.join(cwd, f"metrics_{mode}.prom")
+    env = dict(env, METRICS_TEXTFILE=metrics_file)
+    with open(os.path.join(cwd, f"{mode}.log"), "w") as log:
+        start = time.perf_counter()
+        process = subprocess.Popen([sys.executable, MAIN, mode, *args], cwd=cwd, env=env,
+                                   stdout=log, stderr=subprocess.STDOUT)
+        _, status, usage = os.wait4(process.pid, 0)
+        wall = time.perf_counter() - start
+    process.returncode = os.waitstatus_to_exitcode(status)
+
+    samples = read_metrics(metrics_file)
+    html_pages = metric_sum(samples, "crawler_http_request_seconds_count", kind="html")
+    images = metric_sum(samples, "crawler_http_request_seconds_count", kind="image")
+    uploads = metric_sum(samples, "crawler_s3_uploads_total", result="ok")
+    bytes_in = metric_sum(samples, "crawler_http_received_bytes_total")
+    bytes_out = metric_sum(samples, "crawler_s3_sent_bytes_total")
+    cpu = usage.ru_utime + usage.ru_stime
+    # ru_maxrss: kilobytes on Linux, bytes on macOS
+    peak_rss = usage.ru_maxrss if sys.platform == "darwin" else usage.ru_maxrss * 1024
+    mb = 1024 * 1024
+    return {
+        "exit_code": process.returncode,
+        "wall_s": round(wall, 3),
+        "cpu_user_s": round(usage.ru_utime, 3),
+        "cpu_system_s": round(usage.ru_stime, 3),
+        "cpu_utilization": round(cpu / wall, 3) if wall else None,
+        "peak_rss_mb": round(peak_rss / mb, 1),
+        "html_pages": int(html_pages),
+        "images": int(images),
+        "s3_objects": int(uploads),
+        "mb_in": round(bytes_in / mb, 2),
+        "mb_out": round(bytes_out / mb, 2),
+        "pages_per_s": round(html_pages / wall, 2),
+        "images_per_s": round((images or uploads) / wall, 2),
+        "mb_per_s": round((bytes_in + bytes_out) / mb / wall, 2),
+    }
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any]):
+    """Print throughput and resource changes against an earlier results file"""
+    print(f"\nvs {baseline['meta'].get('commit')} ({baseline['meta'].get('started_at')}):")
+    for stage, current in results["stages"].items():
+        previous = baseline.get("stages", {}).get(stage)
+        if not previous:
+            continue
+        changes = []
+        for key in ("wall_s", "images_per_s", "mb_per_s", "cpu_user_s", "peak_rss_mb"):
+            if previous.get(key):
+                changes.append(f"{key} {100 * (current[key] - previous[key]) / previous[key]:+.1f}%")
+        print(f"  {stage:<9} " + ", ".join(changes))
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark crawler stages against a local synthetic site")
+    parser.add_argument("--series", type=int, default=20, help="series on the synthetic homepage")
+    parser.add_argument("--chapters", type=int, default=5, help="chapters per series")
+    parser.add_argument("--pages", type=int, default=8, help="pages per chapter")
+    parser.add_argument("--image-kb", type=int, default=200, help="approximate page size")
+    parser.add_argument("--stages", default="crawl,download,upload,database,all",
+                        help="comma-separated subset of " + ",".join(STAGES))
+    parser.add_argument("--s3", choices=("fake", "moto"), default="fake", help="S3 stand-in")
+    parser.add_argument("--output", default=os.path.join(WORKER_DIR, "benchmarks", "results"),
+                        help="directory of results files")
+    parser.add_argument("--baseline", help="earlier results file to compare against")
+    parser.add_argument("--keep", action="store_true", help="keep the scratch directory")
+    opts = parser.parse_args(argv)
+
+    stages = [stage.strip() for stage in opts.stages.split(",") if stage.strip()]
+    unknown = [stage for stage in stages if stage not in STAGES]
+    if unknown:
+        parser.error(f"unknown stage(s): {', '.join(unknown)}")
+
+    image_width = 800
+    site = FixtureSite(opts.series, opts.chapters, opts.pages,
+                       image_width=image_width, image_height=max(1, opts.image_kb * 1024 // image_width))
+    fixture = FixtureServer(site).start()
+    scratch = tempfile.mkdtemp(prefix="crawler-bench-")
+    endpoint_url, stop_s3 = start_s3(opts.s3, os.path.join(scratch, "s3"))
+
+    env = dict(
+        os.environ,
+        BASE_URL=fixture.url,
+        DELAY_BETWEEN_REQUESTS="0",
+        NO_PROXY="127.0.0.1,localhost",
+        S3_ENDPOINT_URL=endpoint_url,
+        S3_BUCKET=BUCKET,
+        AWS_ACCESS_KEY_ID="bench",
+        AWS_SECRET_ACCESS_KEY="bench",
+        AWS_REGION="us-east-1",
+        DB_SYNC="true",
+        METRICS_PORT="0",
+        PYTHONUNBUFFERED="1",
+    )
+    if opts.s3 == "moto":
+        import boto3
+        boto3.client("s3", endpoint_url=endpoint_url, region_name="us-east-1", aws_access_key_id="bench",
+                     aws_secret_access_key="bench").create_bucket(Bucket=BUCKET)
+
+    results = {
+        "meta": {
+            "commit": git_commit(),
+            "started_at": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "s3": opts.s3,
+            "site": {"series": opts.series, "chapters": opts.chapters, "pages": opts.pages,
+                     "image_bytes": image_width * site.image_height},
+        },
+        "stages": {},
+    }
+    crawl_args = ["--max-series", str(opts.series), "--max-chapters", str(opts.chapters)]
+    try:
+        # Chained stages share one working directory and database; "all" gets fresh ones
+        chained = os.path.join(scratch, "stages")
+        chained_env = dict(env, DATABASE_URL=f"sqlite:///{os.path.join(chained, 'bench.sqlite')}")
+        for stage in stages:
+            prefix, reads = STAGES[stage]
+            if stage == "all":
+                cwd = os.path.join(scratch, "all")
+                stage_env = dict(env, DATABASE_URL=f"sqlite:///{os.path.join(cwd, 'bench.sqlite')}")
+                args = crawl_args
+            else:
+                cwd, stage_env = chained, chained_env
+                args = crawl_args if stage == "crawl" else []
+                if reads:
+                    input_file = latest_output(cwd, STAGES[reads][0])
+                    if not input_file:
+                        print(f"[!] {stage}: no {reads} results to read (include {reads} in --stages)")
+                        continue
+                    args = ["--from", input_file]
+            print(f"⏱️  {stage} ...", flush=True)
+            result = run_stage(stage, args, cwd, stage_env)
+            results["stages"][stage] = result
+            print(f"   {result['wall_s']}s wall, {result['cpu_user_s'] + result['cpu_system_s']:.2f}s CPU, "
+                  f"{result['peak_rss_mb']} MB peak RSS, {result['pages_per_s']} pages/s, "
+                  f"{result['images_per_s']} images/s, {result['mb_per_s']} MB/s"
+                  + (f"  [exit {result['exit_code']}, see {cwd}/{stage}.log]" if result["exit_code"] else ""))
+    finally:
+        fixture.stop()
+        stop_s3()
+        failed = any(stage["exit_code"] for stage in results["stages"].values())
+        if opts.keep or failed:
+            print(f"Scratch directory kept: {scratch}")
+        else:
+            shutil.rmtree(scratch, ignore_errors=True)
+
+    os.makedirs(opts.output, exist_ok=True)
+    ts = datetime.now().strftime('%Y%m%d_%H%M%S')
+    out_file = os.path.join(opts.output, f"bench_{ts}_{results['meta']['commit'] or 'nogit'}.json")
+    with open(out_file, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"📊 Results: {out_file}")
+
+    if opts.baseline:
+        with open(opts.baseline, "r", encoding="utf-8") as f:
+            compare(results, json.load(f))
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
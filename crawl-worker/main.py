@@ -1,27 +1,50 @@
 """
 Main entry point for the crawler system
 """
+import contextlib
+import dataclasses
 import json
 import logging
 import os
-import re
 import sys
+import time
+import signal
+import threading
 from datetime import datetime
-from typing import List, Dict, Any
+from functools import cached_property
+from typing import TYPE_CHECKING, Callable, List, Dict, Any, Optional
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
 load_dotenv()
 
 from src.config.settings import settings, CrawlerSettings
-from src.base.data_models import CrawlConfig
-from src.crawlers.series_crawler import SeriesCrawler
-from src.crawlers.chapter_crawler import ChapterCrawler
-from src.crawlers.downloader import ChapterImageDownloader
-from src.base.s3_uploader import S3Uploader
-from src.base.db_client import DatabaseClient
-from src.utils.file_utils import slugify, chapter_slugify, ensure_dir, ext_from_content_type, ext_from_url, atomic_write
-import requests
+from src.base.data_models import CrawlConfig, SeriesInfo, SeriesCrawl
+from src.base.metrics import REGISTRY, STAGE_SECONDS, STAGE_RUNS, SERVE_CYCLES, SERVE_LAST_CYCLE, SERVE_JOBS
+from src.base import tracing
+from src.utils.file_utils import slugify, chapter_slugify, chapter_title_from_name, ensure_dir, ext_from_content_type, ext_from_url, atomic_write
+
+# Crawlers (bs4, requests), S3 (boto3), the database (SQLAlchemy), image and job
+# modules are imported where a mode first needs them, keeping start-up cheap.
+if TYPE_CHECKING:
+    from src.crawlers.series_crawler import SeriesCrawler
+    from src.crawlers.chapter_crawler import ChapterCrawler
+    from src.crawlers.downloader import ChapterImageDownloader
+    from src.base.s3_uploader import S3Uploader
+    from src.base.asset_index import AssetIndex
+    from src.base.local_store import LocalImageStore
+    from src.base.seen_set import SeenSet
+    from src.base.db_client import DatabaseClient
+    from src.base.http_archive import HttpArchive
+    from src.base.job_api import JobQueue
+    from src.jobs.manifest_publisher import ManifestPublisher
+
+
+def _record_to_json(value):
+    """json.dump default for crawl records"""
+    if hasattr(value, "to_dict"):
+        return value.to_dict()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
 
 
 class CrawlerOrchestrator:
@@ -35,6 +58,9 @@ class CrawlerOrchestrator:
         # Initialize logger first
         self.logger = logging.getLogger(__name__)
         
+        # "cprofile" or "sampling" while running with --profile
+        self.profile_mode = None
+        
         # Create crawler config
         self.crawl_config = CrawlConfig(
             base_url=self.config.BASE_URL,
@@ -46,37 +72,132 @@ class CrawlerOrchestrator:
             output_format=self.config.OUTPUT_FORMAT
         )
         
-        # Initialize crawlers
-        self.series_crawler = SeriesCrawler(self.crawl_config)
-        self.chapter_crawler = ChapterCrawler(self.crawl_config)
-        self.downloader = ChapterImageDownloader(self.crawl_config)
+        # Record/replay archive applied to every crawler (--record/--replay)
+        self.http_archive = None
         
-        # Initialize S3 uploader if enabled
-        self.s3_uploader = None
-        if self.config.S3_ENABLED:
-            try:
-                self.s3_uploader = S3Uploader()
-                self.logger.info("S3 uploader initialized")
-            except Exception as e:
-                self.logger.warning(f"Failed to initialize S3 uploader: {str(e)}")
+        # Resident (serve mode): crawlers keep their sessions between runs; once
+        # draining is set, crawl and download stop early and no new stage starts
+        self.resident = False
+        self.draining = threading.Event()
+        # Called by checkpoint() between series/chapters of crawl and download (serve: run queued jobs)
+        self.on_checkpoint = None
+        self.in_checkpoint = False
         
-        # Initialize database client if enabled
-        self.db_client = None
-        if self.config.DATABASE_ENABLED:
-            try:
-                self.db_client = DatabaseClient()
-                # Only create tables if DB_SYNC is enabled
-                if self.config.DB_SYNC:
-                    try:
-                        self.db_client.create_tables()
-                        self.logger.info("Database tables created successfully")
-                    except Exception as create_error:
-                        self.logger.warning(f"Could not create tables (may already exist or no permission): {str(create_error)}")
-                else:
-                    self.logger.info("DB_SYNC is disabled, skipping table creation")
-                self.logger.info("Database client initialized")
-            except Exception as e:
-                self.logger.warning(f"Failed to initialize database client: {str(e)}")
+        # Crawlers, S3 and database clients are built on first use, so each mode
+        # only imports and connects what it needs (see the properties below)
+    
+    @cached_property
+    def asset_index(self) -> Optional['AssetIndex']:
+        """Local index of downloaded pages and their upload state"""
+        if not self.config.ASSET_INDEX_ENABLED:
+            return None
+        from src.base.asset_index import AssetIndex
+        return AssetIndex(self.config.ASSET_INDEX_PATH)
+    
+    @cached_property
+    def local_store(self) -> Optional['LocalImageStore']:
+        """Byte quota on downloaded pages; uploaded pages are evicted to stay under it"""
+        if not self.asset_index or self.config.LOCAL_STORE_QUOTA_MB <= 0:
+            return None
+        from src.base.local_store import LocalImageStore
+        return LocalImageStore(
+            self.asset_index,
+            quota_bytes=self.config.LOCAL_STORE_QUOTA_MB * 1024 * 1024,
+            high_water=self.config.LOCAL_STORE_HIGH_WATER,
+            low_water=self.config.LOCAL_STORE_LOW_WATER,
+            wait_seconds=self.config.LOCAL_STORE_WAIT_SECONDS
+        )
+    
+    @cached_property
+    def seen_urls(self) -> Optional['SeenSet']:
+        """Bloom filter of chapter URLs imported by earlier runs"""
+        if not self.config.SEEN_SET_ENABLED:
+            return None
+        from src.base.seen_set import SeenSet
+        return SeenSet(self.config.SEEN_SET_PATH, capacity=self.config.SEEN_SET_CAPACITY,
+                       fp_rate=self.config.SEEN_SET_FP_RATE)
+    
+    @cached_property
+    def series_crawler(self) -> 'SeriesCrawler':
+        from src.crawlers.series_crawler import SeriesCrawler
+        return self._with_archive(SeriesCrawler(self.crawl_config))
+    
+    @cached_property
+    def chapter_crawler(self) -> 'ChapterCrawler':
+        from src.crawlers.chapter_crawler import ChapterCrawler
+        return self._with_archive(ChapterCrawler(self.crawl_config))
+    
+    @cached_property
+    def downloader(self) -> 'ChapterImageDownloader':
+        from src.crawlers.downloader import ChapterImageDownloader
+        return self._with_archive(ChapterImageDownloader(self.crawl_config, asset_index=self.asset_index))
+    
+    @cached_property
+    def s3_uploader(self) -> Optional['S3Uploader']:
+        """S3 uploader, or None if disabled or not configured"""
+        if not self.config.S3_ENABLED:
+            return None
+        try:
+            from src.base.s3_uploader import S3Uploader
+            s3_uploader = S3Uploader(
+                max_workers=self.config.S3_UPLOAD_WORKERS,
+                multipart_threshold_mb=self.config.S3_MULTIPART_THRESHOLD_MB,
+                content_addressed=self.config.S3_CONTENT_ADDRESSED,
+                blob_index_path=self.config.BLOB_INDEX_PATH
+            )
+            self.logger.info("S3 uploader initialized")
+            return s3_uploader
+        except Exception as e:
+            self.logger.warning(f"Failed to initialize S3 uploader: {str(e)}")
+            return None
+    
+    @cached_property
+    def db_client(self) -> Optional['DatabaseClient']:
+        """Database client, or None if disabled or not configured"""
+        if not self.config.DATABASE_ENABLED:
+            return None
+        try:
+            from src.base.db_client import DatabaseClient
+            db_client = DatabaseClient()
+            # Only create tables if DB_SYNC is enabled
+            if self.config.DB_SYNC:
+                try:
+                    db_client.create_tables()
+                    self.logger.info("Database tables created successfully")
+                except Exception as create_error:
+                    self.logger.warning(f"Could not create tables (may already exist or no permission): {str(create_error)}")
+            else:
+                self.logger.info("DB_SYNC is disabled, skipping table creation")
+            self.logger.info("Database client initialized")
+            return db_client
+        except Exception as e:
+            self.logger.warning(f"Failed to initialize database client: {str(e)}")
+            return None
+    
+    def checkpoint(self):
+        """Series/chapter boundary of a long stage: let on_checkpoint run (not re-entrantly) before going on"""
+        if self.on_checkpoint is None or self.in_checkpoint:
+            return
+        self.in_checkpoint = True
+        try:
+            self.on_checkpoint()
+        finally:
+            self.in_checkpoint = False
+    
+    def retry_failed(self):
+        """Forget the S3 uploader/database client if building it failed, so the next use tries again"""
+        for name in ("s3_uploader", "db_client"):
+            if name in self.__dict__ and self.__dict__[name] is None:
+                del self.__dict__[name]
+    
+    def _built(self, name: str):
+        """A lazily built component if it has been built, else None"""
+        return self.__dict__.get(name)
+    
+    def _with_archive(self, crawler):
+        if self.http_archive is not None:
+            crawler.http_client.archive = self.http_archive
+        return crawler
     
     def _setup_logging(self):
         """Setup logging configuration"""
@@ -88,16 +209,46 @@ class CrawlerOrchestrator:
             ]
         )
     
-    def crawl_all(self, max_series: int = None, max_chapters_per_series: int = None) -> Dict[str, Any]:
+    def use_http_archive(self, archive: 'HttpArchive'):
+        """Record every fetch of the crawlers to, or replay them from, an HTTP archive"""
+        self.http_archive = archive
+        for name in ("series_crawler", "chapter_crawler", "downloader"):
+            crawler = self._built(name)
+            if crawler:
+                crawler.http_client.archive = archive
+    
+    def close_crawlers(self):
+        """Close the HTTP sessions of the crawlers built so far"""
+        for name in ("series_crawler", "chapter_crawler", "downloader"):
+            crawler = self._built(name)
+            if crawler:
+                crawler.close()
+    
+    def close(self):
+        """Close every component built so far (crawlers, S3 pool, database engine, asset index, seen-set)"""
+        self.close_crawlers()
+        for name in ("s3_uploader", "db_client", "asset_index", "seen_urls"):
+            component = self._built(name)
+            if component:
+                try:
+                    component.close()
+                except Exception as e:
+                    self.logger.warning(f"Failed to close {name}: {str(e)}")
+    
+    def crawl_all(self, max_series: int = None, max_chapters_per_series: int = None, priority: bool = False,
+                  series_list: List[SeriesInfo] = None, skip_seen: bool = True) -> Dict[str, Any]:
         """
         Crawl all levels: Series -> Chapters -> Images
         
         Args:
             max_series: Maximum number of series to crawl (None for all)
             max_chapters_per_series: Maximum chapters per series (None for all)
+            priority: Order series/chapters by recent readership and freshness before applying limits
+            series_list: Crawl these series instead of the homepage list
+            skip_seen: Leave out chapters the seen-set has as imported (when SEEN_SET_ENABLED)
             
         Returns:
-            Complete crawl results
+            Complete crawl results; "series" holds SeriesCrawl records (serialized by save_results)
         """
         self.logger.info("Starting full crawl process")
         
@@ -112,17 +263,34 @@ class CrawlerOrchestrator:
         
         try:
             # Level 1: Crawl series
-            self.logger.info("=== LEVEL 1: Crawling series ===")
-            series_result = self.series_crawler.crawl(self.config.BASE_URL)
-            
-            if not series_result.success:
-                self.logger.error(f"Series crawl failed: {series_result.error_message}")
-                results["errors"].append(f"Series crawl failed: {series_result.error_message}")
-                return results
-            
-            series_list = series_result.data
+            if series_list is None:
+                self.logger.info("=== LEVEL 1: Crawling series ===")
+                series_result = self.series_crawler.crawl(self.config.BASE_URL)
+                
+                if not series_result.success:
+                    self.logger.error(f"Series crawl failed: {series_result.error_message}")
+                    results["errors"].append(f"Series crawl failed: {series_result.error_message}")
+                    return results
+                
+                series_list = series_result.data
             results["total_series"] = len(series_list)
             
+            # Most-read series first, so limits and rate budget go to them
+            prioritizer = None
+            if priority:
+                if self.db_client:
+                    from src.crawlers.crawl_priority import CrawlPrioritizer
+                    prioritizer = CrawlPrioritizer(
+                        self.db_client,
+                        window=self.config.PRIORITY_WINDOW,
+                        lookback_days=self.config.PRIORITY_LOOKBACK_DAYS,
+                        freshness_hours=self.config.PRIORITY_FRESHNESS_HOURS,
+                        freshness_weight=self.config.PRIORITY_FRESHNESS_WEIGHT
+                    )
+                    series_list = prioritizer.order_series(series_list)
+                else:
+                    self.logger.warning("Priority mode needs the database client, using homepage order")
+            
             # Limit series if specified
             if max_series:
                 series_list = series_list[:max_series]
@@ -130,68 +298,59 @@ class CrawlerOrchestrator:
             
             # Process each series
             for series_data in series_list:
+                self.checkpoint()
+                if self.draining.is_set():
+                    self.logger.info("Draining, skipping the remaining series")
+                    break
                 try:
-                    self.logger.info(f"Processing series: {series_data['title']}")
+                    self.logger.info(f"Processing series: {series_data.title}")
                     
                     # Level 2: Crawl chapters for this series
-                    chapter_result = self.chapter_crawler.crawl(
-                        series_data['series_url'], 
-                        series_data['title']
-                    )
+                    with tracing.span("series", title=series_data.title):
+                        chapter_result = self.chapter_crawler.crawl(
+                            series_data.series_url, 
+                            series_data.title
+                        )
                     
                     if not chapter_result.success:
-                        self.logger.warning(f"Chapter crawl failed for {series_data['title']}: {chapter_result.error_message}")
-                        results["errors"].append(f"Chapter crawl failed for {series_data['title']}: {chapter_result.error_message}")
+                        self.logger.warning(f"Chapter crawl failed for {series_data.title}: {chapter_result.error_message}")
+                        results["errors"].append(f"Chapter crawl failed for {series_data.title}: {chapter_result.error_message}")
                         continue
                     
                     # Extract chapters, authors, and synopsis from result
                     chapter_data_result = chapter_result.data
-                    if isinstance(chapter_data_result, dict):
-                        chapters = chapter_data_result.get("chapters", [])
-                        authors = chapter_data_result.get("authors", [])
-                        synopsis = chapter_data_result.get("synopsis")
-                    else:
-                        # Backward compatibility: if data is still a list
-                        chapters = chapter_data_result
-                        authors = []
-                        synopsis = None
+                    chapters = chapter_data_result.get("chapters", [])
+                    authors = chapter_data_result.get("authors", [])
+                    synopsis = chapter_data_result.get("synopsis")
                     
                     results["total_chapters"] += len(chapters)
                     
+                    # Chapters downloaded by earlier runs, so limits go to new ones
+                    if skip_seen and self.seen_urls:
+                        unseen = [c for c in chapters if c.chapter_url not in self.seen_urls]
+                        if len(unseen) < len(chapters):
+                            self.logger.info(f"Skipping {len(chapters) - len(unseen)} already imported chapters of {series_data.title}")
+                        chapters = unseen
+                    
+                    if prioritizer:
+                        chapters = prioritizer.order_chapters(series_data.title, chapters)
+                    
                     # Limit chapters if specified
                     if max_chapters_per_series:
                         chapters = chapters[:max_chapters_per_series]
-                        self.logger.info(f"Limited to {len(chapters)} chapters for {series_data['title']}")
+                        self.logger.info(f"Limited to {len(chapters)} chapters for {series_data.title}")
                     
                     # Level 3: (Optional) Image URLs could be gathered here if needed
-                    series_with_chapters = {
-                        **series_data,
-                        "chapters": [],
-                        "authors": authors,
-                        "synopsis": synopsis
-                    }
-                    
-                    for chapter_data in chapters:
-                        try:
-                            self.logger.info(f"Processing chapter: {chapter_data['chapter_number']}")
-                            
-                            chapter_with_images = {
-                                **chapter_data,
-                                "images": []
-                            }
-                            
-                            series_with_chapters["chapters"].append(chapter_with_images)
-                            
-                        except Exception as e:
-                            self.logger.error(f"Error processing chapter {chapter_data['chapter_number']}: {str(e)}")
-                            results["errors"].append(f"Error processing chapter {chapter_data['chapter_number']}: {str(e)}")
-                            continue
-                    
-                    results["series"].append(series_with_chapters)
+                    results["series"].append(SeriesCrawl(
+                        info=series_data,
+                        chapters=tuple(chapters),
+                        authors=tuple(authors),
+                        synopsis=synopsis
+                    ))
                     
                 except Exception as e:
-                    self.logger.error(f"Error processing series {series_data['title']}: {str(e)}")
-                    results["errors"].append(f"Error processing series {series_data['title']}: {str(e)}")
+                    self.logger.error(f"Error processing series {series_data.title}: {str(e)}")
+                    results["errors"].append(f"Error processing series {series_data.title}: {str(e)}")
                     continue
             
             results["crawl_completed"] = datetime.now().isoformat()
@@ -202,10 +361,9 @@ class CrawlerOrchestrator:
             results["errors"].append(f"Fatal error: {str(e)}")
         
         finally:
-            # Clean up
-            self.series_crawler.close()
-            self.chapter_crawler.close()
-            self.downloader.close()
+            # Clean up (a resident worker keeps its connection pools for the next cycle)
+            if not self.resident:
+                self.close_crawlers()
         
         return results
     
@@ -218,7 +376,7 @@ class CrawlerOrchestrator:
         filepath = os.path.join(self.config.OUTPUT_DIR, filename)
         
         with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(results, f, ensure_ascii=False, indent=2)
+            json.dump(results, f, ensure_ascii=False, indent=2, default=_record_to_json)
         
         self.logger.info(f"Results saved to: {filepath}")
         return filepath
@@ -228,7 +386,8 @@ def _cmd_crawl(orchestrator: CrawlerOrchestrator, args: List[str]):
     # Defaults
     max_series = None
     max_chapters = None
-    # Parse simple flags: --max-series N --max-chapters N
+    priority = "--priority" in args
+    # Parse simple flags: --max-series N --max-chapters N --priority
     for i, a in enumerate(args):
         if a == "--max-series" and i + 1 < len(args):
             try:
@@ -241,13 +400,17 @@ def _cmd_crawl(orchestrator: CrawlerOrchestrator, args: List[str]):
             except Exception:
                 pass
 
-    results = orchestrator.crawl_all(max_series=max_series, max_chapters_per_series=max_chapters)
+    results = orchestrator.crawl_all(max_series=max_series, max_chapters_per_series=max_chapters, priority=priority)
     output_file = orchestrator.save_results(results)
     print(f"Results saved to: {output_file}")
 
 
 def _cmd_download(orchestrator: CrawlerOrchestrator, args: List[str]):
-    # Expected flags: --from <results.json>
+    import requests
+    from src.utils.image_probe import sniff_image
+    from src.base.local_store import StoreFullError
+    # Expected flags: --from <results.json> [--stream] [--keep-local] [--cas] [--no-evict] [--no-wait]
+    # [--upload-when-full]
     input_file = None
     for i, a in enumerate(args):
         if a == "--from" and i + 1 < len(args):
@@ -256,66 +419,355 @@ def _cmd_download(orchestrator: CrawlerOrchestrator, args: List[str]):
         print("[!] Please provide a valid file via --from <path/to/results.json>")
         return
 
+    # --stream uploads each fetched image straight to S3; local copies only with --keep-local
+    stream = "--stream" in args or orchestrator.config.STREAM_TO_S3
+    keep_local = "--keep-local" in args or orchestrator.config.STREAM_KEEP_LOCAL
+    uploader = None
+    if stream:
+        if not orchestrator.s3_uploader:
+            print("[!] --stream requires the S3 uploader. Please set S3_ENABLED=True in settings and configure AWS credentials.")
+            return
+        uploader = orchestrator.s3_uploader
+        if "--cas" in args:
+            uploader.content_addressed = True
+
     with open(input_file, "r", encoding="utf-8") as f:
         results = json.load(f)
 
+    # Near the local store quota:
+    #   --no-evict keeps uploaded pages a later stage of the same pipeline still reads (e.g. transcode)
+    #   --upload-when-full uploads pending pages here so they can be evicted (nothing reads them
+    #   locally later); like --no-wait, it stops at once instead of waiting for other workers to upload
+    evict = "--no-evict" not in args
+    flush = None
+    wait = "--no-wait" not in args and "--upload-when-full" not in args
+    if "--upload-when-full" in args and not uploader and evict:
+        if not orchestrator.s3_uploader:
+            print("[!] --upload-when-full requires the S3 uploader. Please set S3_ENABLED=True in settings and configure AWS credentials.")
+            return
+        if "--cas" in args:
+            orchestrator.s3_uploader.content_addressed = True
+        flush = lambda: _upload_pending(orchestrator)
+
     total_downloaded = 0
+    store_full = False
     for series in results.get("series", []):
+        if store_full or orchestrator.draining.is_set():
+            break
         title = series.get("title")
-        # Download cover image if available
-        cover_url = series.get("cover_image")
-        if cover_url:
-            try:
-                headers = {
-                    "User-Agent": orchestrator.crawl_config.user_agent,
-                    "Referer": orchestrator.crawl_config.base_url,
-                    "Accept": "image/avif,image/webp,image/apng,image/*,*/*;q=0.8",
-                }
-                resp = requests.get(cover_url, headers=headers, timeout=orchestrator.crawl_config.timeout)
-                resp.raise_for_status()
-                content_type = resp.headers.get("Content-Type")
-                ext = ext_from_content_type(content_type) or ext_from_url(cover_url) or ".jpg"
-                series_slug = slugify(title or "unknown")
-                series_dir = f"data/images/{series_slug}"
-                ensure_dir(series_dir)
-                local_cover_path = f"{series_dir}/cover{ext}"
-                atomic_write(local_cover_path, resp.content)
-                series["local_cover"] = {
-                    "local_path": local_cover_path,
-                    "bytes": len(resp.content),
-                    "content_type": content_type,
-                    "downloaded_at": datetime.now().isoformat(),
-                }
-            except Exception as e:
-                print(f"[!] Failed to download cover for {title}: {str(e)}")
-        for chapter in series.get("chapters", []):
-            manifest = orchestrator.downloader.download_chapter(
-                chapter_url=chapter["chapter_url"],
-                chapter_number=chapter["chapter_number"],
-                series_title=title,
-            )
-            chapter["local_manifest"] = manifest
-            total_downloaded += manifest.get("count", 0)
+        with tracing.span("series", title=title):
+            series_slug = slugify(title or "unknown")
+            # Download cover image if available
+            cover_url = series.get("cover_image")
+            if cover_url:
+                try:
+                    headers = {
+                        "User-Agent": orchestrator.crawl_config.user_agent,
+                        "Referer": orchestrator.crawl_config.base_url,
+                        "Accept": "image/avif,image/webp,image/apng,image/*,*/*;q=0.8",
+                    }
+                    resp = requests.get(cover_url, headers=headers, timeout=orchestrator.crawl_config.timeout)
+                    resp.raise_for_status()
+                    content_type = resp.headers.get("Content-Type")
+                    probe = sniff_image(resp.content)
+                    ext = probe["ext"] if probe else (ext_from_content_type(content_type) or ext_from_url(cover_url) or ".jpg")
+                    local_cover_path = None
+                    if keep_local or not uploader:
+                        series_dir = f"data/images/{series_slug}"
+                        ensure_dir(series_dir)
+                        local_cover_path = f"{series_dir}/cover{ext}"
+                        atomic_write(local_cover_path, resp.content)
+                        series["local_cover"] = {
+                            "local_path": local_cover_path,
+                            "bytes": len(resp.content),
+                            "content_type": content_type,
+                            "downloaded_at": datetime.now().isoformat(),
+                        }
+                    if uploader:
+                        s3_key = f"stories/{series_slug}/cover{ext}"
+                        s3_url = uploader.upload_bytes(resp.content, s3_key)
+                        if s3_url:
+                            series["cover_s3"] = s3_url
+                            series["cover_upload"] = {
+                                "local_path": local_cover_path,
+                                "s3_key": s3_key,
+                                "s3_url": s3_url,
+                                "bytes": len(resp.content),
+                                "content_type": content_type,
+                            }
+                except Exception as e:
+                    print(f"[!] Failed to download cover for {title}: {str(e)}")
+            for chapter in series.get("chapters", []):
+                orchestrator.checkpoint()
+                if orchestrator.draining.is_set():
+                    print("[!] Draining, skipping the remaining chapters")
+                    break
+                if orchestrator.local_store and (keep_local or not uploader):
+                    try:
+                        orchestrator.local_store.ensure_capacity(evict=evict, flush=flush, wait=wait)
+                    except StoreFullError as e:
+                        print(f"[!] Stopping downloads: {str(e)}")
+                        store_full = True
+                        break
+                manifest = orchestrator.downloader.download_chapter(
+                    chapter_url=chapter["chapter_url"],
+                    chapter_number=chapter["chapter_number"],
+                    series_title=title,
+                    uploader=uploader,
+                    keep_local=keep_local,
+                )
+                if uploader:
+                    chapter["s3_upload"] = manifest.pop("s3_upload")
+                chapter["local_manifest"] = manifest
+                total_downloaded += manifest.get("count", 0)
 
     # Save updated results alongside original
     ts = datetime.now().strftime('%Y%m%d_%H%M%S')
     out_file = os.path.join(orchestrator.config.OUTPUT_DIR, f"download_results_{ts}.json")
     with open(out_file, "w", encoding="utf-8") as f:
         json.dump(results, f, ensure_ascii=False, indent=2)
-    print(f"Downloaded {total_downloaded} images. Results saved to: {out_file}")
+    if uploader:
+        print(f"Downloaded and streamed {total_downloaded} images to S3. Results saved to: {out_file}")
+    else:
+        print(f"Downloaded {total_downloaded} images. Results saved to: {out_file}")
+
+
+def _cmd_transcode(orchestrator: CrawlerOrchestrator, args: List[str]):
+    """Re-encode downloaded pages to WebP/AVIF plus a mobile-width variant"""
+    from src.utils.image_transcoder import ImageTranscoder
+    # Expected flags: --from <download_results.json> [--format webp|avif] [--quality N] [--mobile-width N]
+    input_file = None
+    fmt = orchestrator.config.TRANSCODE_FORMAT
+    quality = orchestrator.config.TRANSCODE_QUALITY
+    mobile_width = orchestrator.config.TRANSCODE_MOBILE_WIDTH
+    for i, a in enumerate(args):
+        if a == "--from" and i + 1 < len(args):
+            input_file = args[i + 1]
+        if a == "--format" and i + 1 < len(args):
+            fmt = args[i + 1].lower()
+        if a == "--quality" and i + 1 < len(args):
+            try:
+                quality = int(args[i + 1])
+            except Exception:
+                pass
+        if a == "--mobile-width" and i + 1 < len(args):
+            try:
+                mobile_width = int(args[i + 1])
+            except Exception:
+                pass
+    
+    if not input_file or not os.path.exists(input_file):
+        print("[!] Please provide a valid download results file via --from <path/to/download_results.json>")
+        return
+    
+    try:
+        transcoder = ImageTranscoder(fmt=fmt, quality=quality, mobile_width=mobile_width,
+                                     max_workers=orchestrator.config.TRANSCODE_WORKERS)
+    except (ImportError, ValueError) as e:
+        print(f"[!] {str(e)}")
+        return
+    
+    with open(input_file, "r", encoding="utf-8") as f:
+        results = json.load(f)
+    
+    chapter_dirs = []
+    chapters = []
+    read_chapters = []
+    for series in results.get("series", []):
+        series_slug = slugify(series.get("title", "unknown"))
+        for chapter in series.get("chapters", []):
+            if not chapter.get("local_manifest"):
+                continue
+            chapter_slug = chapter_slugify(chapter.get('chapter_number', 'unknown'))
+            chapter_dirs.append(f"data/images/{series_slug}/{chapter_slug}")
+            chapters.append(chapter)
+            read_chapters.append((series_slug, chapter_slug))
+    
+    # Pages read by a stage count as used for the local store's eviction order
+    if orchestrator.asset_index:
+        orchestrator.asset_index.touch(read_chapters)
+    
+    total_pages = 0
+    total_failed = 0
+    for chapter, transcoded in zip(chapters, transcoder.transcode_chapters(chapter_dirs)):
+        chapter["transcoded"] = transcoded
+        total_pages += len(transcoded["web"])
+        total_failed += len(transcoded["failed"])
+    
+    ts = datetime.now().strftime('%Y%m%d_%H%M%S')
+    out_file = os.path.join(orchestrator.config.OUTPUT_DIR, f"transcode_results_{ts}.json")
+    with open(out_file, "w", encoding="utf-8") as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+    
+    print(f"Transcoded {total_pages} pages to {fmt} ({total_failed} failed). Results saved to: {out_file}")
+
+
+def _cmd_filler(orchestrator: CrawlerOrchestrator, args: List[str]):
+    """Flag near-duplicate filler pages (credits, recruitment, ads) by perceptual hash"""
+    from src.utils.perceptual_hash import PerceptualHasher, FillerRegistry, BKTree
+    # Expected flags: --from <download_results.json> [--distance N] [--learn N] [--mark <image>]...
+    input_file = None
+    max_distance = orchestrator.config.FILLER_MAX_DISTANCE
+    learn_min_chapters = orchestrator.config.FILLER_LEARN_MIN_CHAPTERS
+    mark_paths = []
+    for i, a in enumerate(args):
+        if a == "--from" and i + 1 < len(args):
+            input_file = args[i + 1]
+        if a == "--mark" and i + 1 < len(args):
+            mark_paths.append(args[i + 1])
+        if a == "--distance" and i + 1 < len(args):
+            try:
+                max_distance = int(args[i + 1])
+            except Exception:
+                pass
+        if a == "--learn" and i + 1 < len(args):
+            try:
+                learn_min_chapters = int(args[i + 1])
+            except Exception:
+                pass
+    
+    if not input_file or not os.path.exists(input_file):
+        print("[!] Please provide a valid download results file via --from <path/to/download_results.json>")
+        return
+    
+    try:
+        hasher = PerceptualHasher(max_workers=orchestrator.config.FILLER_WORKERS)
+    except ImportError as e:
+        print(f"[!] {str(e)}")
+        return
+    registry = FillerRegistry(orchestrator.config.FILLER_REGISTRY_PATH)
+    
+    # Seed known filler from example images
+    for path, value in zip(mark_paths, hasher.hash_files(mark_paths)):
+        if value is None:
+            print(f"[!] Could not hash {path}")
+        elif registry.add(value, os.path.basename(path), max_distance):
+            print(f"Registered filler: {path}")
+    
+    with open(input_file, "r", encoding="utf-8") as f:
+        results = json.load(f)
+    
+    pages = []
+    for series in results.get("series", []):
+        for chapter in series.get("chapters", []):
+            for img in (chapter.get("local_manifest") or {}).get("images", []):
+                if img.get("local_path") and os.path.exists(img["local_path"]):
+                    pages.append((series, chapter, img))
+    
+    hashes = hasher.hash_files([img["local_path"] for _, _, img in pages])
+    
+    # Learn: a near-identical page recurring in many chapters of a series is filler
+    if learn_min_chapters:
+        candidates_by_series = {}
+        for (series, chapter, img), value in zip(pages, hashes):
+            if value is None:
+                continue
+            candidates = candidates_by_series.setdefault(id(series), (series, BKTree(), []))
+            matches = candidates[1].search(value, max_distance)
+            if matches:
+                matches[0][2]["chapters"].add(chapter["chapter_url"])
+            else:
+                candidate = {"hash": value, "chapters": {chapter["chapter_url"]}}
+                candidates[1].add(value, candidate)
+                candidates[2].append(candidate)
+        for series, _, candidate_list in candidates_by_series.values():
+            for candidate in candidate_list:
+                if len(candidate["chapters"]) >= learn_min_chapters:
+                    if registry.add(candidate["hash"], f"learned: {series.get('title')}", max_distance):
+                        print(f"Learned filler page recurring in {len(candidate['chapters'])} chapters of {series.get('title')}")
+    
+    total_flagged = 0
+    for (series, chapter, img), value in zip(pages, hashes):
+        img.pop("filler", None)
+        img.pop("filler_distance", None)
+        if value is None:
+            continue
+        img["phash"] = f"{value:016x}"
+        match = registry.match(value, max_distance)
+        if match:
+            img["filler"] = True
+            img["filler_distance"] = match[0]
+            total_flagged += 1
+    
+    registry.save()
+    
+    # Keep the asset index in step so "upload --pending" and the database fallback see the flags
+    if orchestrator.asset_index:
+        read_chapters = []
+        for series in results.get("series", []):
+            series_slug = slugify(series.get("title") or "unknown")
+            for chapter in series.get("chapters", []):
+                images = (chapter.get("local_manifest") or {}).get("images", [])
+                if images:
+                    chapter_slug = chapter_slugify(chapter.get("chapter_number", "unknown"))
+                    orchestrator.asset_index.mark_filler(
+                        series_slug, chapter_slug, [img["filename"] for img in images if img.get("filler")]
+                    )
+                    read_chapters.append((series_slug, chapter_slug))
+        orchestrator.asset_index.touch(read_chapters)
+    
+    ts = datetime.now().strftime('%Y%m%d_%H%M%S')
+    out_file = os.path.join(orchestrator.config.OUTPUT_DIR, f"filler_results_{ts}.json")
+    with open(out_file, "w", encoding="utf-8") as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+    
+    print(f"Hashed {len(pages)} pages, flagged {total_flagged} as filler ({len(registry.entries)} known). Results saved to: {out_file}")
+
+
+def _upload_pending(orchestrator: CrawlerOrchestrator, sync: bool = False):
+    """Upload every page the asset index does not have as uploaded, without a results file"""
+    if not orchestrator.asset_index:
+        print("[!] --pending requires the asset index. Please set ASSET_INDEX_ENABLED=True in settings.")
+        return
+    
+    # Pages flagged by the filler stage are never served, so never uploaded
+    pending = orchestrator.asset_index.pending_uploads(skip_filler=orchestrator.config.FILLER_SKIP)
+    upload_jobs = []
+    for (series_slug, chapter_slug), rows in pending.items():
+        rows = [row for row in rows if row["local_path"]]
+        if not rows:
+            continue
+        upload_jobs.append({
+            "chapter_dir": os.path.dirname(rows[0]["local_path"]),
+            "series_slug": series_slug,
+            "chapter_slug": chapter_slug,
+            "filenames": [row["filename"] for row in rows],
+            "sha256s": {row["filename"]: row["sha256"] for row in rows},
+        })
+    print(f"{sum(len(job['filenames']) for job in upload_jobs)} pending page(s) in {len(upload_jobs)} chapter(s)")
+    
+    all_upload_results = orchestrator.s3_uploader.upload_chapters(upload_jobs, sync=sync) if upload_jobs else []
+    for job, upload_results in zip(upload_jobs, all_upload_results):
+        orchestrator.asset_index.mark_uploads(job["series_slug"], job["chapter_slug"], upload_results)
+    
+    total_uploaded = sum(r["success_count"] for r in all_upload_results)
+    total_failed = sum(len(r["failed"]) for r in all_upload_results)
+    print(f"Upload completed: {total_uploaded} successful, {total_failed} failed")
 
 
 def _cmd_upload(orchestrator: CrawlerOrchestrator, args: List[str]):
     """Upload downloaded images to S3"""
+    import requests
+    from src.utils.image_probe import sniff_image
+    from src.base.asset_index import UPLOAD_DONE
     if not orchestrator.s3_uploader:
         print("[!] S3 uploader not initialized. Please set S3_ENABLED=True in settings and configure AWS credentials.")
         return
     
-    # Expected flags: --from <download_results.json>
+    # Expected flags: --from <download_results.json> [--sync] [--cas] [--force] | --pending
     input_file = None
     for i, a in enumerate(args):
         if a == "--from" and i + 1 < len(args):
             input_file = args[i + 1]
+    sync = "--sync" in args
+    # --force re-uploads pages the asset index already records as uploaded
+    force = "--force" in args
+    if "--cas" in args:
+        orchestrator.s3_uploader.content_addressed = True
+    
+    if "--pending" in args:
+        _upload_pending(orchestrator, sync=sync)
+        return
     
     if not input_file or not os.path.exists(input_file):
         print("[!] Please provide a valid download results file via --from <path/to/download_results.json>")
@@ -326,6 +778,8 @@ def _cmd_upload(orchestrator: CrawlerOrchestrator, args: List[str]):
     
     total_uploaded = 0
     total_failed = 0
+    upload_jobs = []
+    upload_chapters = []
     
     for series in results.get("series", []):
         series_title = series.get("title", "unknown")
@@ -336,7 +790,10 @@ def _cmd_upload(orchestrator: CrawlerOrchestrator, args: List[str]):
             local_cover_path = local_cover["local_path"]
             ext = os.path.splitext(local_cover_path)[1] or ".jpg"
             s3_key = f"stories/{series_slug}/cover{ext}"
-            s3_url = orchestrator.s3_uploader.upload_file(local_cover_path, s3_key)
+            if sync:
+                s3_url = orchestrator.s3_uploader.sync_file(local_cover_path, s3_key, None, head=True)["s3_url"]
+            else:
+                s3_url = orchestrator.s3_uploader.upload_file(local_cover_path, s3_key)
             if s3_url:
                 series["cover_s3"] = s3_url
                 series["cover_upload"] = {
@@ -356,7 +813,8 @@ def _cmd_upload(orchestrator: CrawlerOrchestrator, args: List[str]):
                     resp = requests.get(cover_url, headers=headers, timeout=orchestrator.crawl_config.timeout)
                     resp.raise_for_status()
                     content_type = resp.headers.get("Content-Type")
-                    ext = ext_from_content_type(content_type) or ext_from_url(cover_url) or ".jpg"
+                    probe = sniff_image(resp.content)
+                    ext = probe["ext"] if probe else (ext_from_content_type(content_type) or ext_from_url(cover_url) or ".jpg")
                     series_dir = f"data/images/{series_slug}"
                     ensure_dir(series_dir)
                     local_cover_path = f"{series_dir}/cover{ext}"
@@ -385,23 +843,71 @@ def _cmd_upload(orchestrator: CrawlerOrchestrator, args: List[str]):
                 print(f"[!] No local images found for {series_title} - {chapter_number}")
                 continue
             
-            chapter_dir = local_manifest.get("saved_at", "").split("T")[0]  # This is wrong, let me fix
-            # Actually, we need to reconstruct the path
             chapter_dir = f"data/images/{series_slug}/{chapter_slug}"
+            transcoded = chapter.get("transcoded")
+            
+            # Indexed pages need no directory listing; fully uploaded chapters need no local files
+            rows = []
+            if orchestrator.asset_index and not transcoded:
+                rows = orchestrator.asset_index.chapter_pages(series_slug, chapter_slug)
             
-            if not os.path.exists(chapter_dir):
+            if not rows and not os.path.exists(chapter_dir):
                 print(f"[!] Chapter directory not found: {chapter_dir}")
                 continue
             
-            print(f"Uploading {series_title} - {chapter_number}...")
-            upload_results = orchestrator.s3_uploader.upload_chapter_images(
-                chapter_dir, series_slug, chapter_slug
-            )
-            
-            # Update chapter with S3 URLs
-            chapter["s3_upload"] = upload_results
-            total_uploaded += upload_results["success_count"]
-            total_failed += len(upload_results["failed"])
+            print(f"Queued {series_title} - {chapter_number}")
+            skip_stems = set()
+            if orchestrator.config.FILLER_SKIP:
+                skip_stems = {
+                    os.path.splitext(img["filename"])[0]
+                    for img in local_manifest.get("images", []) if img.get("filler")
+                }
+            if transcoded:
+                # Transcoded pages replace the originals; mobile variants go under m/
+                upload_jobs.append({
+                    "chapter_dir": f"{chapter_dir}/web",
+                    "series_slug": series_slug,
+                    "chapter_slug": chapter_slug,
+                    "skip_stems": skip_stems,
+                })
+                upload_chapters.append((chapter, "s3_upload"))
+                if transcoded.get("mobile"):
+                    upload_jobs.append({
+                        "chapter_dir": f"{chapter_dir}/mobile",
+                        "series_slug": series_slug,
+                        "chapter_slug": f"{chapter_slug}/m",
+                        "skip_stems": skip_stems,
+                    })
+                    upload_chapters.append((chapter, "s3_upload_mobile"))
+            else:
+                job = {
+                    "chapter_dir": chapter_dir,
+                    "series_slug": series_slug,
+                    "chapter_slug": chapter_slug,
+                    "sha256s": {img["filename"]: img.get("sha256") for img in local_manifest.get("images", [])},
+                    "skip_stems": skip_stems,
+                }
+                if rows:
+                    job["filenames"] = [row["filename"] for row in rows]
+                    if not force:
+                        job["done"] = {
+                            row["filename"]: {"s3_key": row["s3_key"], "s3_url": row["s3_url"]}
+                            for row in rows if row["upload_state"] == UPLOAD_DONE and row["s3_url"]
+                        }
+                upload_jobs.append(job)
+                upload_chapters.append((chapter, "s3_upload"))
+    
+    # Upload pages of all chapters in parallel on the shared client
+    all_upload_results = orchestrator.s3_uploader.upload_chapters(upload_jobs, sync=sync) if upload_jobs else []
+    total_skipped = 0
+    for job, (chapter, result_key), upload_results in zip(upload_jobs, upload_chapters, all_upload_results):
+        # Update chapter with S3 URLs
+        chapter[result_key] = upload_results
+        if orchestrator.asset_index and not chapter.get("transcoded"):
+            orchestrator.asset_index.mark_uploads(job["series_slug"], job["chapter_slug"], upload_results)
+        total_uploaded += upload_results["success_count"]
+        total_failed += len(upload_results["failed"])
+        total_skipped += upload_results["skipped_count"]
     
     # Save updated results
     ts = datetime.now().strftime('%Y%m%d_%H%M%S')
@@ -409,12 +915,100 @@ def _cmd_upload(orchestrator: CrawlerOrchestrator, args: List[str]):
     with open(out_file, "w", encoding="utf-8") as f:
         json.dump(results, f, ensure_ascii=False, indent=2)
     
-    print(f"Upload completed: {total_uploaded} successful, {total_failed} failed")
+    print(f"Upload completed: {total_uploaded} successful ({total_skipped} unchanged), {total_failed} failed")
     print(f"Results saved to: {out_file}")
 
 
-def _cmd_database(orchestrator: CrawlerOrchestrator, args: List[str]):
-    """Upload data to database"""
+def _cmd_archive(orchestrator: CrawlerOrchestrator, args: List[str]):
+    """Build one stored CBZ/ZIP per uploaded chapter, streamed straight into S3"""
+    from src.utils.chapter_archive import ChapterArchiver
+    if not orchestrator.s3_uploader:
+        print("[!] S3 uploader not initialized. Please set S3_ENABLED=True in settings and configure AWS credentials.")
+        return
+    
+    # Expected flags: --from <upload_results.json> [--format cbz|zip]
+    input_file = None
+    fmt = orchestrator.config.ARCHIVE_FORMAT
+    for i, a in enumerate(args):
+        if a == "--from" and i + 1 < len(args):
+            input_file = args[i + 1]
+        elif a == "--format" and i + 1 < len(args):
+            fmt = args[i + 1]
+    
+    if not input_file or not os.path.exists(input_file):
+        print("[!] Please provide a valid upload results file via --from <path/to/upload_results.json>")
+        return
+    
+    try:
+        archiver = ChapterArchiver(orchestrator.s3_uploader, fmt=fmt)
+    except ValueError as e:
+        print(f"[!] {str(e)}")
+        return
+    
+    with open(input_file, "r", encoding="utf-8") as f:
+        results = json.load(f)
+    
+    total_archived = 0
+    total_bytes = 0
+    for series in results.get("series", []):
+        series_title = series.get("title", "unknown")
+        series_slug = slugify(series_title)
+        for chapter in series.get("chapters", []):
+            chapter_number = chapter.get("chapter_number", "unknown")
+            # Pages in reading order, as uploaded (transcoded and filler-free when those stages ran)
+            pages = chapter.get("s3_upload", {}).get("uploaded", [])
+            if not pages:
+                print(f"[!] No uploaded pages for {series_title} - {chapter_number}")
+                continue
+            
+            s3_key = archiver.archive_key(series_slug, chapter_slugify(chapter_number))
+            try:
+                chapter["archive"] = archiver.archive_chapter(pages, s3_key, comic_info={
+                    "series": series_title,
+                    "number": chapter_title_from_name(chapter_number),
+                    "title": chapter_number,
+                })
+            except Exception as e:
+                print(f"[!] Failed to archive {series_title} - {chapter_number}: {str(e)}")
+                continue
+            total_archived += 1
+            total_bytes += chapter["archive"]["bytes"]
+            if orchestrator.asset_index:
+                orchestrator.asset_index.touch([(series_slug, chapter_slugify(chapter_number))])
+    
+    ts = datetime.now().strftime('%Y%m%d_%H%M%S')
+    out_file = os.path.join(orchestrator.config.OUTPUT_DIR, f"archive_results_{ts}.json")
+    with open(out_file, "w", encoding="utf-8") as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+    
+    print(f"Archived {total_archived} chapter(s), {total_bytes / 1e6:.1f} MB. Results saved to: {out_file}")
+
+
+def _page_urls(local_manifest: Dict[str, Any], s3_upload: Dict[str, Any], fallback: List[str] = None) -> List[str]:
+    """Final page URLs in page order: S3 URL when uploaded, else fallback/source URL"""
+    # Match by file stem, so transcoded pages (0001.webp) match their source (0001.jpg)
+    s3_urls = {
+        os.path.splitext(s3_img["filename"])[0]: s3_img["s3_url"]
+        for s3_img in s3_upload.get("uploaded", [])
+        if s3_img.get("s3_url")
+    }
+    
+    pages_url = []
+    for i, img in enumerate(local_manifest.get("images", [])):
+        s3_url = s3_urls.get(os.path.splitext(img["filename"])[0])
+        if s3_url:
+            pages_url.append(s3_url)
+        elif fallback and i < len(fallback):
+            pages_url.append(fallback[i])
+        elif img.get('source_url'):
+            pages_url.append(img['source_url'])
+    return pages_url
+
+
+def _cmd_database(orchestrator: CrawlerOrchestrator, args: List[str]) -> Optional[Dict[str, int]]:
+    """Upload data to database; returns saved/failed counts (None if nothing could be imported)"""
+    from src.base.asset_index import UPLOAD_DONE
+    from src.jobs.search_index import SearchIndexer
     if not orchestrator.db_client:
         print("[!] Database client not initialized. Please set DATABASE_ENABLED=True in settings and configure DATABASE_URL.")
         return
@@ -434,7 +1028,9 @@ def _cmd_database(orchestrator: CrawlerOrchestrator, args: List[str]):
     
     total_series = 0
     total_chapters = 0
+    total_failed = 0
     total_images = 0
+    imported_series_ids = []
     
     for series_data in results.get("series", []):
         series_title = series_data.get("title", "unknown")
@@ -452,9 +1048,11 @@ def _cmd_database(orchestrator: CrawlerOrchestrator, args: List[str]):
         
         if not series_obj:
             print(f"[!] Failed to save series: {series_title}")
+            total_failed += 1
             continue
         
         total_series += 1
+        imported_series_ids.append(series_obj.series_id)
         
         # Save authors
         authors = series_data.get("authors", [])
@@ -476,39 +1074,29 @@ def _cmd_database(orchestrator: CrawlerOrchestrator, args: List[str]):
             print(f"  Saving chapter: {chapter_number}")
             
             # Prepare pages_url as JSON array
-            pages_url = []
             local_manifest = chapter_data.get("local_manifest", {})
-            s3_upload = chapter_data.get("s3_upload", {})
-            
-            # Combine local and S3 data to get final URLs
-            for img in local_manifest.get("images", []):
-                # Find corresponding S3 data
-                s3_data = None
-                for s3_img in s3_upload.get("uploaded", []):
-                    if s3_img["filename"] == img["filename"]:
-                        s3_data = s3_img
-                        break
-                
-                if s3_data and s3_data.get('s3_url'):
-                    pages_url.append(s3_data['s3_url'])
-                elif img.get('source_url'):
-                    pages_url.append(img['source_url'])
+            s3_upload = chapter_data.get("s3_upload")
+            if orchestrator.asset_index and not (local_manifest and s3_upload):
+                # Chapters uploaded with "upload --pending" are only recorded in the asset index
+                rows = orchestrator.asset_index.chapter_pages(series_slug, chapter_slug)
+                if rows:
+                    local_manifest = local_manifest or {"images": rows}
+                    s3_upload = s3_upload or {
+                        "uploaded": [row for row in rows if row["upload_state"] == UPLOAD_DONE and row["s3_url"]]
+                    }
+            if orchestrator.config.FILLER_SKIP:
+                # Pages flagged by the filler stage are never served
+                local_manifest = {
+                    **local_manifest,
+                    "images": [img for img in local_manifest.get("images", []) if not img.get("filler")],
+                }
+            pages_url = _page_urls(local_manifest, s3_upload or {})
             
             # Set chapter_num as number of images in this chapter
             chapter_num = len(pages_url)
             
             # Extract chapter number string (e.g., "420" or "420.5") from chapter_number
-            # Remove "Chương", "Chapter", etc. and extract the number
-            chapter_number_str = chapter_number
-            # Remove common prefixes
-            chapter_number_str = re.sub(r'^(Chương|Chapter|Chap)\s*', '', chapter_number_str, flags=re.IGNORECASE)
-            # Extract number (can be decimal like 420.5)
-            number_match = re.search(r'(\d+\.?\d*)', chapter_number_str)
-            if number_match:
-                chapter_title = number_match.group(1)  # e.g., "420" or "420.5"
-            else:
-                # Fallback: use original chapter_number if no number found
-                chapter_title = chapter_number.strip()
+            chapter_title = chapter_title_from_name(chapter_number)
 
             # Save chapter
             chapter_obj = orchestrator.db_client.save_chapter(series_obj, {
@@ -520,73 +1108,575 @@ def _cmd_database(orchestrator: CrawlerOrchestrator, args: List[str]):
             
             if not chapter_obj:
                 print(f"  [!] Failed to save chapter: {chapter_number}")
+                total_failed += 1
                 continue
             
+            # Mobile-width variants from the transcode stage, page sizes sniffed at download
+            assets = {}
+            s3_upload_mobile = chapter_data.get("s3_upload_mobile")
+            if s3_upload_mobile:
+                assets['mobile_pages_url'] = _page_urls(local_manifest, s3_upload_mobile, fallback=pages_url)
+            page_dims = [[img.get("width"), img.get("height")] for img in local_manifest.get("images", [])]
+            if any(w and h for w, h in page_dims):
+                assets['page_dims'] = page_dims
+            archive = chapter_data.get("archive")
+            if archive and archive.get("s3_url"):
+                assets['archive_url'] = archive["s3_url"]
+            if assets:
+                orchestrator.db_client.save_chapter_assets(chapter_obj, assets)
+            
             total_chapters += 1
             print(f"    Saved chapter with {len(pages_url)} pages")
+            
+            # Only chapters imported with every page uploaded are skipped by later crawls
+            complete = bool(pages_url and s3_upload and not s3_upload.get("failed"))
+            if orchestrator.seen_urls and complete and chapter_data.get("chapter_url"):
+                orchestrator.seen_urls.add(chapter_data["chapter_url"])
     
     print(f"\nDatabase upload completed:")
     print(f"  Series: {total_series}")
     print(f"  Chapters: {total_chapters}")
+    if total_failed:
+        print(f"  Failed: {total_failed}")
+    
+    # Keep title/author search in step with the imported series
+    if orchestrator.config.SEARCH_INDEX_ENABLED and imported_series_ids:
+        summary = SearchIndexer(orchestrator.db_client).run(series_ids=imported_series_ids)
+        print(f"  Search documents updated: {summary['updated']}")
+    
+    # Refresh the static manifests of the imported series
+    if orchestrator.config.MANIFESTS_ENABLED and orchestrator.s3_uploader and imported_series_ids:
+        summary = _manifest_publisher(orchestrator).run(series_ids=imported_series_ids)
+        print(f"  Manifests published: {summary['series_published']}")
+        if summary["series_failed"]:
+            print(f"  [!] Manifests failed: {summary['series_failed']}")
+    
+    return {"series": total_series, "chapters": total_chapters, "failed": total_failed}
+
+
+def _manifest_publisher(orchestrator: CrawlerOrchestrator) -> 'ManifestPublisher':
+    from src.jobs.manifest_publisher import ManifestPublisher
+    return ManifestPublisher(
+        orchestrator.db_client,
+        orchestrator.s3_uploader,
+        prefix=orchestrator.config.MANIFEST_PREFIX,
+        pointer_max_age=orchestrator.config.MANIFEST_POINTER_MAX_AGE
+    )
+
+
+def _cmd_manifests(orchestrator: CrawlerOrchestrator, args: List[str]):
+    """Publish static manifests of series changed since the last run"""
+    if not orchestrator.db_client or not orchestrator.s3_uploader:
+        print("[!] Manifests need both the database and the S3 uploader. Please enable and configure them in settings.")
+        return
+    
+    # Expected flags: [--full]
+    summary = _manifest_publisher(orchestrator).run(full="--full" in args)
+    print(f"Manifests: {summary['series_published']}/{summary['series_checked']} series published, "
+          f"{summary['chapters_published']} chapter manifests, {summary['series_failed']} series failed")
+
+
+def _cmd_rollup(orchestrator: CrawlerOrchestrator, args: List[str]):
+    """Roll up daily view stats into weekly/monthly tables (and compact old daily rows if asked to)"""
+    from src.jobs.view_stats_rollup import ViewStatsRollup
+    if not orchestrator.db_client:
+        print("[!] Database client not initialized. Please set DATABASE_ENABLED=True in settings and configure DATABASE_URL.")
+        return
+    
+    # Optional flags: --retention-days N
+    retention_days = orchestrator.config.STATS_RETENTION_DAYS
+    for i, a in enumerate(args):
+        if a == "--retention-days" and i + 1 < len(args):
+            try:
+                retention_days = int(args[i + 1])
+            except Exception:
+                pass
+    
+    summary = ViewStatsRollup(orchestrator.db_client, retention_days=retention_days).run()
+    
+    print(f"\nView stats rollup completed:")
+    print(f"  Days processed: {summary['days_processed']}")
+    print(f"  Weekly buckets written: {summary['weekly_rows']}")
+    print(f"  Monthly buckets written: {summary['monthly_rows']}")
+    print(f"  Daily rows compacted: {summary['daily_rows_deleted']}")
+    print(f"  Watermark: {summary['watermark']}")
+
+
+def _cmd_trending(orchestrator: CrawlerOrchestrator, args: List[str]):
+    """Slide the 24h/7d/30d trending windows forward and rewrite the ranked tables"""
+    from src.jobs.series_trending import SeriesTrending
+    if not orchestrator.db_client:
+        print("[!] Database client not initialized. Please set DATABASE_ENABLED=True in settings and configure DATABASE_URL.")
+        return
+    
+    # Optional flags: --top N
+    top_n = orchestrator.config.TRENDING_TOP_N
+    for i, a in enumerate(args):
+        if a == "--top" and i + 1 < len(args):
+            try:
+                top_n = int(args[i + 1])
+            except Exception:
+                pass
+    
+    summary = SeriesTrending(orchestrator.db_client, top_n=top_n).run()
+    
+    print(f"\nTrending update completed:")
+    for window, info in summary.items():
+        print(f"  {window}: {info['mode']}, {info['ranked'] if info['ranked'] is not None else '-'} series ranked")
+
+
+def _cmd_search(orchestrator: CrawlerOrchestrator, args: List[str]):
+    """Update the trigram search index, or query it"""
+    from src.jobs.search_index import SearchIndexer
+    if not orchestrator.db_client:
+        print("[!] Database client not initialized. Please set DATABASE_ENABLED=True in settings and configure DATABASE_URL.")
+        return
+    
+    # Expected flags: [--full] | --query <text> [--limit N]
+    query = None
+    limit = 20
+    for i, a in enumerate(args):
+        if a == "--query" and i + 1 < len(args):
+            query = args[i + 1]
+        elif a == "--limit" and i + 1 < len(args):
+            try:
+                limit = int(args[i + 1])
+            except ValueError:
+                pass
+    
+    indexer = SearchIndexer(orchestrator.db_client)
+    if query:
+        for result in indexer.search(query, limit=limit, min_similarity=orchestrator.config.SEARCH_MIN_SIMILARITY):
+            print(f"  {result['similarity']:.2f}  [{result['doc_type']} {result['doc_id']}] {result['label']}")
+        return
+    
+    summary = indexer.run(full="--full" in args)
+    print(f"Search index: {summary['updated']}/{summary['checked']} documents updated, {summary['removed']} removed")
 
 
 def _cmd_all(orchestrator: CrawlerOrchestrator, args: List[str]):
     # Run crawl with optional limits
-    _cmd_crawl(orchestrator, args)
-
-    # Find the latest crawl_results_*.json in output dir and run download
-    crawl_files = [fn for fn in os.listdir(orchestrator.config.OUTPUT_DIR) if fn.startswith("crawl_results_") and fn.endswith(".json")]
-    if not crawl_files:
+    latest_crawl = _run_step(orchestrator, "crawl", args, "crawl_results_")
+    if not latest_crawl:
         print("[!] No crawl results found to download from.")
         return
-    crawl_files.sort()
-    latest_crawl = os.path.join(orchestrator.config.OUTPUT_DIR, crawl_files[-1])
-    _cmd_download(orchestrator, ["--from", latest_crawl])
+    _run_pipeline(orchestrator, latest_crawl, args)
 
-    # Find the latest download_results_*.json in output dir and run upload
-    download_files = [fn for fn in os.listdir(orchestrator.config.OUTPUT_DIR) if fn.startswith("download_results_") and fn.endswith(".json")]
-    if not download_files:
+
+def _run_pipeline(orchestrator: CrawlerOrchestrator, crawl_file: str, args: List[str],
+                  on_stage: Callable[..., None] = None):
+    """
+    Download, upload and import the series of a crawl results file (the stages of "all" after crawl)
+    
+    Args:
+        crawl_file: Crawl results to start from
+        args: Flags of "all" (--stream, --keep-local, --cas, --sync, --transcode, --archive)
+        on_stage: Called as on_stage(stage, state, results_file, **counts) when a stage starts and ends
+    """
+    stream_flags = [a for a in args if a in ("--stream", "--keep-local", "--cas")]
+    # No other worker uploads for this pipeline, so a full local store is never waited on
+    if "--transcode" in args:
+        # Transcode reads the originals after download; none may be uploaded or evicted before then
+        stream_flags += ["--no-evict", "--no-wait"]
+    else:
+        stream_flags.append("--upload-when-full")
+    latest_download = _run_step(orchestrator, "download", ["--from", crawl_file] + stream_flags,
+                                "download_results_", on_stage)
+    if not latest_download:
         print("[!] No download results found to upload from.")
         return
-    download_files.sort()
-    latest_download = os.path.join(orchestrator.config.OUTPUT_DIR, download_files[-1])
-    _cmd_upload(orchestrator, ["--from", latest_download])
 
-    # Find the latest upload_results_*.json in output dir and run database
-    upload_files = [fn for fn in os.listdir(orchestrator.config.OUTPUT_DIR) if fn.startswith("upload_results_") and fn.endswith(".json")]
-    if not upload_files:
+    # Streamed downloads are already in S3, go straight to the database
+    if "--stream" in args or orchestrator.config.STREAM_TO_S3:
+        if "--archive" in args:
+            latest_download = _archive_latest(orchestrator, latest_download, on_stage)
+        _run_step(orchestrator, "database", ["--from", latest_download], None, on_stage)
+        return
+
+    # Optionally transcode before uploading
+    if "--transcode" in args:
+        latest_download = _run_step(orchestrator, "transcode", ["--from", latest_download],
+                                    "transcode_results_", on_stage) or latest_download
+
+    upload_flags = [a for a in args if a in ("--sync", "--cas")]
+    latest_upload = _run_step(orchestrator, "upload", ["--from", latest_download] + upload_flags,
+                              "upload_results_", on_stage)
+    if not latest_upload:
         print("[!] No upload results found to import into database.")
         return
-    upload_files.sort()
-    latest_upload = os.path.join(orchestrator.config.OUTPUT_DIR, upload_files[-1])
-    _cmd_database(orchestrator, ["--from", latest_upload])
+    if "--archive" in args:
+        latest_upload = _archive_latest(orchestrator, latest_upload, on_stage)
+    _run_step(orchestrator, "database", ["--from", latest_upload], None, on_stage)
+
+
+def _run_step(orchestrator: CrawlerOrchestrator, mode: str, args: List[str], results_prefix: Optional[str],
+              on_stage: Callable[..., None] = None) -> Optional[str]:
+    """Run one stage of a pipeline and return the results file it wrote (None if it wrote none)"""
+    if orchestrator.draining.is_set():
+        if on_stage:
+            on_stage(mode, "skipped", None)
+        return None
+    if on_stage:
+        on_stage(mode, "running", None)
+    started = time.time()
+    outcome = _run_mode(orchestrator, mode, args)
+    if results_prefix:
+        results_file = _latest_results(orchestrator, results_prefix, newer_than=started)
+        succeeded = results_file is not None
+    else:
+        # Stages without a results file (database) report saved/failed counts; saving nothing is a failure
+        results_file = None
+        succeeded = bool(outcome and (outcome["series"] or outcome["chapters"]))
+    if on_stage:
+        on_stage(mode, "done" if succeeded else "failed", results_file, **(outcome or {}))
+    return results_file
+
+
+def _latest_results(orchestrator: CrawlerOrchestrator, prefix: str, newer_than: float = None) -> Optional[str]:
+    """Newest <prefix>*.json in the output directory, optionally only if written after newer_than"""
+    output_dir = orchestrator.config.OUTPUT_DIR
+    files = sorted(fn for fn in os.listdir(output_dir) if fn.startswith(prefix) and fn.endswith(".json"))
+    if not files:
+        return None
+    latest = os.path.join(output_dir, files[-1])
+    # Compare at whole seconds: file mtimes can be coarser than time.time()
+    if newer_than is not None and os.path.getmtime(latest) < int(newer_than):
+        return None
+    return latest
+
+
+def _archive_latest(orchestrator: CrawlerOrchestrator, input_file: str, on_stage: Callable[..., None] = None) -> str:
+    """Run the archive stage on a results file and return the archive results to import"""
+    return _run_step(orchestrator, "archive", ["--from", input_file], "archive_results_", on_stage) or input_file
+
+
+def _cmd_serve(orchestrator: CrawlerOrchestrator, args: List[str]):
+    """
+    Stay resident and run the crawl -> download -> upload -> database cycle on a timer
+    
+    Crawler sessions, the S3 client and upload pool, the database engine and the
+    asset index are built once and reused by every cycle. With the job API on,
+    submitted series/chapter jobs run ahead of the next scheduled cycle, or at the
+    next series/chapter boundary of a running crawl or download. An S3 or
+    database client that failed to build is retried by the next cycle or job.
+    The first SIGTERM/SIGINT drains: a running crawl or download stops after its
+    current series or chapter (transcode, upload and database finish their input
+    file), later stages are skipped and the process exits; a second one stops
+    immediately.
+    """
+    # Expected flags: [--interval SECONDS] [--cycles N] [--api-port N | --api-socket PATH]
+    # plus any "all" flags (--max-series, --stream, ...)
+    interval = orchestrator.config.SERVE_INTERVAL_SECONDS
+    max_cycles = None
+    api_port = orchestrator.config.JOB_API_PORT
+    api_socket = orchestrator.config.JOB_API_SOCKET
+    cycle_args = list(args)
+    for flag in ("--interval", "--cycles", "--api-port", "--api-socket"):
+        if flag in cycle_args:
+            i = cycle_args.index(flag)
+            if i + 1 >= len(cycle_args):
+                print(f"[!] {flag} needs a value")
+                return
+            value = cycle_args[i + 1]
+            del cycle_args[i:i + 2]
+            if flag == "--api-socket":
+                api_socket = value
+                continue
+            try:
+                value = int(value)
+            except ValueError:
+                print(f"[!] {flag} needs a number")
+                return
+            if flag == "--interval":
+                interval = value
+            elif flag == "--cycles":
+                max_cycles = value
+            else:
+                api_port = value
+    
+    logger = logging.getLogger(__name__)
+    
+    def _drain(signum, frame):
+        if orchestrator.draining.is_set():
+            raise KeyboardInterrupt
+        logger.info(f"{signal.Signals(signum).name} received, draining (send again to stop now)")
+        orchestrator.draining.set()
+    
+    jobs = api = None
+    if api_port or api_socket:
+        from src.base.job_api import JobQueue, JobAPIServer
+        jobs = JobQueue(orchestrator.config.BASE_URL)
+        api = JobAPIServer(jobs, addr=orchestrator.config.JOB_API_ADDR, port=api_port, socket_path=api_socket or None)
+        api.start()
+        print(f"📥 Job API: POST {api.url}/jobs")
+    
+    def _run_queued_jobs():
+        # Jobs submitted during a cycle run at its next series/chapter boundary
+        while not orchestrator.draining.is_set():
+            job = jobs.next()
+            if not job:
+                return
+            logger.info(f"Pausing the cycle for job {job['id']}")
+            orchestrator.retry_failed()
+            _run_job(orchestrator, jobs, job, cycle_args)
+    
+    previous_handlers = {sig: signal.signal(sig, _drain) for sig in (signal.SIGTERM, signal.SIGINT)}
+    orchestrator.resident = True
+    if jobs:
+        orchestrator.on_checkpoint = _run_queued_jobs
+    print(f"🔁 Serving: one cycle every {interval}s" + (f", {max_cycles} cycle(s)" if max_cycles else ""))
+    cycles = 0
+    next_cycle = time.monotonic()
+    try:
+        while not orchestrator.draining.is_set():
+            wait = next_cycle - time.monotonic()
+            # Queued jobs go ahead of the scheduled cycle; poll so a drain is noticed within a second
+            job = jobs.next(timeout=min(max(wait, 0.0), 1.0)) if jobs else None
+            if job:
+                orchestrator.retry_failed()
+                _run_job(orchestrator, jobs, job, cycle_args)
+                continue
+            if wait > 0:
+                if not jobs:
+                    # Sleeps until the next cycle is due, or returns at once when draining starts
+                    orchestrator.draining.wait(wait)
+                continue
+            
+            next_cycle = time.monotonic() + interval
+            cycles += 1
+            result = "ok"
+            logger.info(f"=== Serve cycle {cycles} ===")
+            orchestrator.retry_failed()
+            try:
+                _cmd_all(orchestrator, cycle_args)
+            except Exception as e:
+                result = "error"
+                logger.exception(f"Serve cycle {cycles} failed: {str(e)}")
+            SERVE_CYCLES.inc(result=result)
+            SERVE_LAST_CYCLE.set(time.time())
+            if orchestrator.config.METRICS_TEXTFILE:
+                REGISTRY.write_textfile(orchestrator.config.METRICS_TEXTFILE)
+            if max_cycles and cycles >= max_cycles:
+                break
+    finally:
+        if api:
+            api.stop()
+        for sig, handler in previous_handlers.items():
+            signal.signal(sig, handler)
+        orchestrator.resident = False
+        orchestrator.on_checkpoint = None
+        orchestrator.close()
+    print(f"🔁 Served {cycles} cycle(s)" + (", drained" if orchestrator.draining.is_set() else ""))
+
+
+def _run_job(orchestrator: CrawlerOrchestrator, jobs: 'JobQueue', job: Dict[str, Any], args: List[str]):
+    """Crawl the series or chapter of an API job and take it through download, upload and database"""
+    job_id = job["id"]
+    logger = logging.getLogger(__name__)
+    logger.info(f"=== Job {job_id}: {job['kind']} {job['url']} ===")
+    
+    def on_stage(stage: str, state: str, results_file: str = None, **counts):
+        details = dict(counts)
+        if results_file:
+            details.update(_results_progress(results_file))
+            details["results_file"] = results_file
+        jobs.stage(job_id, stage, state, **details)
+    
+    try:
+        on_stage("crawl", "running")
+        with tracing.span("job", kind=job["kind"], url=job["url"]):
+            results = orchestrator.crawl_all(
+                max_chapters_per_series=job["max_chapters"] if job["kind"] == "series" else None,
+                series_list=[_job_series(orchestrator, job)],
+                skip_seen=job["kind"] == "series"
+            )
+        if not results["series"]:
+            raise RuntimeError("; ".join(results["errors"]) or "series crawl returned nothing")
+        if job["kind"] == "chapter":
+            series = results["series"][0]
+            chapters = tuple(c for c in series.chapters if c.chapter_url == job["url"])
+            if not chapters:
+                raise RuntimeError(f"chapter not listed on {job['series_url']}")
+            results["series"][0] = dataclasses.replace(series, chapters=chapters)
+        ts = datetime.now().strftime('%Y%m%d_%H%M%S')
+        crawl_file = orchestrator.save_results(results, f"job_{job_id}_crawl_{ts}.json")
+        on_stage("crawl", "done", crawl_file)
+        
+        _run_pipeline(orchestrator, crawl_file, args, on_stage)
+        incomplete = [stage for stage, entry in (jobs.get(job_id) or {}).get("stages", {}).items()
+                      if entry["state"] != "done"]
+        error = f"stage(s) not completed: {', '.join(incomplete)}" if incomplete else None
+    except Exception as e:
+        logger.exception(f"Job {job_id} failed: {str(e)}")
+        error = str(e)
+        stage = (jobs.get(job_id) or {}).get("stage")
+        if stage:
+            jobs.stage(job_id, stage, "failed")
+    jobs.finish(job_id, error=error)
+    SERVE_JOBS.inc(kind=job["kind"], result="error" if error else "ok")
+    if orchestrator.config.METRICS_TEXTFILE:
+        REGISTRY.write_textfile(orchestrator.config.METRICS_TEXTFILE)
+
+
+def _job_series(orchestrator: CrawlerOrchestrator, job: Dict[str, Any]) -> SeriesInfo:
+    """Series (title, series_url, cover) for crawl_all of an API job"""
+    if job["title"]:
+        return SeriesInfo(title=job["title"], cover_image=None, series_url=job["series_url"])
+    # Series are stored under their homepage title, so take it (and the cover) from there
+    result = orchestrator.series_crawler.crawl(orchestrator.config.BASE_URL)
+    for series in (result.data if result.success else []):
+        if series.series_url == job["series_url"]:
+            return series
+    raise RuntimeError(f"{job['series_url']} is not on the homepage; resubmit the job with a title")
+
+
+def _results_progress(results_file: str) -> Dict[str, int]:
+    """Chapter and page counts of a stage results file, for job progress"""
+    with open(results_file, "r", encoding="utf-8") as f:
+        results = json.load(f)
+    chapters = [chapter for series in results.get("series", []) for chapter in series.get("chapters", [])]
+    return {
+        "chapters": len(chapters),
+        "pages_downloaded": sum((c.get("local_manifest") or {}).get("count", 0) for c in chapters),
+        "pages_uploaded": sum((c.get("s3_upload") or {}).get("success_count", 0) for c in chapters),
+    }
 
 
 def main():
     print("🚀 Manga Crawler")
-    print("Usage: python main.py [crawl|download|upload|database|all] [options]")
+    print("Usage: python main.py [crawl|download|filler|transcode|upload|archive|database|manifests|search|all|serve|rollup|trending] [options]")
     print("Examples:")
     print("  python main.py crawl --max-series 2 --max-chapters 3")
+    print("  python main.py crawl --max-series 20 --priority")
     print("  python main.py download --from data/output/crawl_results_XXXX.json")
+    print("  python main.py download --from data/output/crawl_results_XXXX.json --stream")
+    print("  python main.py filler --from data/output/download_results_XXXX.json --learn 5 --mark credits.jpg")
+    print("  python main.py transcode --from data/output/download_results_XXXX.json --format webp --quality 80")
     print("  python main.py upload --from data/output/download_results_XXXX.json")
+    print("  python main.py upload --from data/output/download_results_XXXX.json --sync")
+    print("  python main.py upload --from data/output/download_results_XXXX.json --cas")
+    print("  python main.py upload --pending")
+    print("  python main.py archive --from data/output/upload_results_XXXX.json --format cbz")
     print("  python main.py database --from data/output/upload_results_XXXX.json")
+    print("  python main.py manifests [--full]")
+    print("  python main.py search [--full]")
+    print("  python main.py search --query \"dao hai tac\"")
     print("  python main.py all --max-series 1 --max-chapters 2")
+    print("  python main.py serve --interval 1800 --max-series 20 --priority")
+    print("  python main.py serve --api-port 8710")
+    print("  python main.py rollup")
+    print("  python main.py trending --top 100")
+    print("  python main.py download --from data/output/crawl_results_XXXX.json --trace data/trace.json")
+    print("  python main.py crawl --max-series 50 --profile [sampling]")
+    print("  python main.py crawl --max-series 50 --record data/archives/catalogue.warc.gz")
+    print("  python main.py crawl --max-series 50 --replay data/archives/catalogue.warc.gz")
 
     orchestrator = CrawlerOrchestrator()
 
     mode = sys.argv[1] if len(sys.argv) > 1 else "crawl"
     args = sys.argv[2:]
 
+    # Global options, valid with every mode
+    trace_path = None
+    if "--trace" in args:
+        i = args.index("--trace")
+        trace_path = args[i + 1] if i + 1 < len(args) else "data/trace.json"
+        del args[i:i + 2]
+        tracing.enable()
+    if "--profile" in args:
+        i = args.index("--profile")
+        sampling = i + 1 < len(args) and args[i + 1] == "sampling"
+        del args[i:i + (2 if sampling else 1)]
+        orchestrator.profile_mode = "sampling" if sampling else "cprofile"
+    archive = None
+    for flag, archive_mode in (("--record", "record"), ("--replay", "replay")):
+        if flag in args:
+            from src.base.http_archive import HttpArchive
+            i = args.index(flag)
+            if i + 1 >= len(args):
+                print(f"[!] {flag} needs an archive path")
+                return
+            archive = HttpArchive(args[i + 1], archive_mode)
+            del args[i:i + 2]
+            orchestrator.use_http_archive(archive)
+            break
+
+    if orchestrator.config.METRICS_PORT:
+        REGISTRY.start_http_server(orchestrator.config.METRICS_PORT, orchestrator.config.METRICS_ADDR)
+    try:
+        _run_mode(orchestrator, mode, args)
+    finally:
+        orchestrator.close()
+        if orchestrator.config.METRICS_TEXTFILE:
+            REGISTRY.write_textfile(orchestrator.config.METRICS_TEXTFILE)
+        if trace_path:
+            count = tracing.disable().write(trace_path)
+            print(f"🧭 Trace: {count} spans written to {trace_path} (open in chrome://tracing or ui.perfetto.dev)")
+        if archive:
+            if archive.replaying:
+                print(f"📼 Replayed {archive.hits} responses from {archive.path} ({archive.misses} not archived)")
+            else:
+                print(f"📼 HTTP archive {archive.path}: {archive.count()} URLs")
+            archive.close()
+
+
+def _run_mode(orchestrator: CrawlerOrchestrator, mode: str, args: List[str]):
+    """Run one stage, recording its duration and outcome; returns what the stage returns"""
+    if orchestrator.draining.is_set():
+        print(f"[!] Draining, not starting {mode}")
+        return None
+    start = time.perf_counter()
+    result = "ok"
+    try:
+        # "all" and "serve" are profiled per sub-stage (one profiler can be active at a time), and
+        # stages of jobs run from a checkpoint are not profiled inside the stage they interrupt
+        if orchestrator.profile_mode and mode not in ("all", "serve") and not orchestrator.in_checkpoint:
+            from src.utils.profiling import StageProfiler
+            profiler = StageProfiler(
+                mode,
+                output_dir=orchestrator.config.PROFILE_DIR,
+                sampling=orchestrator.profile_mode == "sampling",
+                top=orchestrator.config.PROFILE_TOP
+            )
+        else:
+            profiler = contextlib.nullcontext()
+        with tracing.span(f"stage:{mode}"), profiler:
+            return _dispatch(orchestrator, mode, args)
+    except BaseException:
+        result = "error"
+        raise
+    finally:
+        STAGE_SECONDS.set(time.perf_counter() - start, stage=mode)
+        STAGE_RUNS.inc(stage=mode, result=result)
+
+
+def _dispatch(orchestrator: CrawlerOrchestrator, mode: str, args: List[str]):
     if mode == "crawl":
         _cmd_crawl(orchestrator, args)
     elif mode == "download":
         _cmd_download(orchestrator, args)
+    elif mode == "filler":
+        _cmd_filler(orchestrator, args)
+    elif mode == "transcode":
+        _cmd_transcode(orchestrator, args)
     elif mode == "upload":
         _cmd_upload(orchestrator, args)
+    elif mode == "archive":
+        _cmd_archive(orchestrator, args)
     elif mode == "database":
-        _cmd_database(orchestrator, args)
+        return _cmd_database(orchestrator, args)
+    elif mode == "manifests":
+        _cmd_manifests(orchestrator, args)
+    elif mode == "search":
+        _cmd_search(orchestrator, args)
     elif mode == "all":
         _cmd_all(orchestrator, args)
+    elif mode == "rollup":
+        _cmd_rollup(orchestrator, args)
+    elif mode == "trending":
+        _cmd_trending(orchestrator, args)
+    elif mode == "serve":
+        _cmd_serve(orchestrator, args)
     else:
         print(f"[!] Unknown mode: {mode}")
 
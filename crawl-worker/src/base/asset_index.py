@@ -0,0 +1,242 @@
+"""
+Global local index of downloaded page assets and their upload state
+"""
+import os
+import time
+import sqlite3
+import logging
+import threading
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Tuple
+
+
+UPLOAD_PENDING = "pending"
+UPLOAD_DONE = "uploaded"
+UPLOAD_FAILED = "failed"
+
+_COLUMNS = (
+    "series_slug", "chapter_slug", "page", "filename", "local_path", "bytes", "sha256",
+    "source_url", "content_type", "width", "height", "filler", "s3_key", "s3_url", "upload_state",
+    "downloaded_at", "uploaded_at", "last_access",
+)
+
+
+class AssetIndex:
+    """SQLite index keyed by (series, chapter, page), shared by every stage"""
+
+    def __init__(self, path: str = "data/assets.sqlite"):
+        """
+        Open (or create) the asset index
+
+        Args:
+            path: SQLite database file
+        """
+        self.path = path
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.RLock()
+        # Running total of local_bytes(), counted from the table once
+        self._local_bytes = None
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS assets (
+                series_slug TEXT NOT NULL,
+                chapter_slug TEXT NOT NULL,
+                page INTEGER NOT NULL,
+                filename TEXT NOT NULL,
+                local_path TEXT,
+                bytes INTEGER,
+                sha256 TEXT,
+                source_url TEXT,
+                content_type TEXT,
+                width INTEGER,
+                height INTEGER,
+                filler INTEGER NOT NULL DEFAULT 0,
+                s3_key TEXT,
+                s3_url TEXT,
+                upload_state TEXT NOT NULL DEFAULT 'pending',
+                downloaded_at TEXT,
+                uploaded_at TEXT,
+                last_access REAL,
+                PRIMARY KEY (series_slug, chapter_slug, page)
+            );
+            CREATE INDEX IF NOT EXISTS ix_assets_upload_state
+                ON assets (upload_state, series_slug, chapter_slug, page);
+            CREATE INDEX IF NOT EXISTS ix_assets_last_access
+                ON assets (upload_state, last_access);
+        """)
+        # Indexes created before pages carried the filler flag
+        columns = {row["name"] for row in self._conn.execute("PRAGMA table_info(assets)")}
+        if "filler" not in columns:
+            self._conn.execute("ALTER TABLE assets ADD COLUMN filler INTEGER NOT NULL DEFAULT 0")
+        self._conn.commit()
+
+    def record_chapter(self, series_slug: str, chapter_slug: str, images: List[Dict[str, Any]],
+                       uploads: Optional[Dict[str, Any]] = None) -> None:
+        """
+        Replace the pages of a chapter after a download (one transaction)
+
+        Args:
+            series_slug: Series slug
+            chapter_slug: Chapter slug
+            images: Manifest image entries from ChapterImageDownloader
+            uploads: Optional upload results (streaming mode) to record at the same time
+        """
+        uploaded = {entry["filename"]: entry for entry in (uploads or {}).get("uploaded", [])}
+        now = datetime.now().isoformat()
+
+        with self._lock, self._conn:
+            # A re-downloaded page with the same content keeps its upload state and filler flag
+            previous = {
+                row["filename"]: row for row in self._conn.execute(
+                    "SELECT filename, local_path, bytes, sha256, filler, s3_key, s3_url, upload_state, uploaded_at "
+                    "FROM assets "
+                    "WHERE series_slug = ? AND chapter_slug = ?",
+                    (series_slug, chapter_slug)
+                )
+            }
+            rows = []
+            for img in images:
+                old = previous.get(img["filename"])
+                if not (old and img.get("sha256") and old["sha256"] == img.get("sha256")):
+                    old = None
+                upload = uploaded.get(img["filename"])
+                uploaded_at = now if upload else None
+                if not upload and old and old["upload_state"] == UPLOAD_DONE:
+                    upload, uploaded_at = old, old["uploaded_at"]
+                filler = img.get("filler", bool(old and old["filler"]))
+                rows.append((
+                    series_slug, chapter_slug, img["page"], img["filename"], img.get("local_path"),
+                    img.get("bytes"), img.get("sha256"), img.get("source_url"), img.get("content_type"),
+                    img.get("width"), img.get("height"), int(bool(filler)),
+                    upload["s3_key"] if upload else None,
+                    upload["s3_url"] if upload else None,
+                    UPLOAD_DONE if upload else UPLOAD_PENDING,
+                    img.get("downloaded_at"), uploaded_at, time.time(),
+                ))
+
+            self._conn.execute(
+                "DELETE FROM assets WHERE series_slug = ? AND chapter_slug = ? AND page > ?",
+                (series_slug, chapter_slug, len(images))
+            )
+            self._conn.executemany(
+                f"INSERT OR REPLACE INTO assets ({', '.join(_COLUMNS)}) VALUES ({', '.join('?' * len(_COLUMNS))})",
+                rows
+            )
+            if self._local_bytes is not None:
+                self._local_bytes += sum(img.get("bytes") or 0 for img in images if img.get("local_path"))
+                self._local_bytes -= sum(row["bytes"] or 0 for row in previous.values() if row["local_path"])
+
+    def chapter_pages(self, series_slug: str, chapter_slug: str) -> List[Dict[str, Any]]:
+        """All indexed pages of a chapter in page order"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM assets WHERE series_slug = ? AND chapter_slug = ? ORDER BY page",
+                (series_slug, chapter_slug)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def pending_uploads(self, skip_filler: bool = False) -> Dict[Tuple[str, str], List[Dict[str, Any]]]:
+        """
+        Every page not yet uploaded, grouped by (series_slug, chapter_slug)
+
+        Args:
+            skip_filler: Leave out pages flagged by the filler stage
+        """
+        query = "SELECT * FROM assets WHERE upload_state IN (?, ?)"
+        if skip_filler:
+            query += " AND filler = 0"
+        with self._lock:
+            rows = self._conn.execute(
+                query + " ORDER BY series_slug, chapter_slug, page",
+                (UPLOAD_PENDING, UPLOAD_FAILED)
+            ).fetchall()
+        pending = {}
+        for row in rows:
+            pending.setdefault((row["series_slug"], row["chapter_slug"]), []).append(dict(row))
+        return pending
+
+    def mark_uploads(self, series_slug: str, chapter_slug: str, results: Dict[str, Any]) -> None:
+        """Record the outcome of uploading a chapter (S3Uploader results shape, one transaction)"""
+        now = datetime.now().isoformat()
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "UPDATE assets SET s3_key = ?, s3_url = ?, upload_state = ?, uploaded_at = ?, last_access = ? "
+                "WHERE series_slug = ? AND chapter_slug = ? AND filename = ?",
+                [
+                    (entry["s3_key"], entry["s3_url"], UPLOAD_DONE, now, time.time(),
+                     series_slug, chapter_slug, entry["filename"])
+                    for entry in results.get("uploaded", [])
+                ]
+            )
+            self._conn.executemany(
+                "UPDATE assets SET upload_state = ? WHERE series_slug = ? AND chapter_slug = ? AND filename = ?",
+                [
+                    (UPLOAD_FAILED, series_slug, chapter_slug, entry["filename"])
+                    for entry in results.get("failed", [])
+                ]
+            )
+
+    def mark_filler(self, series_slug: str, chapter_slug: str, filenames: List[str]) -> None:
+        """Set the filler flag of a chapter's pages: on for filenames, off for the rest"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"UPDATE assets SET filler = filename IN ({', '.join('?' * len(filenames))}) "
+                "WHERE series_slug = ? AND chapter_slug = ?",
+                (*filenames, series_slug, chapter_slug)
+            )
+
+    def touch(self, chapters: List[Tuple[str, str]]) -> None:
+        """Record that the local pages of (series_slug, chapter_slug) chapters were just read"""
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "UPDATE assets SET last_access = ? WHERE series_slug = ? AND chapter_slug = ?",
+                [(now, series_slug, chapter_slug) for series_slug, chapter_slug in chapters]
+            )
+
+    def local_bytes(self, recount: bool = False) -> int:
+        """
+        Bytes of indexed pages still on local disk
+
+        Args:
+            recount: Sum the table again (picks up changes by other processes) instead of the running total
+        """
+        with self._lock:
+            if recount or self._local_bytes is None:
+                self._local_bytes = self._conn.execute(
+                    "SELECT COALESCE(SUM(bytes), 0) FROM assets WHERE local_path IS NOT NULL"
+                ).fetchone()[0]
+            return self._local_bytes
+
+    def evictable(self, limit: int = 500) -> List[Dict[str, Any]]:
+        """Uploaded pages still on local disk, least recently used first"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT series_slug, chapter_slug, page, local_path, bytes FROM assets "
+                "WHERE upload_state = ? AND local_path IS NOT NULL ORDER BY last_access LIMIT ?",
+                (UPLOAD_DONE, limit)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def clear_local(self, rows: List[Dict[str, Any]]) -> None:
+        """Record pages as no longer on local disk (one transaction)"""
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "UPDATE assets SET local_path = NULL WHERE series_slug = ? AND chapter_slug = ? AND page = ?",
+                [(row["series_slug"], row["chapter_slug"], row["page"]) for row in rows]
+            )
+            if self._local_bytes is not None:
+                self._local_bytes -= sum(row["bytes"] or 0 for row in rows)
+
+    def close(self):
+        """Close the index"""
+        with self._lock:
+            self._conn.close()
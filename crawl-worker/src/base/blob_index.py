@@ -0,0 +1,69 @@
+"""
+Local index of content-addressed blobs already stored in S3
+"""
+import os
+import sqlite3
+import logging
+import threading
+from datetime import datetime
+from typing import Optional, Dict, Any
+
+
+class BlobIndex:
+    """SQLite-backed map of sha256 -> stored S3 key, shared by upload threads"""
+
+    def __init__(self, path: str = "data/blob_index.sqlite"):
+        """
+        Open (or create) the blob index
+
+        Args:
+            path: SQLite database file
+        """
+        self.path = path
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS blobs (
+                sha256 TEXT PRIMARY KEY,
+                s3_key TEXT NOT NULL,
+                bytes INTEGER NOT NULL,
+                created_at TEXT NOT NULL
+            )
+        """)
+        self._conn.commit()
+
+    def get(self, sha256: str) -> Optional[Dict[str, Any]]:
+        """Get the stored blob for a digest, or None"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT s3_key, bytes FROM blobs WHERE sha256 = ?", (sha256,)
+            ).fetchone()
+        if not row:
+            return None
+        return {"sha256": sha256, "s3_key": row[0], "bytes": row[1]}
+
+    def add(self, sha256: str, s3_key: str, size: int) -> None:
+        """Record a blob as stored"""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO blobs (sha256, s3_key, bytes, created_at) VALUES (?, ?, ?, ?)",
+                (sha256, s3_key, size, datetime.now().isoformat())
+            )
+            self._conn.commit()
+
+    def count(self) -> int:
+        """Number of indexed blobs"""
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM blobs").fetchone()[0]
+
+    def close(self):
+        """Close the index"""
+        with self._lock:
+            self._conn.close()
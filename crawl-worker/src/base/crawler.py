@@ -8,6 +8,8 @@ from bs4 import BeautifulSoup
 from urllib.parse import urljoin, urlparse
 from .data_models import CrawlConfig, CrawlResult
 from .http_client import HTTPClient
+from .metrics import PARSE_SECONDS
+from .tracing import span
 
 
 class BaseCrawler(ABC):
@@ -51,7 +53,8 @@ class BaseCrawler(ABC):
     
     def parse_html(self, html: str) -> BeautifulSoup:
         """Parse HTML content"""
-        return BeautifulSoup(html, "lxml")
+        with span("parse", crawler=self.__class__.__name__), PARSE_SECONDS.time(crawler=self.__class__.__name__):
+            return BeautifulSoup(html, "lxml")
     
     def safe_get_attribute(self, element, attribute: str, default: str = None) -> str:
         """Safely get attribute from element"""
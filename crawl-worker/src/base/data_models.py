@@ -1,32 +1,81 @@
 """
 Data models for the crawler system
 """
-from dataclasses import dataclass
-from typing import List, Optional
+import sys
+from dataclasses import dataclass, fields
+from typing import Any, Dict, List, Optional, Tuple
 from datetime import datetime
 
 
-@dataclass
+def _iso(timestamp: Optional[float]) -> Optional[str]:
+    return datetime.fromtimestamp(timestamp).isoformat() if timestamp is not None else None
+
+
+def _slotted(cls):
+    """Rebuild a dataclass with __slots__ for its fields (dataclass(slots=True) needs Python 3.10)"""
+    names = tuple(f.name for f in fields(cls))
+    namespace = {k: v for k, v in cls.__dict__.items() if k not in names + ("__dict__", "__weakref__")}
+    namespace["__slots__"] = names
+    return type(cls)(cls.__name__, cls.__bases__, namespace)
+
+
+# Crawl records are frozen and slotted (no per-instance __dict__), with strings
+# repeated across records (series titles, chapter names) interned and crawl times
+# kept as Unix timestamps; to_dict() gives the JSON layout of the results files.
+
+@_slotted
+@dataclass(frozen=True)
 class SeriesInfo:
     """Information about a manga series"""
     title: str
-    cover_image: str
+    cover_image: Optional[str]
     series_url: str
+    index: int = 0
     alt_text: Optional[str] = None
     title_text: Optional[str] = None
-    created_at: Optional[datetime] = None
+    crawled_at: Optional[float] = None  # Unix time
 
+    def __post_init__(self):
+        object.__setattr__(self, "title", sys.intern(self.title))
 
-@dataclass
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "index": self.index,
+            "title": self.title,
+            "cover_image": self.cover_image,
+            "series_url": self.series_url,
+            "alt_text": self.alt_text,
+            "title_text": self.title_text,
+            "crawled_at": _iso(self.crawled_at),
+        }
+
+
+@_slotted
+@dataclass(frozen=True)
 class ChapterInfo:
     """Information about a chapter"""
     chapter_number: str
     chapter_url: str
     series_title: str
-    created_at: Optional[datetime] = None
+    index: int = 0
+    crawled_at: Optional[float] = None  # Unix time
 
+    def __post_init__(self):
+        object.__setattr__(self, "chapter_number", sys.intern(self.chapter_number))
+        object.__setattr__(self, "series_title", sys.intern(self.series_title))
 
-@dataclass
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "index": self.index,
+            "chapter_number": self.chapter_number,
+            "chapter_url": self.chapter_url,
+            "series_title": self.series_title,
+            "crawled_at": _iso(self.crawled_at),
+        }
+
+
+@_slotted
+@dataclass(frozen=True)
 class ImageInfo:
     """Information about an image"""
     image_url: str
@@ -34,7 +83,41 @@ class ImageInfo:
     chapter_number: str
     series_title: str
     alt_text: Optional[str] = None
-    created_at: Optional[datetime] = None
+    title_text: Optional[str] = None
+    crawled_at: Optional[float] = None  # Unix time
+
+    def __post_init__(self):
+        object.__setattr__(self, "chapter_number", sys.intern(self.chapter_number))
+        object.__setattr__(self, "series_title", sys.intern(self.series_title))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "page_number": self.page_number,
+            "image_url": self.image_url,
+            "chapter_number": self.chapter_number,
+            "series_title": self.series_title,
+            "alt_text": self.alt_text,
+            "title_text": self.title_text,
+            "crawled_at": _iso(self.crawled_at),
+        }
+
+
+@_slotted
+@dataclass(frozen=True)
+class SeriesCrawl:
+    """A crawled series with its chapter list (one entry of crawl_all results)"""
+    info: SeriesInfo
+    chapters: Tuple[ChapterInfo, ...] = ()
+    authors: Tuple[Dict[str, Any], ...] = ()
+    synopsis: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            **self.info.to_dict(),
+            "chapters": [{**chapter.to_dict(), "images": []} for chapter in self.chapters],
+            "authors": list(self.authors),
+            "synopsis": self.synopsis,
+        }
 
 
 @dataclass
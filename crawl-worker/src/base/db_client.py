@@ -6,17 +6,19 @@ import re
 import logging
 from datetime import datetime
 from typing import Dict, Any, List, Optional
-from sqlalchemy import create_engine, text
+from sqlalchemy import create_engine, text, inspect
 from sqlalchemy.orm import sessionmaker, Session
 from sqlalchemy.exc import SQLAlchemyError
-from .db_models import Base, Series, Chapter, Author, SeriesAuthor, ChapterViewStatsDaily
+from .metrics import instrument_engine
+from .tracing import trace_engine
+from .db_models import Base, Series, Chapter, ChapterAsset, Author, SeriesAuthor, ChapterViewStatsDaily, JobWatermark
 
 
 class DatabaseClient:
     """Database client for manga data operations"""
     
     def __init__(self, db_host: str = None, db_port: str = None, db_user: str = None, 
-                 db_password: str = None, db_name: str = None):
+                 db_password: str = None, db_name: str = None, database_url: str = None):
         """
         Initialize database client
         
@@ -26,25 +28,33 @@ class DatabaseClient:
             db_user: Database user
             db_password: Database password
             db_name: Database name
+            database_url: Full SQLAlchemy URL (default: from env DATABASE_URL); overrides
+                the DB_* settings, e.g. sqlite:///data/local.sqlite for local runs and benchmarks
         """
         self.db_host = db_host or os.getenv('DB_HOST')
         self.db_port = db_port or os.getenv('DB_PORT')
         self.db_user = db_user or os.getenv('DB_USER')
         self.db_password = db_password or os.getenv('DB_PASSWORD')
         self.db_name = db_name or os.getenv('DB_NAME')
+        database_url = database_url or os.getenv('DATABASE_URL')
         
         # Validate required config
-        if not all([self.db_host, self.db_port, self.db_user, self.db_password, self.db_name]):
+        if not database_url and not all([self.db_host, self.db_port, self.db_user, self.db_password, self.db_name]):
             raise ValueError("Missing required database configuration. Please set DB_HOST, DB_PORT, DB_USER, DB_PASSWORD, and DB_NAME environment variables.")
         
         self.logger = logging.getLogger(__name__)
         
         # Create database URL
-        database_url = f"mysql+pymysql://{self.db_user}:{self.db_password}@{self.db_host}:{self.db_port}/{self.db_name}"
+        if not database_url:
+            database_url = f"mysql+pymysql://{self.db_user}:{self.db_password}@{self.db_host}:{self.db_port}/{self.db_name}"
         
         # Create engine and session
+        self._asset_columns_checked = False
+        
         try:
             self.engine = create_engine(database_url, echo=False)
+            instrument_engine(self.engine)
+            trace_engine(self.engine)
             self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
             self.logger.info("Database client initialized successfully")
         except Exception as e:
@@ -80,6 +90,7 @@ class DatabaseClient:
                 existing_series.status = series_data.get('status', 'ongoing')
                 existing_series.updated_at = datetime.utcnow()
                 session.commit()
+                session.refresh(existing_series)
                 self.logger.info(f"Updated series: {series_data['name']}")
                 return existing_series
             else:
@@ -120,6 +131,7 @@ class DatabaseClient:
                 existing_chapter.released_at = chapter_data.get('released_at')
                 existing_chapter.updated_at = datetime.utcnow()
                 session.commit()
+                session.refresh(existing_chapter)
                 self.logger.info(f"Updated chapter: {chapter_data['number']}")
                 return existing_chapter
             else:
@@ -144,6 +156,50 @@ class DatabaseClient:
         finally:
             session.close()
     
+    def save_chapter_assets(self, chapter: Chapter, assets_data: Dict[str, Any]) -> Optional[ChapterAsset]:
+        """Save or update the extra assets of a chapter (only keys present in assets_data are written)"""
+        if not self._asset_columns_checked:
+            self.ensure_columns(ChapterAsset)
+            self._asset_columns_checked = True
+        
+        session = self.get_session()
+        try:
+            assets = session.get(ChapterAsset, chapter.chapter_id)
+            if not assets:
+                assets = ChapterAsset(chapter_id=chapter.chapter_id)
+                session.add(assets)
+            
+            for key, value in assets_data.items():
+                setattr(assets, key, value)
+            assets.updated_at = datetime.utcnow()
+            
+            session.commit()
+            return assets
+                
+        except SQLAlchemyError as e:
+            session.rollback()
+            self.logger.error(f"Failed to save assets of chapter {chapter.chapter_id}: {str(e)}")
+            return None
+        finally:
+            session.close()
+    
+    def ensure_columns(self, model) -> None:
+        """Add columns missing from a worker-owned table created by an older version"""
+        table = model.__table__
+        try:
+            inspector = inspect(self.engine)
+            if not inspector.has_table(table.name):
+                return
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            with self.engine.begin() as conn:
+                for column in table.columns:
+                    if column.name not in existing:
+                        column_type = column.type.compile(dialect=self.engine.dialect)
+                        self.logger.info(f"Adding column {table.name}.{column.name}")
+                        conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type} NULL"))
+        except SQLAlchemyError as e:
+            self.logger.error(f"Failed to check columns of {table.name}: {str(e)}")
+    
     def save_author(self, author_name: str) -> Optional[Author]:
         """Save or get author by name (code is auto-generated)"""
         session = self.get_session()
@@ -205,6 +261,61 @@ class DatabaseClient:
         finally:
             session.close()
     
+    def get_series_readership(self, window: str = "7d") -> Dict[str, Dict[str, Any]]:
+        """
+        Get recent views and last import time of every series, keyed by series name
+        
+        Views come from the running totals maintained by the trending job.
+        """
+        session = self.get_session()
+        try:
+            rows = session.execute(text("""
+                SELECT s.name, s.updated_at, COALESCE(v.views, 0) AS views
+                FROM series s
+                LEFT JOIN series_window_views v
+                    ON v.series_id = s.series_id AND v.window_name = :window
+            """), {"window": window}).fetchall()
+            return {row.name: {"views": int(row.views), "updated_at": row.updated_at} for row in rows}
+        except SQLAlchemyError as e:
+            self.logger.error(f"Failed to load series readership: {str(e)}")
+            return {}
+        finally:
+            session.close()
+    
+    def get_chapter_readership(self, series_name: str, since: datetime) -> Dict[str, Dict[str, Any]]:
+        """Get views since a date and last import time of a series' chapters, keyed by chapter title"""
+        session = self.get_session()
+        try:
+            rows = session.execute(text("""
+                SELECT c.title, c.updated_at, COALESCE(SUM(d.`count`), 0) AS views
+                FROM chapters c
+                JOIN series s ON s.series_id = c.series_id
+                LEFT JOIN chapter_view_stats_daily d
+                    ON d.chapter_id = c.chapter_id AND d.bucket_date >= :since
+                WHERE s.name = :name
+                GROUP BY c.chapter_id, c.title, c.updated_at
+            """), {"name": series_name, "since": since}).fetchall()
+            return {row.title: {"views": int(row.views), "updated_at": row.updated_at} for row in rows}
+        except SQLAlchemyError as e:
+            self.logger.error(f"Failed to load chapter readership for {series_name}: {str(e)}")
+            return {}
+        finally:
+            session.close()
+    
+    def get_watermark(self, session: Session, job_name: str) -> Optional[datetime]:
+        """Get the last processed position of an incremental job"""
+        row = session.get(JobWatermark, job_name)
+        return row.watermark if row else None
+    
+    def set_watermark(self, session: Session, job_name: str, watermark: datetime) -> None:
+        """Set the watermark of an incremental job (committed by the caller)"""
+        row = session.get(JobWatermark, job_name)
+        if row:
+            row.watermark = watermark
+            row.updated_at = datetime.utcnow()
+        else:
+            session.add(JobWatermark(job_name=job_name, watermark=watermark))
+    
     def close(self):
         """Close database connection"""
         if hasattr(self, 'engine'):
@@ -1,11 +1,14 @@
 """
 Database models for manga data - MySQL schema
 """
-from sqlalchemy import create_engine, Column, BigInteger, String, Text, DateTime, ForeignKey, DECIMAL, JSON
+from sqlalchemy import create_engine, Column, BigInteger, String, Text, DateTime, ForeignKey, DECIMAL, JSON, Index, Integer
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, relationship
 from datetime import datetime
 
+# BIGINT on MySQL; SQLite only auto-increments INTEGER PRIMARY KEY (local/benchmark databases)
+AutoId = BigInteger().with_variant(Integer, "sqlite")
+
 Base = declarative_base()
 
 
@@ -13,7 +16,7 @@ class Series(Base):
     """Series/Manga table"""
     __tablename__ = 'series'
     
-    series_id = Column(BigInteger, primary_key=True, autoincrement=True)
+    series_id = Column(AutoId, primary_key=True, autoincrement=True)
     name = Column(String(250), nullable=False)
     status = Column(String(16), nullable=False, default='ongoing')  # ongoing, completed
     cover_url = Column(Text)
@@ -29,7 +32,7 @@ class Chapter(Base):
     """Chapter table"""
     __tablename__ = 'chapters'
     
-    chapter_id = Column(BigInteger, primary_key=True, autoincrement=True)
+    chapter_id = Column(AutoId, primary_key=True, autoincrement=True)
     series_id = Column(BigInteger, ForeignKey('series.series_id'), nullable=False)
     number = Column(DECIMAL(10, 2), nullable=False)  # e.g., 1.0, 1.5, 2.0
     title = Column(String(250))
@@ -47,11 +50,22 @@ class Chapter(Base):
     )
 
 
+class ChapterAsset(Base):
+    """Extra per-chapter assets produced by the worker (kept apart from the chapters table)"""
+    __tablename__ = 'chapter_assets'
+    
+    chapter_id = Column(BigInteger, ForeignKey('chapters.chapter_id'), primary_key=True)
+    mobile_pages_url = Column(JSON)  # JSON array of mobile-width image URLs
+    page_dims = Column(JSON)  # JSON array of [width, height] aligned with pages_url
+    archive_url = Column(String(1024))  # Stored CBZ/ZIP of the whole chapter for offline reading
+    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
 class Author(Base):
     """Author table"""
     __tablename__ = 'author'
     
-    code = Column(BigInteger, primary_key=True, autoincrement=True)
+    code = Column(AutoId, primary_key=True, autoincrement=True)
     label = Column(String(80), nullable=False)
 
 
@@ -77,3 +91,92 @@ class ChapterViewStatsDaily(Base):
     
     # Relationships
     chapter = relationship("Chapter")
+    
+    # Indexes (range scans by day for rollup/compaction)
+    __table_args__ = (
+        Index('ix_chapter_view_stats_daily_bucket_date', 'bucket_date'),
+    )
+
+
+class ChapterViewStatsWeekly(Base):
+    """Chapter view statistics rolled up per week (bucket_date = Monday)"""
+    __tablename__ = 'chapter_view_stats_weekly'
+    
+    chapter_id = Column(BigInteger, ForeignKey('chapters.chapter_id'), nullable=False, primary_key=True)
+    bucket_date = Column(DateTime, nullable=False, primary_key=True)
+    count = Column(BigInteger, nullable=False, default=0)
+
+
+class ChapterViewStatsMonthly(Base):
+    """Chapter view statistics rolled up per month (bucket_date = 1st of month)"""
+    __tablename__ = 'chapter_view_stats_monthly'
+    
+    chapter_id = Column(BigInteger, ForeignKey('chapters.chapter_id'), nullable=False, primary_key=True)
+    bucket_date = Column(DateTime, nullable=False, primary_key=True)
+    count = Column(BigInteger, nullable=False, default=0)
+
+
+class JobWatermark(Base):
+    """Last processed position of incremental worker jobs"""
+    __tablename__ = 'job_watermark'
+    
+    job_name = Column(String(64), primary_key=True)
+    watermark = Column(DateTime, nullable=False)
+    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class SeriesWindowViews(Base):
+    """Running view totals per series for each trending window"""
+    __tablename__ = 'series_window_views'
+    
+    window_name = Column(String(8), primary_key=True)  # 24h, 7d, 30d
+    series_id = Column(BigInteger, ForeignKey('series.series_id'), nullable=False, primary_key=True)
+    views = Column(BigInteger, nullable=False, default=0)
+
+
+class SeriesTrending(Base):
+    """Top-N most-read series per trending window, read by the site"""
+    __tablename__ = 'series_trending'
+    
+    window_name = Column(String(8), primary_key=True)  # 24h, 7d, 30d
+    position = Column(Integer, primary_key=True)  # 1 = most read
+    series_id = Column(BigInteger, ForeignKey('series.series_id'), nullable=False)
+    name = Column(String(250), nullable=False)
+    cover_url = Column(Text)
+    views = Column(BigInteger, nullable=False, default=0)
+    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+
+class SeriesManifest(Base):
+    """Version of the static series manifest last published to S3"""
+    __tablename__ = 'series_manifests'
+    
+    series_id = Column(BigInteger, ForeignKey('series.series_id'), primary_key=True)
+    version = Column(String(32), nullable=False)
+    chapter_versions = Column(JSON)  # {chapter_id: version} of the published chapter manifests
+    published_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+
+class SearchDocument(Base):
+    """Diacritic-folded text of a searchable series name or author label"""
+    __tablename__ = 'search_documents'
+    
+    doc_type = Column(String(8), primary_key=True)  # series, author
+    doc_id = Column(BigInteger, primary_key=True)  # series_id or author code
+    label = Column(String(250), nullable=False)  # Original text
+    folded = Column(String(250), nullable=False)
+    trigram_count = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class SearchTrigram(Base):
+    """Trigram inverted index over search_documents"""
+    __tablename__ = 'search_trigrams'
+    
+    trigram = Column(String(3), primary_key=True)
+    doc_type = Column(String(8), primary_key=True)
+    doc_id = Column(BigInteger, primary_key=True)
+    
+    __table_args__ = (
+        Index('ix_search_trigrams_doc', 'doc_type', 'doc_id'),
+    )
@@ -0,0 +1,168 @@
+"""
+Record/replay archive of HTTP responses (gzip members + SQLite index)
+
+The archive file is a concatenation of gzip members, one per response, like a
+.warc.gz: each member holds a JSON header line followed by the body. The index
+next to it (<archive>.idx) maps a URL to the offset and length of its latest
+member, so replay is one indexed lookup and one decompression per fetch.
+"""
+import os
+import gzip
+import json
+import mmap
+import sqlite3
+import logging
+import threading
+import zlib
+from datetime import datetime
+from typing import Optional, Dict, Any
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+
+RECORD = "record"
+REPLAY = "replay"
+
+# Response headers kept with each record (bodies are stored decoded, so no Content-Encoding)
+_KEPT_HEADERS = ("Content-Type", "Last-Modified", "ETag", "Cache-Control")
+
+
+class HttpArchive:
+    """Append-only response archive shared by the HTTP clients of one run"""
+
+    def __init__(self, path: str, mode: str = REPLAY, commit_every: int = 200, level: int = 6):
+        """
+        Open an archive
+
+        Args:
+            path: Archive file (e.g. data/archives/catalogue.warc.gz); index at <path>.idx
+            mode: "record" (append responses, replacing earlier records of a URL) or "replay"
+            commit_every: Index rows per commit while recording
+            level: gzip compression level of new records
+        """
+        if mode not in (RECORD, REPLAY):
+            raise ValueError(f"Unknown archive mode: {mode}")
+        if mode == REPLAY and not os.path.exists(path):
+            raise FileNotFoundError(f"HTTP archive not found: {path}")
+
+        self.path = path
+        self.mode = mode
+        self.commit_every = commit_every
+        self.level = level
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        self._pending = 0
+        self.hits = 0
+        self.misses = 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._index = sqlite3.connect(f"{path}.idx", check_same_thread=False)
+        self._index.execute("""
+            CREATE TABLE IF NOT EXISTS records (
+                url TEXT PRIMARY KEY,
+                offset INTEGER NOT NULL,
+                length INTEGER NOT NULL,
+                status INTEGER NOT NULL,
+                recorded_at TEXT NOT NULL
+            )
+        """)
+        self._index.commit()
+
+        self._file = None
+        self._map = None
+        if mode == RECORD:
+            self._file = open(path, "ab")
+        elif os.path.getsize(path):
+            with open(path, "rb") as f:
+                self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == REPLAY
+
+    def count(self) -> int:
+        """Number of archived URLs"""
+        with self._lock:
+            return self._index.execute("SELECT COUNT(*) FROM records").fetchone()[0]
+
+    def record(self, url: str, response: requests.Response) -> None:
+        """Append a response under the URL it was requested with"""
+        header = {
+            "url": url,
+            "final_url": response.url,
+            "status": response.status_code,
+            "reason": response.reason,
+            "encoding": response.encoding,
+            "headers": {name: response.headers[name] for name in _KEPT_HEADERS if name in response.headers},
+            "recorded_at": datetime.now().isoformat(),
+        }
+        member = gzip.compress(
+            json.dumps(header, ensure_ascii=False).encode("utf-8") + b"\n" + response.content,
+            compresslevel=self.level
+        )
+        with self._lock:
+            offset = self._file.tell()
+            self._file.write(member)
+            self._index.execute(
+                "INSERT OR REPLACE INTO records (url, offset, length, status, recorded_at) VALUES (?, ?, ?, ?, ?)",
+                (url, offset, len(member), response.status_code, header["recorded_at"])
+            )
+            self._pending += 1
+            if self._pending >= self.commit_every:
+                self._flush()
+
+    def lookup(self, url: str) -> Optional[Dict[str, Any]]:
+        """Stored header fields plus "body" of the latest record of a URL, or None"""
+        with self._lock:
+            row = self._index.execute("SELECT offset, length FROM records WHERE url = ?", (url,)).fetchone()
+        if not row or self._map is None:
+            return None
+        offset, length = row
+        # One gzip member: wbits=31 expects the gzip header and trailer
+        data = zlib.decompress(self._map[offset:offset + length], 31)
+        header_end = data.index(b"\n")
+        record = json.loads(data[:header_end])
+        record["body"] = data[header_end + 1:]
+        return record
+
+    def replay(self, url: str) -> requests.Response:
+        """
+        Rebuild the recorded response of a URL
+
+        Raises:
+            requests.exceptions.ConnectionError if the URL was never recorded
+        """
+        record = self.lookup(url)
+        if record is None:
+            self.misses += 1
+            raise requests.exceptions.ConnectionError(f"Not in HTTP archive {self.path}: {url}")
+        self.hits += 1
+        response = requests.Response()
+        response.status_code = record["status"]
+        response.reason = record.get("reason")
+        response.headers = CaseInsensitiveDict(record.get("headers") or {})
+        response.encoding = record.get("encoding")
+        response.url = record.get("final_url") or url
+        response._content = record["body"]
+        return response
+
+    def _flush(self):
+        self._file.flush()
+        self._index.commit()
+        self._pending = 0
+
+    def close(self):
+        """Flush pending records and release the archive"""
+        with self._lock:
+            if self._file:
+                self._flush()
+                self._file.close()
+                self._file = None
+            if self._map is not None:
+                self._map.close()
+                self._map = None
+            self._index.close()
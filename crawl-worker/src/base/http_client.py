@@ -5,11 +5,15 @@ import time
 import hashlib
 import json
 import os
-from typing import Tuple, Optional
+from typing import Tuple, Optional, Dict
+from urllib.parse import urlparse
 import requests
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 from .data_models import CrawlConfig
+from .metrics import HTTP_REQUESTS, HTTP_SECONDS, HTTP_BYTES_IN
+from .tracing import span
+from .http_archive import HttpArchive
 
 
 class HTTPClient:
@@ -19,6 +23,8 @@ class HTTPClient:
         self.config = config
         self.session = self._create_session()
         self.last_request_time = 0
+        # Record every response to, or serve every fetch from, an HttpArchive
+        self.archive: Optional[HttpArchive] = None
         
     def _create_session(self) -> requests.Session:
         """Create a session with retry strategy"""
@@ -76,8 +82,9 @@ class HTTPClient:
         if cached_data:
             return cached_data
         
-        # Rate limiting
-        self._rate_limit()
+        # Rate limiting (not needed when replaying from an archive)
+        if not (self.archive and self.archive.replaying):
+            self._rate_limit()
         
         # Headers
         headers = {
@@ -89,12 +96,7 @@ class HTTPClient:
         }
         
         try:
-            response = self.session.get(
-                url, 
-                headers=headers, 
-                timeout=self.config.timeout,
-                allow_redirects=True
-            )
+            response = self._get(url, headers, "html", allow_redirects=True)
             response.raise_for_status()
             
             # Save to cache
@@ -105,6 +107,41 @@ class HTTPClient:
         except requests.exceptions.RequestException as e:
             raise Exception(f"Failed to fetch {url}: {str(e)}")
     
+    def fetch_bytes(self, url: str, headers: Dict[str, str] = None) -> Tuple[bytes, Optional[str], str]:
+        """
+        Fetch a binary resource (image) without rate limiting
+        
+        Returns:
+            Tuple of (content, content_type, final_url)
+            
+        Raises:
+            requests.exceptions.RequestException on network or HTTP errors
+        """
+        response = self._get(url, headers, "image")
+        response.raise_for_status()
+        return response.content, response.headers.get("Content-Type"), response.url
+    
+    def _get(self, url: str, headers: Optional[Dict[str, str]], kind: str, **kwargs) -> requests.Response:
+        """GET on the shared session (or from the replay archive), recording count, latency and bytes per host"""
+        host = urlparse(url).hostname or ""
+        start = time.perf_counter()
+        try:
+            with span(f"fetch.{kind}", url=url):
+                if self.archive and self.archive.replaying:
+                    response = self.archive.replay(url)
+                else:
+                    response = self.session.get(url, headers=headers, timeout=self.config.timeout, **kwargs)
+        except requests.exceptions.RequestException:
+            HTTP_REQUESTS.inc(host=host, status="error")
+            raise
+        finally:
+            HTTP_SECONDS.observe(time.perf_counter() - start, host=host, kind=kind)
+        HTTP_REQUESTS.inc(host=host, status=str(response.status_code))
+        HTTP_BYTES_IN.inc(len(response.content), host=host, kind=kind)
+        if self.archive and not self.archive.replaying:
+            self.archive.record(url, response)
+        return response
+    
     def close(self):
         """Close the session"""
         self.session.close()
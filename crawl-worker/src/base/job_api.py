@@ -0,0 +1,242 @@
+"""
+Local job API of the resident worker (serve): on-demand series/chapter jobs
+
+    POST /jobs       {"url": "<series or chapter URL>", "title": "...", "max_chapters": N}
+                     -> 202 {"id": "...", "state": "queued", ...}
+    GET  /jobs/<id>  -> the job with its per-stage progress
+    GET  /jobs       -> recent jobs, newest first
+
+Served over TCP on a loopback address or over a Unix socket (curl --unix-socket).
+Jobs run in the serve loop ahead of the next scheduled cycle, or at the next
+series/chapter boundary of a running one, one at a time.
+"""
+import os
+import re
+import json
+import uuid
+import logging
+import threading
+import socketserver
+from collections import OrderedDict, deque
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional, Dict, Any, List
+from urllib.parse import urlparse
+
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+SERIES = "series"
+CHAPTER = "chapter"
+
+# Chapter pages are <series path>-chap-<number>.html on the crawled site
+_CHAPTER_RE = re.compile(r"-chap-[^/]+\.html$")
+
+_MAX_BODY = 64 * 1024
+
+
+def series_url_of(chapter_url: str) -> str:
+    """Series page URL of a chapter page URL"""
+    return _CHAPTER_RE.sub("", chapter_url.split("#")[0].split("?")[0])
+
+
+class JobQueue:
+    """Thread-safe FIFO of jobs plus the state of recent ones"""
+
+    def __init__(self, base_url: str, history: int = 200):
+        """
+        Initialize queue
+
+        Args:
+            base_url: Site root; only URLs on its host are accepted
+            history: Finished jobs kept for GET /jobs
+        """
+        self.host = urlparse(base_url).netloc
+        self.history = history
+        self._jobs: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._pending = deque()
+        self._lock = threading.Lock()
+        self._available = threading.Condition(self._lock)
+
+    def submit(self, url: str, title: str = None, kind: str = None, series_url: str = None,
+               max_chapters: int = None) -> Dict[str, Any]:
+        """
+        Queue a series or chapter job
+
+        Raises:
+            ValueError if the URL is not an http(s) URL of the crawled site
+        """
+        url = (url or "").split("#")[0].strip()
+        parsed = urlparse(url)
+        if parsed.scheme not in ("http", "https") or parsed.netloc != self.host:
+            raise ValueError(f"url must be an http(s) URL on {self.host}")
+        kind = kind or (CHAPTER if _CHAPTER_RE.search(parsed.path) else SERIES)
+        if kind not in (SERIES, CHAPTER):
+            raise ValueError(f"kind must be {SERIES!r} or {CHAPTER!r}")
+        if max_chapters is not None and (not isinstance(max_chapters, int) or max_chapters < 1):
+            raise ValueError("max_chapters must be a positive integer")
+
+        job = {
+            "id": uuid.uuid4().hex[:12],
+            "kind": kind,
+            "url": url,
+            "series_url": series_url or (series_url_of(url) if kind == CHAPTER else url),
+            "title": title,
+            "max_chapters": max_chapters,
+            "state": QUEUED,
+            "stage": None,
+            "stages": {},
+            "error": None,
+            "submitted_at": datetime.now().isoformat(),
+            "started_at": None,
+            "finished_at": None,
+        }
+        with self._available:
+            self._jobs[job["id"]] = job
+            self._pending.append(job["id"])
+            self._trim()
+            self._available.notify()
+            return dict(job)
+
+    def next(self, timeout: float = None) -> Optional[Dict[str, Any]]:
+        """Take the oldest queued job (marked running), waiting up to timeout seconds; None if there is none"""
+        with self._available:
+            if not self._pending and timeout:
+                self._available.wait(timeout)
+            if not self._pending:
+                return None
+            job = self._jobs[self._pending.popleft()]
+            job["state"] = RUNNING
+            job["started_at"] = datetime.now().isoformat()
+            return dict(job)
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def stage(self, job_id: str, stage: str, state: str, **details):
+        """Record the progress of one pipeline stage of a job"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return
+            entry = job["stages"].setdefault(stage, {})
+            entry["state"] = state
+            entry[f"{state}_at"] = datetime.now().isoformat()
+            entry.update(details)
+            job["stage"] = stage
+
+    def finish(self, job_id: str, error: str = None):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return
+            job["state"] = FAILED if error else DONE
+            job["error"] = error
+            job["finished_at"] = datetime.now().isoformat()
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return json.loads(json.dumps(job)) if job else None
+
+    def list(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return json.loads(json.dumps(list(reversed(self._jobs.values()))))
+
+    def _trim(self):
+        """Forget the oldest finished jobs beyond the history limit"""
+        finished = [job_id for job_id, job in self._jobs.items() if job["state"] in (DONE, FAILED)]
+        for job_id in finished[:max(0, len(finished) - self.history)]:
+            del self._jobs[job_id]
+
+
+class _UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class JobAPIServer:
+    """HTTP front end of a JobQueue on a TCP port or a Unix socket, served from a daemon thread"""
+
+    def __init__(self, queue: JobQueue, addr: str = "127.0.0.1", port: int = 0, socket_path: str = None):
+        """
+        Initialize server
+
+        Args:
+            queue: Jobs to submit to and report on
+            addr: TCP address to bind (ignored with socket_path)
+            port: TCP port (0 = any free port)
+            socket_path: Listen on this Unix socket instead of TCP
+        """
+        self.queue = queue
+        self.socket_path = socket_path
+        self.logger = logging.getLogger(__name__)
+
+        class _Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _reply(self, status: int, payload):
+                body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_POST(self):
+                if self.path.rstrip("/") != "/jobs":
+                    return self._reply(404, {"error": "not found"})
+                length = int(self.headers.get("Content-Length") or 0)
+                if length > _MAX_BODY:
+                    return self._reply(413, {"error": "request body too large"})
+                try:
+                    request = json.loads(self.rfile.read(length) or b"{}")
+                    if not isinstance(request, dict):
+                        raise ValueError("body must be a JSON object")
+                    job = queue.submit(
+                        request.get("url"),
+                        title=request.get("title"),
+                        kind=request.get("kind"),
+                        series_url=request.get("series_url"),
+                        max_chapters=request.get("max_chapters"),
+                    )
+                except ValueError as e:
+                    return self._reply(400, {"error": str(e)})
+                self._reply(202, job)
+
+            def do_GET(self):
+                path = self.path.split("?")[0].rstrip("/")
+                if path == "/jobs":
+                    return self._reply(200, {"pending": queue.pending(), "jobs": queue.list()})
+                if path.startswith("/jobs/"):
+                    job = queue.get(path[len("/jobs/"):])
+                    return self._reply(200, job) if job else self._reply(404, {"error": "unknown job"})
+                self._reply(404, {"error": "not found"})
+
+            def log_message(self, format, *args):
+                pass
+
+        if socket_path:
+            if os.path.exists(socket_path):
+                os.remove(socket_path)
+            self.httpd = _UnixHTTPServer(socket_path, _Handler)
+            os.chmod(socket_path, 0o600)
+            self.url = f"unix:{socket_path}"
+        else:
+            self.httpd = ThreadingHTTPServer((addr, port), _Handler)
+            self.httpd.daemon_threads = True
+            self.url = f"http://{addr}:{self.httpd.server_port}"
+
+    def start(self) -> 'JobAPIServer':
+        threading.Thread(target=self.httpd.serve_forever, name="job-api", daemon=True).start()
+        self.logger.info(f"Job API listening on {self.url}")
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self.socket_path and os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
@@ -0,0 +1,135 @@
+"""
+Disk-quota-aware local image store: evicts uploaded pages and throttles downloads
+"""
+import os
+import time
+import logging
+from typing import Callable, Optional
+
+from .asset_index import AssetIndex
+
+
+class StoreFullError(RuntimeError):
+    """The local store stayed over quota with nothing left to evict"""
+
+
+class LocalImageStore:
+    """Keeps indexed page files under a byte quota, evicting least recently read uploaded files first"""
+
+    def __init__(self, asset_index: AssetIndex, quota_bytes: int, high_water: float = 0.9,
+                 low_water: float = 0.8, wait_seconds: float = 300, poll_interval: float = 5.0):
+        """
+        Initialize store
+
+        Args:
+            asset_index: Index holding local paths, sizes and upload state of every page
+            quota_bytes: Byte quota for indexed page files
+            high_water: Fraction of the quota at which downloads are held back
+            low_water: Fraction of the quota eviction brings usage down to
+            wait_seconds: How long to wait for uploads (e.g. another worker) before giving up
+            poll_interval: Seconds between usage checks while waiting
+        """
+        self.asset_index = asset_index
+        self.quota_bytes = quota_bytes
+        self.high_bytes = int(quota_bytes * high_water)
+        self.low_bytes = int(quota_bytes * min(low_water, high_water))
+        self.wait_seconds = wait_seconds
+        self.poll_interval = poll_interval
+        self.logger = logging.getLogger(__name__)
+
+    def usage(self, recount: bool = False) -> int:
+        """Bytes of indexed page files currently on disk (recount: re-sum the index)"""
+        return self.asset_index.local_bytes(recount=recount)
+
+    def evict(self, target_bytes: int = None) -> int:
+        """
+        Delete uploaded page files, least recently used first, until usage is at or below target
+
+        Args:
+            target_bytes: Usage to reach (default: low-water mark)
+
+        Returns:
+            Bytes freed
+        """
+        target_bytes = self.low_bytes if target_bytes is None else target_bytes
+        usage = self.usage()
+        freed = 0
+        while usage > target_bytes:
+            rows = self.asset_index.evictable()
+            if not rows:
+                break
+            evicted = []
+            for row in rows:
+                if usage <= target_bytes:
+                    break
+                try:
+                    os.remove(row["local_path"])
+                except FileNotFoundError:
+                    pass
+                except OSError as e:
+                    self.logger.warning(f"Could not evict {row['local_path']}: {str(e)}")
+                    continue
+                evicted.append(row)
+                usage -= row["bytes"] or 0
+                freed += row["bytes"] or 0
+            if not evicted:
+                break
+            self.asset_index.clear_local(evicted)
+            self._remove_empty_dirs({os.path.dirname(row["local_path"]) for row in evicted})
+
+        if freed:
+            self.logger.info(f"Evicted {freed / 1e6:.1f} MB of uploaded pages, local store at {usage / 1e6:.1f} MB")
+        return freed
+
+    def ensure_capacity(self, evict: bool = True, flush: Optional[Callable[[], None]] = None,
+                        wait: bool = True) -> None:
+        """
+        Backpressure before downloading more pages: block until usage is below the high-water mark
+
+        Evicts uploaded files first; if that is not enough, calls flush (upload pending pages,
+        only when no later stage reads them locally) and evicts again, then waits for other
+        workers to upload (or evict).
+
+        Args:
+            evict: False while a later local stage still reads uploaded pages
+            flush: Optional callback that makes pending pages evictable
+            wait: False when no other worker uploads from this store (fail at once)
+
+        Raises:
+            StoreFullError: Still over the high-water mark after wait_seconds (at once without wait)
+        """
+        if self.usage() <= self.high_bytes:
+            return
+        if evict:
+            self.evict()
+            if self.usage() <= self.high_bytes:
+                return
+            if flush:
+                self.logger.info("Local store near quota, uploading pending pages before downloading more")
+                flush()
+                self.evict()
+                if self.usage() <= self.high_bytes:
+                    return
+
+        deadline = time.monotonic() + (self.wait_seconds if wait else 0)
+        while self.usage(recount=True) > self.high_bytes:
+            if time.monotonic() >= deadline:
+                raise StoreFullError(
+                    f"Local store over {self.high_bytes / 1e6:.0f} MB with no uploaded pages left to evict"
+                )
+            self.logger.info("Local store near quota, waiting for uploads")
+            time.sleep(self.poll_interval)
+            if evict:
+                self.evict()
+
+    def _remove_empty_dirs(self, directories):
+        """Remove chapter directories left with nothing but their manifest"""
+        for directory in directories:
+            try:
+                entries = os.listdir(directory)
+            except FileNotFoundError:
+                continue
+            if not entries or entries == ["manifest.json"]:
+                for entry in entries:
+                    os.remove(os.path.join(directory, entry))
+                os.rmdir(directory)
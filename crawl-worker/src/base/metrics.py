@@ -0,0 +1,247 @@
+"""
+Process-wide metrics with Prometheus text exposition (HTTP /metrics or textfile collector)
+"""
+import os
+import time
+import bisect
+import logging
+import threading
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Tuple, Sequence
+
+from ..utils.file_utils import atomic_write
+
+
+# Seconds; covers fast parses up to slow origin pages and multipart uploads
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: Tuple[str, str] = None) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(f'{extra[0]}="{extra[1]}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._samples())
+        return lines
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """Monotonic total per label set"""
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}" for key, value in items]
+
+
+class Gauge(Counter):
+    """Value that can go up and down"""
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    """Cumulative bucket counts, sum and count per label set"""
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._values: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the duration of a with-block"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = sorted((key, ([*state[0]], state[1], state[2])) for key, state in self._values.items())
+        lines = []
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.labelnames, key, ("le", _format_value(bound)))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """Named metrics rendered together in the Prometheus text format"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        """All metrics in text exposition format 0.0.4"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def write_textfile(self, path: str):
+        """Write all metrics for the node_exporter textfile collector (atomic rename)"""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        atomic_write(path, self.render().encode("utf-8"))
+
+    def start_http_server(self, port: int, addr: str = "127.0.0.1") -> ThreadingHTTPServer:
+        """Serve GET /metrics from a daemon thread"""
+        registry = self
+
+        class _Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = registry.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer((addr, port), _Handler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+        logging.getLogger(__name__).info(f"Serving metrics on http://{addr}:{server.server_port}/metrics")
+        return server
+
+
+REGISTRY = MetricsRegistry()
+
+# HTTP (HTTPClient)
+HTTP_REQUESTS = REGISTRY.counter("crawler_http_requests_total", "HTTP requests by host and status", ("host", "status"))
+HTTP_SECONDS = REGISTRY.histogram("crawler_http_request_seconds", "HTTP request latency", ("host", "kind"))
+HTTP_BYTES_IN = REGISTRY.counter("crawler_http_received_bytes_total", "Response bytes received", ("host", "kind"))
+
+# Crawlers and downloader
+PARSE_SECONDS = REGISTRY.histogram("crawler_parse_seconds", "HTML parse time", ("crawler",))
+PAGES_DOWNLOADED = REGISTRY.counter("crawler_pages_downloaded_total", "Chapter page images downloaded")
+CHAPTERS_DOWNLOADED = REGISTRY.counter("crawler_chapters_downloaded_total", "Chapters downloaded")
+
+# S3 (S3Uploader)
+S3_UPLOADS = REGISTRY.counter("crawler_s3_uploads_total", "S3 uploads by kind and result", ("kind", "result"))
+S3_SECONDS = REGISTRY.histogram("crawler_s3_upload_seconds", "S3 upload latency", ("kind",))
+S3_BYTES_OUT = REGISTRY.counter("crawler_s3_sent_bytes_total", "Bytes uploaded to S3", ("kind",))
+S3_QUEUE_DEPTH = REGISTRY.gauge("crawler_s3_queue_depth", "Uploads queued or running on the upload pool")
+
+# Database (DatabaseClient)
+DB_SECONDS = REGISTRY.histogram("crawler_db_statement_seconds", "Database statement time", ("operation",))
+
+# Stages (main.py modes)
+STAGE_SECONDS = REGISTRY.gauge("crawler_stage_last_duration_seconds", "Duration of the last run of a stage", ("stage",))
+STAGE_RUNS = REGISTRY.counter("crawler_stage_runs_total", "Stage runs by result", ("stage", "result"))
+SERVE_CYCLES = REGISTRY.counter("crawler_serve_cycles_total", "Serve-mode cycles by result", ("result",))
+SERVE_JOBS = REGISTRY.counter("crawler_serve_jobs_total", "Job API jobs by kind and result", ("kind", "result"))
+SERVE_LAST_CYCLE = REGISTRY.gauge("crawler_serve_last_cycle_timestamp_seconds", "Unix time the last serve cycle ended")
+
+
+def instrument_engine(engine):
+    """Time every statement of an SQLAlchemy engine by operation (SELECT, INSERT, ...)"""
+    from sqlalchemy import event
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("_metrics_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get("_metrics_start")
+        if starts:
+            operation = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "OTHER"
+            DB_SECONDS.observe(time.perf_counter() - starts.pop(), operation=operation)
+
+    @event.listens_for(engine, "handle_error")
+    def _error(context):
+        starts = context.connection.info.get("_metrics_start") if context.connection is not None else None
+        if starts:
+            starts.pop()
@@ -1,11 +1,25 @@
 """
 S3 Uploader for manga images
 """
+import io
 import os
+import time
+import hashlib
 import logging
-from typing import Optional, Dict, Any
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Optional, Dict, Any, List
 import boto3
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
 from botocore.exceptions import ClientError, NoCredentialsError
+from .blob_index import BlobIndex
+from .metrics import S3_UPLOADS, S3_SECONDS, S3_BYTES_OUT, S3_QUEUE_DEPTH
+from .tracing import span
+
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.gif', '.webp', '.avif')
 
 
 class S3Uploader:
@@ -15,7 +29,12 @@ class S3Uploader:
                  aws_region: str = None,
                  aws_access_key_id: str = None, 
                  aws_secret_access_key: str = None,
-                 bucket_name: str = None):
+                 bucket_name: str = None,
+                 max_workers: int = 16,
+                 multipart_threshold_mb: int = 8,
+                 content_addressed: bool = False,
+                 blob_index_path: str = "data/blob_index.sqlite",
+                 endpoint_url: str = None):
         """
         Initialize S3 uploader
         
@@ -24,25 +43,48 @@ class S3Uploader:
             aws_access_key_id: AWS access key (default: from env AWS_ACCESS_KEY_ID)
             aws_secret_access_key: AWS secret key (default: from env AWS_SECRET_ACCESS_KEY)
             bucket_name: S3 bucket name (default: from env S3_BUCKET)
+            max_workers: Number of files uploaded in parallel
+            multipart_threshold_mb: Files larger than this use multipart upload
+            content_addressed: Store pages once under blobs/ab/cd/<sha256><ext> instead of per chapter
+            blob_index_path: Local index of blobs already stored (content-addressed mode)
+            endpoint_url: S3-compatible endpoint (default: from env S3_ENDPOINT_URL; MinIO, local fakes)
         """
         self.aws_region = aws_region or os.getenv('AWS_REGION', 'us-east-1')
         self.aws_access_key_id = aws_access_key_id or os.getenv('AWS_ACCESS_KEY_ID')
         self.aws_secret_access_key = aws_secret_access_key or os.getenv('AWS_SECRET_ACCESS_KEY')
         self.bucket_name = bucket_name or os.getenv('S3_BUCKET')
+        self.endpoint_url = endpoint_url or os.getenv('S3_ENDPOINT_URL') or None
         
+        self.max_workers = max(1, max_workers)
+        self.content_addressed = content_addressed
+        self.blob_index_path = blob_index_path
         self.logger = logging.getLogger(__name__)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._blob_index: Optional[BlobIndex] = None
+        # Striped locks so two threads never upload the same digest at once
+        self._blob_locks = [threading.Lock() for _ in range(256)]
+        
+        # Small pages are uploaded in parallel by our own pool, so each transfer
+        # only uses extra threads for the rare multipart upload
+        self.transfer_config = TransferConfig(
+            multipart_threshold=multipart_threshold_mb * 1024 * 1024,
+            max_concurrency=4,
+            use_threads=True
+        )
         
         # Validate required config
         if not all([self.aws_access_key_id, self.aws_secret_access_key, self.bucket_name]):
             raise ValueError("Missing required S3 configuration. Please set AWS_ACCESS_KEY_ID, AWS_SECRET_ACCESS_KEY, and S3_BUCKET environment variables.")
         
-        # Initialize S3 client
+        # Initialize one shared S3 client (thread-safe) with a pool sized for all workers
         try:
             self.s3_client = boto3.client(
                 's3',
                 region_name=self.aws_region,
+                endpoint_url=self.endpoint_url,
                 aws_access_key_id=self.aws_access_key_id,
-                aws_secret_access_key=self.aws_secret_access_key
+                aws_secret_access_key=self.aws_secret_access_key,
+                config=Config(max_pool_connections=self.max_workers * self.transfer_config.max_concurrency)
             )
             self.logger.info(f"S3 client initialized for bucket: {self.bucket_name}")
         except NoCredentialsError:
@@ -51,7 +93,7 @@ class S3Uploader:
             raise ValueError(f"Failed to initialize S3 client: {str(e)}")
     
     def upload_file(self, local_file_path: str, s3_key: str, 
-                   content_type: str = None, make_public: bool = True) -> Optional[str]:
+                   content_type: str = None, make_public: bool = True, sha256: str = None) -> Optional[str]:
         """
         Upload file to S3
         
@@ -60,6 +102,7 @@ class S3Uploader:
             s3_key: S3 object key (path in bucket)
             content_type: MIME type (auto-detect if None)
             make_public: Whether to make object public
+            sha256: Content digest stored as object metadata (used by sync)
             
         Returns:
             S3 URL if successful, None if failed
@@ -68,41 +111,268 @@ class S3Uploader:
             self.logger.error(f"Local file not found: {local_file_path}")
             return None
         
+        start = time.perf_counter()
         try:
             # Auto-detect content type if not provided
             if not content_type:
                 content_type = self._get_content_type(local_file_path)
             
-            # Upload parameters
-            extra_args = {
-                'ContentType': content_type,
-                'CacheControl': 'public, max-age=31536000'  # 1 year cache
-            }
-            
-            # Note: ACL removed due to bucket policy restrictions
-            # Make bucket public via bucket policy instead of ACL
-            
             # Upload file
-            self.s3_client.upload_file(
-                local_file_path,
-                self.bucket_name,
-                s3_key,
-                ExtraArgs=extra_args
-            )
+            with span("s3.upload", key=s3_key):
+                self.s3_client.upload_file(
+                    local_file_path,
+                    self.bucket_name,
+                    s3_key,
+                    ExtraArgs=self._extra_args(content_type, sha256),
+                    Config=self.transfer_config
+                )
             
-            # Generate public URL
-            s3_url = f"https://{self.bucket_name}.s3.{self.aws_region}.amazonaws.com/{s3_key}"
+            s3_url = self.get_url(s3_key)
+            self._observe("file", start, os.path.getsize(local_file_path))
             
             self.logger.info(f"Uploaded {local_file_path} to {s3_url}")
             return s3_url
             
         except ClientError as e:
+            self._observe("file", start)
             self.logger.error(f"Failed to upload {local_file_path}: {str(e)}")
             return None
         except Exception as e:
+            self._observe("file", start)
             self.logger.error(f"Unexpected error uploading {local_file_path}: {str(e)}")
             return None
     
+    def upload_bytes(self, data: bytes, s3_key: str, content_type: str = None, sha256: str = None,
+                     cache_control: str = None) -> Optional[str]:
+        """
+        Upload an in-memory object to S3 (multipart above the threshold)
+        
+        Args:
+            data: Object body
+            s3_key: S3 object key (path in bucket)
+            content_type: MIME type (auto-detect from key if None)
+            sha256: Content digest stored as object metadata (used by sync)
+            cache_control: Cache-Control header (default: cached for a year)
+            
+        Returns:
+            S3 URL if successful, None if failed
+        """
+        start = time.perf_counter()
+        try:
+            with span("s3.upload", key=s3_key, bytes=len(data)):
+                self.s3_client.upload_fileobj(
+                    io.BytesIO(data),
+                    self.bucket_name,
+                    s3_key,
+                    ExtraArgs=self._extra_args(content_type or self._get_content_type(s3_key), sha256, cache_control),
+                    Config=self.transfer_config
+                )
+            s3_url = self.get_url(s3_key)
+            self._observe("bytes", start, len(data))
+            self.logger.info(f"Uploaded {len(data)} bytes to {s3_url}")
+            return s3_url
+            
+        except ClientError as e:
+            self._observe("bytes", start)
+            self.logger.error(f"Failed to upload {s3_key}: {str(e)}")
+            return None
+        except Exception as e:
+            self._observe("bytes", start)
+            self.logger.error(f"Unexpected error uploading {s3_key}: {str(e)}")
+            return None
+    
+    @staticmethod
+    def _observe(kind: str, start: float, sent_bytes: int = None):
+        """Record an upload attempt; sent_bytes is None when it failed"""
+        S3_SECONDS.observe(time.perf_counter() - start, kind=kind)
+        S3_UPLOADS.inc(kind=kind, result="ok" if sent_bytes is not None else "error")
+        if sent_bytes:
+            S3_BYTES_OUT.inc(sent_bytes, kind=kind)
+    
+    def submit_bytes(self, data: bytes, s3_key: str, content_type: str = None, sha256: str = None) -> Future:
+        """Queue an in-memory upload on the shared pool; the future resolves to the S3 URL or None"""
+        return self._submit(self.upload_bytes, data, s3_key, content_type, sha256)
+    
+    def _extra_args(self, content_type: str, sha256: str = None, cache_control: str = None) -> Dict[str, Any]:
+        """Upload parameters shared by file and in-memory uploads"""
+        # Note: ACL removed due to bucket policy restrictions
+        # Make bucket public via bucket policy instead of ACL
+        extra_args = {
+            'ContentType': content_type,
+            'CacheControl': cache_control or 'public, max-age=31536000'  # 1 year cache
+        }
+        if sha256:
+            extra_args['Metadata'] = {'sha256': sha256}
+        return extra_args
+    
+    def list_prefix(self, prefix: str) -> Dict[str, Dict[str, Any]]:
+        """
+        List existing objects under a prefix (paginated ListObjectsV2)
+        
+        Returns:
+            Dictionary of key -> {"etag", "size"}
+        """
+        objects = {}
+        paginator = self.s3_client.get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=self.bucket_name, Prefix=prefix):
+            for obj in page.get('Contents', []):
+                objects[obj['Key']] = {
+                    "etag": obj['ETag'].strip('"'),
+                    "size": obj['Size'],
+                }
+        return objects
+    
+    def get_object_info(self, s3_key: str) -> Optional[Dict[str, Any]]:
+        """HEAD an object; returns {"etag", "size", "sha256"} or None if missing"""
+        try:
+            head = self.s3_client.head_object(Bucket=self.bucket_name, Key=s3_key)
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') in ('404', 'NoSuchKey', 'NotFound'):
+                return None
+            raise
+        return {
+            "etag": head['ETag'].strip('"'),
+            "size": head['ContentLength'],
+            "sha256": head.get('Metadata', {}).get('sha256'),
+        }
+    
+    def matches_remote(self, local_path: str, s3_key: str, remote: Optional[Dict[str, Any]],
+                       digests: Optional[Dict[str, str]] = None) -> bool:
+        """
+        Check whether the object already holds the local file's bytes
+        
+        Single-part ETags are the MD5 of the body; multipart ETags are not, so
+        those objects are compared by the sha256 metadata written on upload.
+        Digests missing from digests are computed and added to it.
+        """
+        if not remote or remote["size"] != os.path.getsize(local_path):
+            return False
+        
+        digests = digests if digests is not None else {}
+        if "-" not in remote["etag"]:
+            if "md5" not in digests:
+                digests.update(_file_digests(local_path, sha256="sha256" not in digests))
+            return remote["etag"] == digests["md5"]
+        
+        if "sha256" not in digests:
+            digests.update(_file_digests(local_path, md5=False))
+        sha256 = remote.get("sha256")
+        if sha256 is None:
+            sha256 = (self.get_object_info(s3_key) or {}).get("sha256")
+        return sha256 == digests["sha256"]
+    
+    def sync_file(self, local_path: str, s3_key: str, remote: Optional[Dict[str, Any]],
+                  sha256: str = None, head: bool = False) -> Dict[str, Any]:
+        """
+        Upload a file only if the remote object is missing or different
+        
+        Args:
+            local_path: File to upload
+            s3_key: S3 object key
+            remote: Listed state of the object ({"etag", "size"}), None if missing
+            sha256: Known SHA-256 of the file (e.g. from the download manifest), not recomputed
+            head: Look the object up with HEAD instead of using remote
+        """
+        digests = {"sha256": sha256} if sha256 else {}
+        try:
+            if head:
+                remote = self.get_object_info(s3_key)
+            if self.matches_remote(local_path, s3_key, remote, digests):
+                return {"s3_url": self.get_url(s3_key), "skipped": True}
+        except (OSError, ClientError) as e:
+            self.logger.warning(f"Could not compare {local_path} with {s3_key}, uploading: {str(e)}")
+        
+        return {"s3_url": self.upload_file(local_path, s3_key, sha256=digests.get("sha256")), "skipped": False}
+    
+    def get_url(self, s3_key: str) -> str:
+        """Generate public URL for an object key"""
+        if self.endpoint_url:
+            return f"{self.endpoint_url.rstrip('/')}/{self.bucket_name}/{s3_key}"
+        return f"https://{self.bucket_name}.s3.{self.aws_region}.amazonaws.com/{s3_key}"
+    
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        """Shared upload thread pool (created on first use)"""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="s3-upload")
+        return self._executor
+    
+    def _submit(self, fn, *args) -> Future:
+        """Queue work on the shared pool, tracking the queue depth"""
+        S3_QUEUE_DEPTH.inc()
+        future = self.executor.submit(fn, *args)
+        future.add_done_callback(lambda _: S3_QUEUE_DEPTH.dec())
+        return future
+    
+    @property
+    def blob_index(self) -> BlobIndex:
+        """Index of stored blobs (opened on first use)"""
+        if self._blob_index is None:
+            self._blob_index = BlobIndex(self.blob_index_path)
+        return self._blob_index
+    
+    @staticmethod
+    def blob_key(sha256: str, ext: str) -> str:
+        """Content-addressed key, fanned out by the first two digest bytes"""
+        return f"blobs/{sha256[:2]}/{sha256[2:4]}/{sha256}{ext.lower()}"
+    
+    def store_blob(self, sha256: str, ext: str, local_path: str = None, data: bytes = None,
+                   verify_remote: bool = False) -> Dict[str, Any]:
+        """
+        Store a page once by content digest (thread-safe, idempotent)
+        
+        Args:
+            sha256: Content digest
+            ext: File extension of the page
+            local_path: Path of the page on disk (or pass data)
+            data: Page bytes (or pass local_path)
+            verify_remote: If the digest is not indexed, HEAD the key before uploading
+            
+        Returns:
+            {"s3_url", "s3_key", "skipped"}; s3_url is None if the upload failed
+        """
+        with self._blob_locks[int(sha256[:2], 16)]:
+            stored = self.blob_index.get(sha256)
+            if stored:
+                return {"s3_url": self.get_url(stored["s3_key"]), "s3_key": stored["s3_key"], "skipped": True}
+            
+            s3_key = self.blob_key(sha256, ext)
+            try:
+                size = len(data) if data is not None else os.path.getsize(local_path)
+                
+                if verify_remote:
+                    remote = self.get_object_info(s3_key)
+                    if remote and remote["size"] == size:
+                        self.blob_index.add(sha256, s3_key, size)
+                        return {"s3_url": self.get_url(s3_key), "s3_key": s3_key, "skipped": True}
+            except (OSError, ClientError) as e:
+                self.logger.error(f"Failed to store blob {s3_key}: {str(e)}")
+                return {"s3_url": None, "s3_key": s3_key, "skipped": False}
+            
+            if data is not None:
+                s3_url = self.upload_bytes(data, s3_key, sha256=sha256)
+            else:
+                s3_url = self.upload_file(local_path, s3_key, sha256=sha256)
+            
+            if s3_url:
+                self.blob_index.add(sha256, s3_key, size)
+            return {"s3_url": s3_url, "s3_key": s3_key, "skipped": False}
+    
+    def submit_blob(self, sha256: str, ext: str, local_path: str = None, data: bytes = None,
+                    verify_remote: bool = False) -> Future:
+        """Queue store_blob on the shared pool"""
+        return self._submit(self.store_blob, sha256, ext, local_path, data, verify_remote)
+    
+    def _store_file_blob(self, local_path: str, sha256: str = None, verify_remote: bool = False) -> Dict[str, Any]:
+        """Hash a page file if needed, then store it as a blob"""
+        if not sha256:
+            try:
+                sha256 = _file_digests(local_path, md5=False)["sha256"]
+            except OSError as e:
+                self.logger.error(f"Failed to read {local_path}: {str(e)}")
+                return {"s3_url": None, "s3_key": None, "skipped": False}
+        return self.store_blob(sha256, os.path.splitext(local_path)[1], local_path=local_path, verify_remote=verify_remote)
+    
     def _get_content_type(self, file_path: str) -> str:
         """Get content type from file extension"""
         ext = os.path.splitext(file_path)[1].lower()
@@ -116,6 +386,13 @@ class S3Uploader:
         }
         return content_types.get(ext, 'application/octet-stream')
     
+    def _list_chapter_images(self, chapter_dir: str) -> List[str]:
+        """List image files of a chapter directory in page order"""
+        return sorted(
+            filename for filename in os.listdir(chapter_dir)
+            if filename.lower().endswith(IMAGE_EXTENSIONS)
+        )
+    
     def upload_chapter_images(self, chapter_dir: str, series_slug: str, chapter_slug: str) -> Dict[str, Any]:
         """
         Upload all images in a chapter directory to S3
@@ -128,42 +405,110 @@ class S3Uploader:
         Returns:
             Dictionary with upload results
         """
-        results = {
-            "uploaded": [],
-            "failed": [],
-            "total": 0,
-            "success_count": 0
-        }
+        return self.upload_chapters([{
+            "chapter_dir": chapter_dir,
+            "series_slug": series_slug,
+            "chapter_slug": chapter_slug,
+        }])[0]
+    
+    def upload_chapters(self, chapters: List[Dict[str, str]], sync: bool = False) -> List[Dict[str, Any]]:
+        """
+        Upload the images of many chapters in parallel on the shared thread pool
         
-        if not os.path.exists(chapter_dir):
-            self.logger.error(f"Chapter directory not found: {chapter_dir}")
-            return results
+        Args:
+            chapters: List of {"chapter_dir", "series_slug", "chapter_slug"}, optionally with
+                "sha256s" ({filename: sha256} from the download manifest),
+                "skip_stems" (page file names without extension that must not be uploaded),
+                "filenames" (page files from the asset index, instead of listing the directory) and
+                "done" ({filename: {"s3_key", "s3_url"}} already uploaded, reported as skipped)
+            sync: List each chapter prefix once and only upload missing or changed files
+                (content-addressed mode: check unindexed blobs with HEAD instead)
+            
+        Returns:
+            One upload results dictionary per chapter, in input order
+        """
+        all_results = []
+        pending = []
         
-        # Find all image files
-        image_files = []
-        for filename in os.listdir(chapter_dir):
-            if filename.lower().endswith(('.jpg', '.jpeg', '.png', '.gif', '.webp', '.avif')):
-                image_files.append(filename)
+        # One listing per chapter prefix, fetched in parallel
+        listings = {}
+        if sync and not self.content_addressed:
+            for chapter in chapters:
+                prefix = f"stories/{chapter['series_slug']}/{chapter['chapter_slug']}/"
+                if prefix not in listings:
+                    listings[prefix] = self._submit(self.list_prefix, prefix)
         
-        image_files.sort()  # Sort to maintain order
-        results["total"] = len(image_files)
+        for chapter in chapters:
+            chapter_dir = chapter["chapter_dir"]
+            results = {
+                "uploaded": [],
+                "failed": [],
+                "total": 0,
+                "success_count": 0,
+                "skipped_count": 0
+            }
+            all_results.append(results)
+            
+            image_files = chapter.get("filenames")
+            if image_files is None:
+                if not os.path.exists(chapter_dir):
+                    self.logger.error(f"Chapter directory not found: {chapter_dir}")
+                    continue
+                image_files = self._list_chapter_images(chapter_dir)
+            
+            skip_stems = chapter.get("skip_stems", ())
+            image_files = [
+                filename for filename in image_files
+                if os.path.splitext(filename)[0] not in skip_stems
+            ]
+            results["total"] = len(image_files)
+            
+            prefix = f"stories/{chapter['series_slug']}/{chapter['chapter_slug']}/"
+            remote_objects = None
+            if sync and not self.content_addressed:
+                try:
+                    remote_objects = listings[prefix].result()
+                except ClientError as e:
+                    self.logger.warning(f"Could not list {prefix}, uploading all files: {str(e)}")
+                    remote_objects = {}
+            
+            done = chapter.get("done", {})
+            for filename in image_files:
+                local_path = os.path.join(chapter_dir, filename)
+                s3_key = f"{prefix}{filename}"
+                if filename in done:
+                    future = Future()
+                    future.set_result({**done[filename], "skipped": True})
+                elif self.content_addressed:
+                    sha256 = chapter.get("sha256s", {}).get(filename)
+                    future = self._submit(self._store_file_blob, local_path, sha256, sync)
+                elif remote_objects is not None:
+                    future = self._submit(self.sync_file, local_path, s3_key, remote_objects.get(s3_key),
+                                          chapter.get("sha256s", {}).get(filename))
+                else:
+                    future = self._submit(self.upload_file, local_path, s3_key)
+                pending.append((results, filename, local_path, s3_key, future))
         
-        self.logger.info(f"Uploading {len(image_files)} images from {chapter_dir}")
+        self.logger.info(f"Uploading {len(pending)} images from {len(chapters)} chapter(s) with {self.max_workers} workers")
         
-        for filename in image_files:
-            local_path = os.path.join(chapter_dir, filename)
-            s3_key = f"stories/{series_slug}/{chapter_slug}/{filename}"
-            
-            s3_url = self.upload_file(local_path, s3_key)
+        # Collect in submission order so per-chapter lists keep page order
+        for results, filename, local_path, s3_key, future in pending:
+            outcome = future.result()
+            if not isinstance(outcome, dict):
+                outcome = {"s3_url": outcome, "skipped": False}
+            s3_url = outcome["s3_url"]
+            s3_key = outcome.get("s3_key") or s3_key
             
             if s3_url:
                 results["uploaded"].append({
                     "filename": filename,
                     "local_path": local_path,
                     "s3_key": s3_key,
-                    "s3_url": s3_url
+                    "s3_url": s3_url,
+                    "skipped": outcome["skipped"]
                 })
                 results["success_count"] += 1
+                results["skipped_count"] += int(outcome["skipped"])
             else:
                 results["failed"].append({
                     "filename": filename,
@@ -171,5 +516,168 @@ class S3Uploader:
                     "s3_key": s3_key
                 })
         
-        self.logger.info(f"Upload completed: {results['success_count']}/{results['total']} successful")
-        return results
+        success_count = sum(r["success_count"] for r in all_results)
+        skipped_count = sum(r["skipped_count"] for r in all_results)
+        self.logger.info(f"Upload completed: {success_count}/{len(pending)} successful, {skipped_count} unchanged")
+        return all_results
+    
+    def open_multipart(self, s3_key: str, content_type: str, part_size_mb: int = None) -> 'MultipartUploadWriter':
+        """
+        Start a multipart upload written to like a file (for objects built on the fly)
+        
+        Args:
+            s3_key: S3 object key
+            content_type: MIME type of the object
+            part_size_mb: Part size (default: multipart threshold, at least 5 MB)
+            
+        Returns:
+            MultipartUploadWriter; use as a context manager so failures abort the upload
+        """
+        part_size = (part_size_mb * 1024 * 1024) if part_size_mb else self.transfer_config.multipart_threshold
+        return MultipartUploadWriter(self, s3_key, content_type, part_size)
+    
+    def iter_object(self, s3_key: str, chunk_size: int = 1024 * 1024):
+        """Stream the body of an object in chunks"""
+        response = self.s3_client.get_object(Bucket=self.bucket_name, Key=s3_key)
+        return response["Body"].iter_chunks(chunk_size)
+    
+    def close(self):
+        """Wait for in-flight uploads and release the thread pool"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        if self._blob_index is not None:
+            self._blob_index.close()
+            self._blob_index = None
+
+
+class MultipartUploadWriter:
+    """Write-only, non-seekable file object streaming into an S3 multipart upload"""
+    
+    MIN_PART_SIZE = 5 * 1024 * 1024  # S3 minimum for every part but the last
+    
+    def __init__(self, uploader: S3Uploader, s3_key: str, content_type: str,
+                 part_size: int, max_inflight: int = 4):
+        """
+        Create the multipart upload
+        
+        Args:
+            uploader: S3Uploader whose client and thread pool upload the parts
+            s3_key: S3 object key
+            content_type: MIME type of the object
+            part_size: Bytes per part
+            max_inflight: Parts buffered in memory while uploading (bounds memory use)
+        """
+        self.uploader = uploader
+        self.s3_key = s3_key
+        self.part_size = max(part_size, self.MIN_PART_SIZE)
+        self.max_inflight = max(1, max_inflight)
+        self.bytes_written = 0
+        self.s3_url: Optional[str] = None
+        self._buffer = bytearray()
+        self._parts: List[tuple] = []
+        self._inflight = deque()
+        self._closed = False
+        
+        response = uploader.s3_client.create_multipart_upload(
+            Bucket=uploader.bucket_name, Key=s3_key, **uploader._extra_args(content_type)
+        )
+        self.upload_id = response["UploadId"]
+    
+    def writable(self) -> bool:
+        return True
+    
+    def write(self, data) -> int:
+        """Buffer data and upload every full part in the background"""
+        if self._closed:
+            raise ValueError("write to closed multipart upload")
+        self._buffer += data
+        self.bytes_written += len(data)
+        while len(self._buffer) >= self.part_size:
+            part = bytes(self._buffer[:self.part_size])
+            del self._buffer[:self.part_size]
+            self._submit(part)
+        return len(data)
+    
+    def flush(self):
+        pass
+    
+    def _submit(self, data: bytes):
+        # Wait for the oldest part before buffering more than max_inflight
+        while len(self._inflight) >= self.max_inflight:
+            self._inflight.popleft().result()
+        number = len(self._parts) + 1
+        future = self.uploader._submit(self._upload_part, number, data)
+        self._parts.append((number, future))
+        self._inflight.append(future)
+    
+    def _upload_part(self, number: int, data: bytes) -> str:
+        start = time.perf_counter()
+        try:
+            with span("s3.upload_part", key=self.s3_key, part=number, bytes=len(data)):
+                response = self.uploader.s3_client.upload_part(
+                    Bucket=self.uploader.bucket_name, Key=self.s3_key, UploadId=self.upload_id,
+                    PartNumber=number, Body=data
+                )
+        except Exception:
+            self.uploader._observe("part", start)
+            raise
+        self.uploader._observe("part", start, len(data))
+        return response["ETag"]
+    
+    def close(self) -> Optional[str]:
+        """Upload the last part and complete the object; returns its URL"""
+        if self._closed:
+            return self.s3_url
+        if self._buffer or not self._parts:
+            self._submit(bytes(self._buffer))
+            self._buffer.clear()
+        parts = [{"PartNumber": number, "ETag": future.result()} for number, future in self._parts]
+        self.uploader.s3_client.complete_multipart_upload(
+            Bucket=self.uploader.bucket_name, Key=self.s3_key, UploadId=self.upload_id,
+            MultipartUpload={"Parts": parts}
+        )
+        self._closed = True
+        self.s3_url = self.uploader.get_url(self.s3_key)
+        return self.s3_url
+    
+    def abort(self):
+        """Discard uploaded parts"""
+        if self._closed:
+            return
+        self._closed = True
+        for _, future in self._parts:
+            future.exception()
+        try:
+            self.uploader.s3_client.abort_multipart_upload(
+                Bucket=self.uploader.bucket_name, Key=self.s3_key, UploadId=self.upload_id
+            )
+        except ClientError as e:
+            self.uploader.logger.warning(f"Failed to abort multipart upload of {self.s3_key}: {str(e)}")
+    
+    def __enter__(self) -> 'MultipartUploadWriter':
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.abort()
+            return
+        try:
+            self.close()
+        except Exception:
+            self.abort()
+            raise
+
+
+def _file_digests(path: str, md5: bool = True, sha256: bool = True) -> Dict[str, str]:
+    """MD5 (to compare with single-part ETags) and/or SHA-256 of a file in one read"""
+    hashes = {}
+    if md5:
+        hashes["md5"] = hashlib.md5()
+    if sha256:
+        hashes["sha256"] = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            for h in hashes.values():
+                h.update(chunk)
+    return {name: h.hexdigest() for name, h in hashes.items()}
@@ -0,0 +1,116 @@
+"""
+Persistent Bloom filter of URLs already processed (fixed memory for tens of millions of URLs)
+"""
+import os
+import math
+import mmap
+import struct
+import hashlib
+import logging
+import threading
+from typing import List
+
+
+# magic, bits, hash functions, items added, target false-positive rate
+_HEADER = struct.Struct("<8sQQQd")
+_MAGIC = b"SEENSET1"
+
+
+def bloom_size(capacity: int, fp_rate: float) -> tuple:
+    """(bits, hash functions) of a Bloom filter for capacity items at a false-positive rate"""
+    bits = max(8, math.ceil(-capacity * math.log(fp_rate) / (math.log(2) ** 2)))
+    hashes = max(1, round(bits / capacity * math.log(2)))
+    return bits, hashes
+
+
+class SeenSet:
+    """
+    Bloom filter of strings in a memory-mapped file
+
+    Membership may be a false positive at about fp_rate while no more than
+    capacity items have been added, and is never a false negative. Memory and
+    file size are fixed at creation (about 1.8 bytes per item at 0.1%).
+    """
+
+    def __init__(self, path: str = "data/seen_urls.bloom", capacity: int = 20_000_000, fp_rate: float = 0.001):
+        """
+        Open (or create) the seen-set
+
+        Args:
+            path: Filter file; an existing file keeps the size it was created with
+            capacity: Items the filter is sized for
+            fp_rate: Target false-positive rate at capacity
+        """
+        if capacity < 1 or not 0 < fp_rate < 1:
+            raise ValueError("capacity must be positive and fp_rate between 0 and 1")
+        self.path = path
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        if not os.path.exists(path):
+            bits, hashes = bloom_size(capacity, fp_rate)
+            with open(path, "wb") as f:
+                f.write(_HEADER.pack(_MAGIC, bits, hashes, 0, fp_rate))
+                # Sparse on most filesystems until bits are set
+                f.truncate(_HEADER.size + (bits + 7) // 8)
+
+        self._file = open(path, "r+b")
+        self._map = mmap.mmap(self._file.fileno(), 0)
+        magic, self.bits, self.hashes, self.count, self.fp_rate = _HEADER.unpack_from(self._map, 0)
+        if magic != _MAGIC:
+            raise ValueError(f"Not a seen-set file: {path}")
+        self.capacity = math.floor(self.bits * (math.log(2) ** 2) / -math.log(self.fp_rate))
+        self._full_warned = False
+
+    def _positions(self, item: str) -> List[int]:
+        # Two 64-bit hashes combined into k positions (Kirsch-Mitzenmacher)
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.bits for i in range(self.hashes)]
+
+    def __contains__(self, item: str) -> bool:
+        offset = _HEADER.size
+        bitmap = self._map
+        return all(bitmap[offset + (p >> 3)] & (1 << (p & 7)) for p in self._positions(item))
+
+    def add(self, item: str) -> bool:
+        """Add an item; True if it was not (probably) in the set before"""
+        positions = self._positions(item)
+        offset = _HEADER.size
+        with self._lock:
+            bitmap = self._map
+            new = False
+            for p in positions:
+                index = offset + (p >> 3)
+                mask = 1 << (p & 7)
+                if not bitmap[index] & mask:
+                    bitmap[index] |= mask
+                    new = True
+            if new:
+                self.count += 1
+                if self.count > self.capacity and not self._full_warned:
+                    self._full_warned = True
+                    self.logger.warning(f"Seen-set {self.path} holds {self.count} items, more than the "
+                                        f"{self.capacity} it was sized for; false positives will rise")
+        return new
+
+    def flush(self):
+        """Write the bitmap and item count to disk"""
+        with self._lock:
+            _HEADER.pack_into(self._map, 0, _MAGIC, self.bits, self.hashes, self.count, self.fp_rate)
+            self._map.flush()
+
+    def close(self):
+        """Flush and release the file"""
+        if self._map is None:
+            return
+        self.flush()
+        with self._lock:
+            self._map.close()
+            self._file.close()
+            self._map = None
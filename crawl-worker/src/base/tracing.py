@@ -0,0 +1,145 @@
+"""
+Lightweight nested timing spans exported in Chrome trace-event format
+
+Disabled by default: span() then returns a shared no-op context manager, so
+instrumented code pays one global lookup and one function call per span.
+"""
+import os
+import json
+import time
+import threading
+from typing import Dict, Any, Optional, List
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NOOP = _NoopSpan()
+
+
+class _Span:
+    __slots__ = ("tracer", "name", "args", "start")
+
+    def __init__(self, tracer: 'Tracer', name: str, args: Dict[str, Any]):
+        self.tracer = tracer
+        self.name = name
+        self.args = args
+        self.start = 0
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.args["error"] = exc_type.__name__
+        self.tracer.complete(self.name, self.start, time.perf_counter_ns(), self.args)
+        return False
+
+
+class Tracer:
+    """Collects complete ("X") events per thread; written once at the end of a run"""
+
+    def __init__(self):
+        self.pid = os.getpid()
+        self._origin = time.perf_counter_ns()
+        self._events: List[Dict[str, Any]] = []
+        self._threads: Dict[int, str] = {}
+        self._lock = threading.Lock()
+
+    def complete(self, name: str, start_ns: int, end_ns: int, args: Optional[Dict[str, Any]] = None):
+        """Record a finished span from perf_counter_ns() timestamps"""
+        thread = threading.current_thread()
+        event = {
+            "name": name,
+            "ph": "X",
+            "ts": (start_ns - self._origin) / 1000,
+            "dur": (end_ns - start_ns) / 1000,
+            "pid": self.pid,
+            "tid": thread.ident,
+        }
+        if args:
+            event["args"] = args
+        with self._lock:
+            self._events.append(event)
+            if thread.ident not in self._threads:
+                self._threads[thread.ident] = thread.name
+
+    def write(self, path: str) -> int:
+        """Write the trace as {"traceEvents": [...]}; returns the number of spans"""
+        with self._lock:
+            events = list(self._events)
+            threads = dict(self._threads)
+        metadata = [
+            {"name": "thread_name", "ph": "M", "pid": self.pid, "tid": tid, "args": {"name": name}}
+            for tid, name in threads.items()
+        ]
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": metadata + events, "displayTimeUnit": "ms"}, f, default=str)
+        return len(events)
+
+
+_tracer: Optional[Tracer] = None
+
+
+def enable() -> Tracer:
+    """Start recording spans in this process"""
+    global _tracer
+    if _tracer is None:
+        _tracer = Tracer()
+    return _tracer
+
+
+def disable() -> Optional[Tracer]:
+    """Stop recording and return the tracer holding the spans so far"""
+    global _tracer
+    tracer, _tracer = _tracer, None
+    return tracer
+
+
+def span(name: str, **args):
+    """
+    Time a with-block as a span nested under the enclosing span of the same thread
+
+    Args:
+        name: Span name (e.g. "chapter", "fetch.image", "s3.upload")
+        **args: Values shown with the span in the trace viewer
+    """
+    tracer = _tracer
+    if tracer is None:
+        return _NOOP
+    return _Span(tracer, name, args)
+
+
+def trace_engine(engine):
+    """Record every statement of an SQLAlchemy engine as a span while tracing is enabled"""
+    from sqlalchemy import event
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        if _tracer is not None:
+            conn.info.setdefault("_trace_start", []).append(time.perf_counter_ns())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get("_trace_start")
+        tracer = _tracer
+        if starts and tracer is not None:
+            operation = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "OTHER"
+            tracer.complete(f"db.{operation}", starts.pop(), time.perf_counter_ns(), {"sql": statement[:200]})
+
+    @event.listens_for(engine, "handle_error")
+    def _error(context):
+        starts = context.connection.info.get("_trace_start") if context.connection is not None else None
+        if starts:
+            starts.pop()
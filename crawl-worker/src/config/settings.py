@@ -11,12 +11,12 @@ class CrawlerSettings:
     """Main settings for the crawler system"""
     
     # Target website
-    BASE_URL: str = "https://truyenqqgo.com/"
+    BASE_URL: str = os.getenv("BASE_URL", "https://truyenqqgo.com/")
     
     # HTTP settings
     USER_AGENT: str = "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
     TIMEOUT: int = 20
-    DELAY_BETWEEN_REQUESTS: float = 1.0
+    DELAY_BETWEEN_REQUESTS: float = float(os.getenv("DELAY_BETWEEN_REQUESTS", "1.0"))
     MAX_RETRIES: int = 3
     
     # Caching
@@ -31,6 +31,36 @@ class CrawlerSettings:
     S3_ENABLED: bool = True  # Set to True to enable S3 upload
     S3_BUCKET: str = ""  # Will be read from env S3_BUCKET
     AWS_REGION: str = "us-east-1"  # Will be read from env AWS_REGION
+    S3_UPLOAD_WORKERS: int = int(os.getenv("S3_UPLOAD_WORKERS", "16"))  # Files uploaded in parallel
+    S3_MULTIPART_THRESHOLD_MB: int = int(os.getenv("S3_MULTIPART_THRESHOLD_MB", "8"))
+    S3_CONTENT_ADDRESSED: bool = os.getenv("S3_CONTENT_ADDRESSED", "").lower() in ("true", "1", "yes")  # blobs/ab/cd/<sha256>
+    BLOB_INDEX_PATH: str = os.getenv("BLOB_INDEX_PATH", "data/blob_index.sqlite")
+    STREAM_TO_S3: bool = os.getenv("STREAM_TO_S3", "").lower() in ("true", "1", "yes")  # download --stream by default
+    STREAM_KEEP_LOCAL: bool = os.getenv("STREAM_KEEP_LOCAL", "").lower() in ("true", "1", "yes")  # Also keep files on disk
+    
+    # Local asset index (every downloaded page and its upload state)
+    ASSET_INDEX_ENABLED: bool = os.getenv("ASSET_INDEX_ENABLED", "true").lower() in ("true", "1", "yes")
+    ASSET_INDEX_PATH: str = os.getenv("ASSET_INDEX_PATH", "data/assets.sqlite")
+    LOCAL_STORE_QUOTA_MB: int = int(os.getenv("LOCAL_STORE_QUOTA_MB", "0"))  # 0 = unlimited, no eviction
+    LOCAL_STORE_HIGH_WATER: float = float(os.getenv("LOCAL_STORE_HIGH_WATER", "0.9"))  # Hold downloads above this
+    LOCAL_STORE_LOW_WATER: float = float(os.getenv("LOCAL_STORE_LOW_WATER", "0.8"))  # Evict down to this
+    LOCAL_STORE_WAIT_SECONDS: int = int(os.getenv("LOCAL_STORE_WAIT_SECONDS", "300"))  # Wait for other uploaders
+    
+    # Transcoding (python main.py transcode)
+    TRANSCODE_FORMAT: str = os.getenv("TRANSCODE_FORMAT", "webp")  # 'webp' or 'avif'
+    TRANSCODE_QUALITY: int = int(os.getenv("TRANSCODE_QUALITY", "80"))
+    TRANSCODE_MOBILE_WIDTH: int = int(os.getenv("TRANSCODE_MOBILE_WIDTH", "720"))  # 0 to skip the mobile variant
+    TRANSCODE_WORKERS: int = int(os.getenv("TRANSCODE_WORKERS", "0"))  # 0 = one process per CPU
+    
+    # Chapter archives (python main.py archive)
+    ARCHIVE_FORMAT: str = os.getenv("ARCHIVE_FORMAT", "cbz")  # 'cbz' or 'zip'
+    
+    # Filler page detection (python main.py filler)
+    FILLER_REGISTRY_PATH: str = os.getenv("FILLER_REGISTRY_PATH", "data/filler_hashes.json")
+    FILLER_MAX_DISTANCE: int = int(os.getenv("FILLER_MAX_DISTANCE", "6"))  # Hamming distance on 64-bit dHash
+    FILLER_LEARN_MIN_CHAPTERS: int = int(os.getenv("FILLER_LEARN_MIN_CHAPTERS", "0"))  # 0 = only use marked filler
+    FILLER_WORKERS: int = int(os.getenv("FILLER_WORKERS", "0"))  # 0 = one process per CPU
+    FILLER_SKIP: bool = os.getenv("FILLER_SKIP", "true").lower() in ("true", "1", "yes")  # False = flag only
     
     # Database Configuration
     DATABASE_ENABLED: bool = True  # Set to True to enable database
@@ -41,6 +71,46 @@ class CrawlerSettings:
     DB_NAME: str = os.getenv("DB_NAME", "manga_db")
     DB_SYNC: str = os.getenv("DB_SYNC", "")
     
+    # View statistics rollup
+    STATS_RETENTION_DAYS: int = int(os.getenv("STATS_RETENTION_DAYS", "0"))  # Daily rows kept after rollup (0 = keep all)
+    TRENDING_TOP_N: int = int(os.getenv("TRENDING_TOP_N", "100"))  # Ranked series kept per window
+    
+    # Static manifests on S3 (published after database import and by python main.py manifests)
+    MANIFESTS_ENABLED: bool = os.getenv("MANIFESTS_ENABLED", "true").lower() in ("true", "1", "yes")
+    MANIFEST_PREFIX: str = os.getenv("MANIFEST_PREFIX", "manifests")
+    MANIFEST_POINTER_MAX_AGE: int = int(os.getenv("MANIFEST_POINTER_MAX_AGE", "60"))  # CDN seconds of series/<id>.json
+    
+    # Search index (updated after database import and by python main.py search)
+    SEARCH_INDEX_ENABLED: bool = os.getenv("SEARCH_INDEX_ENABLED", "true").lower() in ("true", "1", "yes")
+    SEARCH_MIN_SIMILARITY: float = float(os.getenv("SEARCH_MIN_SIMILARITY", "0.3"))  # Trigram Jaccard similarity
+    
+    # Crawl priority (crawl --priority)
+    PRIORITY_WINDOW: str = os.getenv("PRIORITY_WINDOW", "7d")  # Trending window used for series readership
+    PRIORITY_LOOKBACK_DAYS: int = int(os.getenv("PRIORITY_LOOKBACK_DAYS", "7"))  # Days of chapter views
+    PRIORITY_FRESHNESS_HOURS: float = float(os.getenv("PRIORITY_FRESHNESS_HOURS", "24"))  # Age of a fully stale series
+    PRIORITY_FRESHNESS_WEIGHT: float = float(os.getenv("PRIORITY_FRESHNESS_WEIGHT", "1.0"))
+    
+    # Metrics (Prometheus text format)
+    METRICS_PORT: int = int(os.getenv("METRICS_PORT", "0"))  # Serve /metrics on this port (0 = off)
+    METRICS_ADDR: str = os.getenv("METRICS_ADDR", "127.0.0.1")
+    METRICS_TEXTFILE: str = os.getenv("METRICS_TEXTFILE", "")  # node_exporter textfile collector path, written on exit
+    
+    # Seen-set: Bloom filter of chapter URLs already imported, skipped by later crawls
+    SEEN_SET_ENABLED: bool = os.getenv("SEEN_SET_ENABLED", "").lower() in ("true", "1", "yes")
+    SEEN_SET_PATH: str = os.getenv("SEEN_SET_PATH", "data/seen_urls.bloom")
+    SEEN_SET_CAPACITY: int = int(os.getenv("SEEN_SET_CAPACITY", "20000000"))  # Fixed at creation (~36 MB at 0.1%)
+    SEEN_SET_FP_RATE: float = float(os.getenv("SEEN_SET_FP_RATE", "0.001"))  # A false positive skips a new chapter
+    
+    # Resident worker (serve)
+    SERVE_INTERVAL_SECONDS: int = int(os.getenv("SERVE_INTERVAL_SECONDS", "3600"))  # Start of one cycle to the next
+    JOB_API_PORT: int = int(os.getenv("JOB_API_PORT", "0"))  # Accept series/chapter jobs on this port (0 = off)
+    JOB_API_ADDR: str = os.getenv("JOB_API_ADDR", "127.0.0.1")
+    JOB_API_SOCKET: str = os.getenv("JOB_API_SOCKET", "")  # Unix socket path, used instead of the port when set
+    
+    # Profiling (--profile)
+    PROFILE_DIR: str = os.getenv("PROFILE_DIR", "data/profiles")  # Per-stage profile reports
+    PROFILE_TOP: int = int(os.getenv("PROFILE_TOP", "30"))  # Rows per report table
+    
     # Logging
     LOG_LEVEL: str = "INFO"  # Dùng cho console logging
     LOG_DIR: str = "data/logs"  # Không bắt buộc nếu chỉ log ra console
@@ -1,6 +1,7 @@
 """
 Level 2: Crawl chapter list from series page
 """
+import time
 from typing import List, Optional
 from datetime import datetime
 from bs4 import BeautifulSoup
@@ -68,7 +69,7 @@ class ChapterCrawler(BaseCrawler):
                 url=url
             )
     
-    def _extract_chapters(self, soup: BeautifulSoup, base_url: str, series_title: str) -> List[dict]:
+    def _extract_chapters(self, soup: BeautifulSoup, base_url: str, series_title: str) -> List[ChapterInfo]:
         """Extract chapter information from HTML"""
         chapter_data = []
         
@@ -83,10 +84,12 @@ class ChapterCrawler(BaseCrawler):
         
         self.logger.info(f"Found {len(chapter_items)} chapter items")
         
+        seen_urls = set()
         for i, item in enumerate(chapter_items):
             try:
                 chapter_info = self._extract_single_chapter(item, base_url, series_title, i + 1)
-                if chapter_info:
+                if chapter_info and chapter_info.chapter_url not in seen_urls:
+                    seen_urls.add(chapter_info.chapter_url)
                     chapter_data.append(chapter_info)
             except Exception as e:
                 self.logger.warning(f"Failed to extract chapter {i + 1}: {str(e)}")
@@ -94,7 +97,7 @@ class ChapterCrawler(BaseCrawler):
         
         return chapter_data
     
-    def _extract_single_chapter(self, item, base_url: str, series_title: str, index: int) -> dict:
+    def _extract_single_chapter(self, item, base_url: str, series_title: str, index: int) -> Optional[ChapterInfo]:
         """Extract information from a single chapter item"""
         # Find link element
         link_element = item.find("a")
@@ -117,13 +120,13 @@ class ChapterCrawler(BaseCrawler):
         # Extract chapter title/number
         chapter_title = self._extract_chapter_title(link_element, item)
         
-        return {
-            "index": index,
-            "chapter_number": chapter_title,
-            "chapter_url": self.canonical_url(abs_link_url),
-            "series_title": series_title,
-            "crawled_at": datetime.now().isoformat()
-        }
+        return ChapterInfo(
+            index=index,
+            chapter_number=chapter_title,
+            chapter_url=self.canonical_url(abs_link_url),
+            series_title=series_title,
+            crawled_at=time.time()
+        )
     
     def _extract_chapter_title(self, link_element, item) -> str:
         """Extract chapter title from various sources"""
@@ -0,0 +1,77 @@
+"""
+Order crawl work by recent readership and freshness
+"""
+import math
+import logging
+from datetime import datetime, timedelta
+from typing import TYPE_CHECKING, List, Dict, Any, Optional
+
+from ..utils.file_utils import chapter_title_from_name
+from ..base.data_models import SeriesInfo, ChapterInfo
+
+if TYPE_CHECKING:
+    from ..base.db_client import DatabaseClient
+
+
+class CrawlPrioritizer:
+    """Rank series and chapters so the most-read, most-stale work is refreshed first"""
+
+    def __init__(self, db_client: 'DatabaseClient', window: str = "7d", lookback_days: int = 7,
+                 freshness_hours: float = 24.0, freshness_weight: float = 1.0):
+        """
+        Initialize prioritizer
+
+        Args:
+            db_client: Database client
+            window: Trending window used for series readership (24h, 7d, 30d)
+            lookback_days: Days of chapter views used to order chapters
+            freshness_hours: Age after which a series counts as fully stale
+            freshness_weight: Weight of staleness relative to log(views)
+        """
+        self.db_client = db_client
+        self.window = window
+        self.lookback_days = lookback_days
+        self.freshness_hours = freshness_hours
+        self.freshness_weight = freshness_weight
+        self.logger = logging.getLogger(__name__)
+        self._series_stats: Optional[Dict[str, Dict[str, Any]]] = None
+
+    def series_score(self, title: str, now: datetime = None) -> float:
+        """Score = log(1 + recent views) + weight * staleness (0 just imported, 1 stale or never imported)"""
+        if self._series_stats is None:
+            self._series_stats = self.db_client.get_series_readership(self.window)
+
+        stats = self._series_stats.get(title)
+        if not stats:
+            return self.freshness_weight
+
+        return math.log1p(stats["views"]) + self.freshness_weight * self._staleness(stats["updated_at"], now)
+
+    def _staleness(self, updated_at: Optional[datetime], now: datetime = None) -> float:
+        """0 just imported, rising to 1 at freshness_hours old (1 if never imported)"""
+        if not updated_at:
+            return 1.0
+        age_hours = ((now or datetime.utcnow()) - updated_at).total_seconds() / 3600
+        return min(max(age_hours / self.freshness_hours, 0.0), 1.0)
+
+    def order_series(self, series_list: List[SeriesInfo]) -> List[SeriesInfo]:
+        """Sort series by score, keeping homepage order for ties"""
+        now = datetime.utcnow()
+        scores = {id(s): self.series_score(s.title, now) for s in series_list}
+        ordered = sorted(series_list, key=lambda s: scores[id(s)], reverse=True)
+        self.logger.info(f"Prioritized {len(ordered)} series by readership")
+        return ordered
+
+    def order_chapters(self, series_title: str, chapters: List[ChapterInfo]) -> List[ChapterInfo]:
+        """Put chapters missing from the database first, then by the same score as series_score"""
+        since = datetime.now() - timedelta(days=self.lookback_days)
+        stats = self.db_client.get_chapter_readership(series_title, since)
+        now = datetime.utcnow()
+
+        def score(chapter: ChapterInfo) -> float:
+            known = stats.get(chapter_title_from_name(chapter.chapter_number))
+            if not known:
+                return math.inf
+            return math.log1p(known["views"]) + self.freshness_weight * self._staleness(known["updated_at"], now)
+
+        return sorted(chapters, key=score, reverse=True)
@@ -3,32 +3,60 @@ Downloader that, given a chapter_url, fetches page HTML and saves images locally
 """
 import json
 from datetime import datetime
-from typing import Dict, Any, List
+from typing import TYPE_CHECKING, Dict, Any, List, Optional
 from bs4 import BeautifulSoup
 
 from ..base.crawler import BaseCrawler
-from ..base.data_models import CrawlConfig
+from ..base.data_models import CrawlConfig, CrawlResult
 from ..utils.file_utils import ensure_dir, slugify, chapter_slugify, ext_from_content_type, ext_from_url, compute_sha256, atomic_write
+from ..utils.image_probe import sniff_image
+from ..base.metrics import PAGES_DOWNLOADED, CHAPTERS_DOWNLOADED
+from ..base.tracing import span
+
+if TYPE_CHECKING:
+    from ..base.asset_index import AssetIndex
+    from ..base.s3_uploader import S3Uploader
 
 
 class ChapterImageDownloader(BaseCrawler):
     """Download images for a chapter by parsing div.page-chapter img"""
 
-    def __init__(self, config: CrawlConfig, images_root: str = "data/images"):
+    def __init__(self, config: CrawlConfig, images_root: str = "data/images",
+                 asset_index: Optional['AssetIndex'] = None):
         super().__init__(config)
         self.images_root = images_root
+        self.asset_index = asset_index
     
-    def crawl(self, url: str) -> 'CrawlResult':
+    def crawl(self, url: str) -> CrawlResult:
         """Required abstract method - not used in this downloader"""
-        from ..base.data_models import CrawlResult
         return CrawlResult(
             success=False,
             data=[],
             error_message="Use download_chapter() method instead of crawl()"
         )
 
-    def download_chapter(self, chapter_url: str, chapter_number: str, series_title: str) -> Dict[str, Any]:
+    def download_chapter(self, chapter_url: str, chapter_number: str, series_title: str,
+                         uploader: Optional['S3Uploader'] = None, keep_local: bool = True) -> Dict[str, Any]:
+        """
+        Download the page images of a chapter
+        
+        Args:
+            chapter_url: Chapter page URL
+            chapter_number: Chapter number/name
+            series_title: Title of the series
+            uploader: If set, stream each page body straight to S3 while the next one downloads
+            keep_local: Also write pages and manifest.json to disk (always True without uploader)
+            
+        Returns:
+            Manifest dictionary; includes "s3_upload" results when streaming
+        """
+        with span("chapter", series=series_title, chapter=chapter_number):
+            return self._download_chapter(chapter_url, chapter_number, series_title, uploader, keep_local)
+
+    def _download_chapter(self, chapter_url: str, chapter_number: str, series_title: str,
+                          uploader: Optional['S3Uploader'], keep_local: bool) -> Dict[str, Any]:
         self.logger.info(f"Downloading chapter images: {series_title} - {chapter_number}")
+        keep_local = keep_local or uploader is None
 
         html, final_url = self.http_client.fetch_html(chapter_url)
         soup = self.parse_html(html)
@@ -39,9 +67,12 @@ class ChapterImageDownloader(BaseCrawler):
         series_slug = slugify(series_title)
         chapter_slug = chapter_slugify(chapter_number)
         chapter_dir = f"{self.images_root}/{series_slug}/{chapter_slug}"
-        ensure_dir(chapter_dir)
+        if keep_local:
+            ensure_dir(chapter_dir)
 
+        uploads = []
         page_idx = 0
+        seen_urls = set()
         for container in containers:
             img = container.find("img")
             if not img:
@@ -52,9 +83,10 @@ class ChapterImageDownloader(BaseCrawler):
             if not url:
                 continue
 
-            abs_url = self.make_absolute_url(final_url, url)
-            if not self.is_http_url(abs_url):
+            abs_url = self.canonical_url(self.make_absolute_url(final_url, url))
+            if not self.is_http_url(abs_url) or abs_url in seen_urls:
                 continue
+            seen_urls.add(abs_url)
 
             # fetch image bytes with referer
             headers = {
@@ -63,19 +95,34 @@ class ChapterImageDownloader(BaseCrawler):
                 "Accept": "image/avif,image/webp,image/apng,image/*,*/*;q=0.8",
             }
 
-            response = self.http_client.session.get(abs_url, headers=headers, timeout=self.config.timeout)
-            response.raise_for_status()
+            data, content_type, _ = self.http_client.fetch_bytes(abs_url, headers=headers)
+            PAGES_DOWNLOADED.inc()
 
-            content_type = response.headers.get("Content-Type")
-            ext = ext_from_content_type(content_type) or ext_from_url(abs_url) or ".jpg"
+            # Trust the bytes over Content-Type/URL for the real format, and read the size from headers
+            probe = sniff_image(data)
+            if probe:
+                ext = probe["ext"]
+                content_type = probe["content_type"]
+            else:
+                ext = ext_from_content_type(content_type) or ext_from_url(abs_url) or ".jpg"
 
             page_idx += 1
             filename = f"{page_idx:04d}{ext}"
             filepath = f"{chapter_dir}/{filename}"
 
-            data = response.content
             sha256 = compute_sha256(data)
-            atomic_write(filepath, data)
+            if keep_local:
+                with span("page.write", page=page_idx, bytes=len(data)):
+                    atomic_write(filepath, data)
+            else:
+                filepath = None
+
+            if uploader and uploader.content_addressed:
+                s3_key = uploader.blob_key(sha256, ext)
+                uploads.append((filename, filepath, s3_key, uploader.submit_blob(sha256, ext, data=data)))
+            elif uploader:
+                s3_key = f"stories/{series_slug}/{chapter_slug}/{filename}"
+                uploads.append((filename, filepath, s3_key, uploader.submit_bytes(data, s3_key, sha256=sha256)))
 
             images.append({
                 "page": page_idx,
@@ -85,6 +132,8 @@ class ChapterImageDownloader(BaseCrawler):
                 "bytes": len(data),
                 "sha256": sha256,
                 "content_type": content_type,
+                "width": probe["width"] if probe else None,
+                "height": probe["height"] if probe else None,
                 "downloaded_at": datetime.now().isoformat(),
             })
 
@@ -97,10 +146,48 @@ class ChapterImageDownloader(BaseCrawler):
             "count": len(images),
             "saved_at": datetime.now().isoformat(),
         }
-        with open(f"{chapter_dir}/manifest.json", "w", encoding="utf-8") as f:
-            json.dump(manifest, f, ensure_ascii=False, indent=2)
+        if keep_local:
+            with open(f"{chapter_dir}/manifest.json", "w", encoding="utf-8") as f:
+                json.dump(manifest, f, ensure_ascii=False, indent=2)
+            self.logger.info(f"Saved {len(images)} images to {chapter_dir}")
+
+        if uploader:
+            with span("s3.wait", pages=len(uploads)):
+                manifest["s3_upload"] = self._collect_uploads(uploads)
+
+        if self.asset_index:
+            self.asset_index.record_chapter(series_slug, chapter_slug, images, manifest.get("s3_upload"))
+        CHAPTERS_DOWNLOADED.inc()
 
-        self.logger.info(f"Saved {len(images)} images to {chapter_dir}")
         return manifest
 
+    def _collect_uploads(self, uploads: list) -> Dict[str, Any]:
+        """Wait for streamed page uploads, in the same shape as S3Uploader.upload_chapter_images"""
+        results = {
+            "uploaded": [],
+            "failed": [],
+            "total": len(uploads),
+            "success_count": 0
+        }
+        for filename, local_path, s3_key, future in uploads:
+            s3_url = future.result()
+            if isinstance(s3_url, dict):
+                # Content-addressed: an existing blob may be stored under another key
+                s3_key = s3_url["s3_key"]
+                s3_url = s3_url["s3_url"]
+            entry = {
+                "filename": filename,
+                "local_path": local_path,
+                "s3_key": s3_key,
+            }
+            if s3_url:
+                entry["s3_url"] = s3_url
+                results["uploaded"].append(entry)
+                results["success_count"] += 1
+            else:
+                results["failed"].append(entry)
+
+        self.logger.info(f"Streamed {results['success_count']}/{results['total']} images to S3")
+        return results
+
 
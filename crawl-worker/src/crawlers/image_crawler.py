@@ -1,7 +1,8 @@
 """
 Level 3: Crawl images from chapter page
 """
-from typing import List
+import time
+from typing import List, Optional
 from datetime import datetime
 from bs4 import BeautifulSoup
 from ..base.crawler import BaseCrawler
@@ -56,7 +57,7 @@ class ImageCrawler(BaseCrawler):
                 url=url
             )
     
-    def _extract_images(self, soup: BeautifulSoup, base_url: str, chapter_number: str, series_title: str) -> List[dict]:
+    def _extract_images(self, soup: BeautifulSoup, base_url: str, chapter_number: str, series_title: str) -> List[ImageInfo]:
         """Extract image information from HTML"""
         image_data = []
         
@@ -76,7 +77,7 @@ class ImageCrawler(BaseCrawler):
         
         return image_data
     
-    def _extract_single_image(self, container, base_url: str, chapter_number: str, series_title: str, page_number: int) -> dict:
+    def _extract_single_image(self, container, base_url: str, chapter_number: str, series_title: str, page_number: int) -> Optional[ImageInfo]:
         """Extract information from a single image container"""
         # Find image element
         img_element = container.find("img")
@@ -102,12 +103,12 @@ class ImageCrawler(BaseCrawler):
         alt_text = self.safe_get_attribute(img_element, "alt", "")
         title_text = self.safe_get_attribute(img_element, "title", "")
         
-        return {
-            "page_number": page_number,
-            "image_url": self.canonical_url(abs_image_url),
-            "chapter_number": chapter_number,
-            "series_title": series_title,
-            "alt_text": alt_text,
-            "title_text": title_text,
-            "crawled_at": datetime.now().isoformat()
-        }
+        return ImageInfo(
+            page_number=page_number,
+            image_url=self.canonical_url(abs_image_url),
+            chapter_number=chapter_number,
+            series_title=series_title,
+            alt_text=alt_text,
+            title_text=title_text,
+            crawled_at=time.time()
+        )
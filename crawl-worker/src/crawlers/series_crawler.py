@@ -1,7 +1,8 @@
 """
 Level 1: Crawl series list from homepage
 """
-from typing import List
+import time
+from typing import List, Optional
 from datetime import datetime
 from bs4 import BeautifulSoup
 from ..base.crawler import BaseCrawler
@@ -54,7 +55,7 @@ class SeriesCrawler(BaseCrawler):
                 url=url
             )
     
-    def _extract_series(self, soup: BeautifulSoup, base_url: str) -> List[dict]:
+    def _extract_series(self, soup: BeautifulSoup, base_url: str) -> List[SeriesInfo]:
         """Extract series information from HTML"""
         series_data = []
         
@@ -63,10 +64,13 @@ class SeriesCrawler(BaseCrawler):
         
         self.logger.info(f"Found {len(series_containers)} series containers")
         
+        seen_urls = set()
         for i, container in enumerate(series_containers):
             try:
                 series_info = self._extract_single_series(container, base_url, i + 1)
-                if series_info:
+                # A series listed in several homepage sections is crawled once
+                if series_info and series_info.series_url not in seen_urls:
+                    seen_urls.add(series_info.series_url)
                     series_data.append(series_info)
             except Exception as e:
                 self.logger.warning(f"Failed to extract series {i + 1}: {str(e)}")
@@ -74,7 +78,7 @@ class SeriesCrawler(BaseCrawler):
         
         return series_data
     
-    def _extract_single_series(self, container, base_url: str, index: int) -> dict:
+    def _extract_single_series(self, container, base_url: str, index: int) -> Optional[SeriesInfo]:
         """Extract information from a single series container"""
         # Find image element
         img_element = container.find("img")
@@ -121,15 +125,15 @@ class SeriesCrawler(BaseCrawler):
         # Try to extract title from link text or other elements
         series_title = self._extract_series_title(container, alt_text, title_text)
         
-        return {
-            "index": index,
-            "title": series_title,
-            "cover_image": self.canonical_url(abs_image_url),
-            "series_url": self.canonical_url(abs_link_url),
-            "alt_text": alt_text,
-            "title_text": title_text,
-            "crawled_at": datetime.now().isoformat()
-        }
+        return SeriesInfo(
+            index=index,
+            title=series_title,
+            cover_image=self.canonical_url(abs_image_url),
+            series_url=self.canonical_url(abs_link_url),
+            alt_text=alt_text,
+            title_text=title_text,
+            crawled_at=time.time()
+        )
     
     def _extract_series_title(self, container, alt_text: str, title_text: str) -> str:
         """Extract series title from various sources"""
@@ -0,0 +1,262 @@
+"""
+Static, versioned series and chapter JSON manifests published to S3
+"""
+import json
+import hashlib
+import logging
+from datetime import datetime
+from typing import TYPE_CHECKING, Dict, Any, List, Optional, Iterable
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+
+from ..base.db_client import DatabaseClient
+from ..base.db_models import ChapterAsset, JobWatermark, SeriesManifest
+
+if TYPE_CHECKING:
+    from ..base.s3_uploader import S3Uploader
+
+
+MANIFEST_FORMAT = 1
+MANIFEST_CONTENT_TYPE = "application/json; charset=utf-8"
+
+
+def _encode(manifest: Dict[str, Any]) -> bytes:
+    """Compact, deterministic JSON so equal content always gets the same version"""
+    return json.dumps(manifest, ensure_ascii=False, separators=(",", ":"), sort_keys=True, default=str).encode("utf-8")
+
+
+def _version(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()[:16]
+
+
+def _json_column(value):
+    """JSON columns come back as text from raw queries on some drivers"""
+    if isinstance(value, (str, bytes)):
+        return json.loads(value)
+    return value
+
+
+def _chapter_sort_key(title: Optional[str]):
+    # chapters.title holds the chapter number string ("420", "420.5")
+    try:
+        return (0, float(title))
+    except (TypeError, ValueError):
+        return (1, title or "")
+
+
+class ManifestUploadError(RuntimeError):
+    """A chapter manifest, series manifest or pointer of a series could not be uploaded"""
+
+
+class ManifestPublisher:
+    """Publish one manifest per series and per chapter, only for series whose content changed"""
+
+    JOB_NAME = "manifest_publisher"
+
+    def __init__(self, db_client: DatabaseClient, uploader: 'S3Uploader', prefix: str = "manifests",
+                 pointer_max_age: int = 60):
+        """
+        Initialize publisher
+
+        Args:
+            db_client: Database client
+            uploader: S3 uploader
+            prefix: S3 key prefix of all manifests
+            pointer_max_age: CDN cache seconds of the per-series "latest version" pointer
+        """
+        self.db_client = db_client
+        self.uploader = uploader
+        self.prefix = prefix
+        self.pointer_max_age = pointer_max_age
+        self.logger = logging.getLogger(__name__)
+
+    def run(self, series_ids: Optional[Iterable[int]] = None, full: bool = False) -> Dict[str, Any]:
+        """
+        Publish manifests of changed series.
+
+        Manifests are immutable objects named after their content hash; only
+        the small pointer manifests/series/<id>.json is short-lived in the CDN.
+        A series is skipped without any S3 call when its rebuilt manifest has
+        the version already recorded in series_manifests.
+
+        Args:
+            series_ids: Series to check (e.g. just imported); default: series
+                changed since the last run according to the job watermark
+            full: Check every series
+
+        Returns:
+            Summary with checked/published/failed series and chapter counts
+        """
+        self._ensure_schema()
+        summary = {"series_checked": 0, "series_published": 0, "series_failed": 0, "chapters_published": 0}
+
+        session = self.db_client.get_session()
+        try:
+            started = datetime.utcnow()
+            by_watermark = series_ids is None
+            if by_watermark:
+                watermark = None if full else self.db_client.get_watermark(session, self.JOB_NAME)
+                series_ids = self._changed_series(session, watermark)
+
+            for series_id in sorted(set(series_ids)):
+                summary["series_checked"] += 1
+                try:
+                    published = self._publish_series(session, series_id)
+                except ManifestUploadError as e:
+                    self.logger.error(str(e))
+                    summary["series_failed"] += 1
+                    continue
+                if published is not None:
+                    summary["series_published"] += 1
+                    summary["chapters_published"] += published
+                session.commit()
+
+            # Only runs that published everything changed since the watermark may move it,
+            # so failed series are retried by the next run
+            if by_watermark and not summary["series_failed"]:
+                self.db_client.set_watermark(session, self.JOB_NAME, started)
+                session.commit()
+        except SQLAlchemyError as e:
+            session.rollback()
+            self.logger.error(f"Manifest publishing failed: {str(e)}")
+            raise
+        finally:
+            session.close()
+
+        self.logger.info(
+            f"Manifests: {summary['series_published']}/{summary['series_checked']} series changed, "
+            f"{summary['chapters_published']} chapter manifests published, {summary['series_failed']} series failed"
+        )
+        return summary
+
+    def _ensure_schema(self):
+        """Create worker-owned tables/columns missing on databases created before them"""
+        for model in (JobWatermark, SeriesManifest):
+            model.__table__.create(bind=self.db_client.engine, checkfirst=True)
+        self.db_client.ensure_columns(ChapterAsset)
+
+    def _changed_series(self, session, watermark: Optional[datetime]) -> List[int]:
+        """Series whose row, chapters or chapter assets changed after the watermark"""
+        if watermark is None:
+            rows = session.execute(text("SELECT series_id FROM series")).fetchall()
+        else:
+            rows = session.execute(text("""
+                SELECT series_id FROM series WHERE updated_at > :watermark
+                UNION
+                SELECT series_id FROM chapters WHERE updated_at > :watermark
+                UNION
+                SELECT c.series_id FROM chapter_assets a
+                JOIN chapters c ON c.chapter_id = a.chapter_id
+                WHERE a.updated_at > :watermark
+            """), {"watermark": watermark}).fetchall()
+        return [row.series_id for row in rows]
+
+    def _publish_series(self, session, series_id: int) -> Optional[int]:
+        """
+        Rebuild and publish one series; returns chapter manifests uploaded, or None if unchanged
+
+        Raises:
+            ManifestUploadError: if any manifest or the pointer could not be uploaded
+        """
+        series = session.execute(text("""
+            SELECT series_id, name, status, cover_url, synopsis FROM series WHERE series_id = :series_id
+        """), {"series_id": series_id}).fetchone()
+        if not series:
+            return None
+
+        authors = [row.label for row in session.execute(text("""
+            SELECT a.label FROM series_author sa
+            JOIN author a ON a.code = sa.code
+            WHERE sa.series_id = :series_id
+            ORDER BY a.label
+        """), {"series_id": series_id}).fetchall()]
+
+        chapters = session.execute(text("""
+            SELECT c.chapter_id, c.title, c.pages_url, c.released_at,
+                   a.mobile_pages_url, a.page_dims, a.archive_url
+            FROM chapters c
+            LEFT JOIN chapter_assets a ON a.chapter_id = c.chapter_id
+            WHERE c.series_id = :series_id
+        """), {"series_id": series_id}).fetchall()
+        chapters = sorted(chapters, key=lambda row: _chapter_sort_key(row.title))
+
+        # Chapter manifests first: the series manifest links to their versioned keys
+        chapter_objects = {}
+        chapter_entries = []
+        for i, chapter in enumerate(chapters):
+            previous = chapters[i - 1] if i > 0 else None
+            following = chapters[i + 1] if i + 1 < len(chapters) else None
+            pages = _json_column(chapter.pages_url) or []
+            manifest = {
+                "format": MANIFEST_FORMAT,
+                "series_id": series_id,
+                "chapter_id": chapter.chapter_id,
+                "title": chapter.title,
+                "released_at": chapter.released_at,
+                "pages": pages,
+                "page_dims": _json_column(chapter.page_dims),
+                "mobile_pages": _json_column(chapter.mobile_pages_url),
+                "archive_url": chapter.archive_url,
+                "prev": {"chapter_id": previous.chapter_id, "title": previous.title} if previous else None,
+                "next": {"chapter_id": following.chapter_id, "title": following.title} if following else None,
+            }
+            data = _encode(manifest)
+            version = _version(data)
+            key = f"{self.prefix}/chapters/{chapter.chapter_id}/{version}.json"
+            chapter_objects[str(chapter.chapter_id)] = (version, key, data)
+            chapter_entries.append({
+                "chapter_id": chapter.chapter_id,
+                "title": chapter.title,
+                "released_at": chapter.released_at,
+                "page_count": len(pages),
+                "manifest": self.uploader.get_url(key),
+            })
+
+        series_manifest = {
+            "format": MANIFEST_FORMAT,
+            "series_id": series_id,
+            "name": series.name,
+            "status": series.status,
+            "cover_url": series.cover_url,
+            "synopsis": series.synopsis,
+            "authors": authors,
+            "chapters": chapter_entries,
+        }
+        series_data = _encode(series_manifest)
+        series_version = _version(series_data)
+
+        record = session.get(SeriesManifest, series_id)
+        if record and record.version == series_version:
+            return None
+
+        # Upload changed chapter manifests in parallel, then the series manifest, then the pointer,
+        # so a reader following the pointer never reaches an object that is not there yet
+        published_versions = (record.chapter_versions or {}) if record else {}
+        futures = [
+            self.uploader.submit_bytes(data, key, MANIFEST_CONTENT_TYPE)
+            for chapter_id, (version, key, data) in chapter_objects.items()
+            if published_versions.get(chapter_id) != version
+        ]
+        if not all(future.result() for future in futures):
+            raise ManifestUploadError(f"Failed to upload chapter manifests of series {series_id}")
+
+        series_key = f"{self.prefix}/series/{series_id}/{series_version}.json"
+        series_url = self.uploader.upload_bytes(series_data, series_key, MANIFEST_CONTENT_TYPE)
+        pointer_url = None
+        if series_url:
+            pointer = _encode({"series_id": series_id, "version": series_version, "manifest": series_url})
+            pointer_url = self.uploader.upload_bytes(
+                pointer, f"{self.prefix}/series/{series_id}.json", MANIFEST_CONTENT_TYPE,
+                cache_control=f"public, max-age={self.pointer_max_age}"
+            )
+        if not pointer_url:
+            raise ManifestUploadError(f"Failed to publish manifest of series {series_id}")
+
+        if not record:
+            record = SeriesManifest(series_id=series_id)
+            session.add(record)
+        record.version = series_version
+        record.chapter_versions = {chapter_id: obj[0] for chapter_id, obj in chapter_objects.items()}
+        record.published_at = datetime.utcnow()
+        self.logger.info(f"Published manifest {series_version} of {series.name} ({len(futures)} chapter(s) changed)")
+        return len(futures)
@@ -0,0 +1,228 @@
+"""
+Diacritic-folded trigram inverted index of series names and author labels
+"""
+import logging
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Iterable, Set
+from sqlalchemy import text, bindparam
+from sqlalchemy.exc import SQLAlchemyError
+
+from ..base.db_client import DatabaseClient
+from ..base.db_models import JobWatermark, SearchDocument, SearchTrigram
+from ..utils.file_utils import fold_diacritics
+
+
+def trigrams(folded: str) -> Set[str]:
+    """
+    Trigrams of folded text, each word padded like pg_trgm ("__one_", so prefixes weigh more)
+
+    Padding uses "_" rather than spaces because MySQL ignores trailing spaces when comparing.
+    """
+    grams = set()
+    for word in folded.split():
+        padded = f"__{word}_"
+        for i in range(len(padded) - 2):
+            grams.add(padded[i:i + 3])
+    return grams
+
+
+_SEARCH_SQL = text("""
+    SELECT d.doc_type, d.doc_id, d.label, d.trigram_count, COUNT(*) AS hits
+    FROM search_trigrams t
+    JOIN search_documents d ON d.doc_type = t.doc_type AND d.doc_id = t.doc_id
+    WHERE t.trigram IN :grams
+    GROUP BY d.doc_type, d.doc_id, d.label, d.trigram_count
+    ORDER BY COUNT(*) / (d.trigram_count + :query_count - COUNT(*)) DESC
+    LIMIT :limit
+""").bindparams(bindparam("grams", expanding=True))
+
+
+class SearchIndexer:
+    """Keep search_documents/search_trigrams in step with series and author"""
+
+    JOB_NAME = "search_index"
+
+    def __init__(self, db_client: DatabaseClient, batch_size: int = 500):
+        """
+        Initialize indexer
+
+        Args:
+            db_client: Database client
+            batch_size: Documents written per transaction
+        """
+        self.db_client = db_client
+        self.batch_size = batch_size
+        self.logger = logging.getLogger(__name__)
+
+    def run(self, series_ids: Optional[Iterable[int]] = None, full: bool = False) -> Dict[str, Any]:
+        """
+        Re-index series changed since the last run, and their authors
+
+        Documents whose folded text did not change keep their trigram rows;
+        a full run also drops documents whose series or author is gone.
+
+        Args:
+            series_ids: Series to re-index (e.g. just imported); default: series
+                updated since the job watermark
+            full: Re-check every series and author
+
+        Returns:
+            Summary with checked/updated/removed document counts
+        """
+        self._ensure_schema()
+        summary = {"checked": 0, "updated": 0, "removed": 0}
+
+        session = self.db_client.get_session()
+        try:
+            started = datetime.utcnow()
+            by_watermark = series_ids is None
+            if by_watermark:
+                watermark = None if full else self.db_client.get_watermark(session, self.JOB_NAME)
+                docs = self._changed_documents(session, watermark)
+            else:
+                docs = self._series_documents(session, list(series_ids))
+
+            for start in range(0, len(docs), self.batch_size):
+                batch = docs[start:start + self.batch_size]
+                summary["checked"] += len(batch)
+                summary["updated"] += self._index_batch(session, batch)
+                session.commit()
+
+            if full:
+                summary["removed"] = self._remove_orphans(session)
+            if by_watermark:
+                self.db_client.set_watermark(session, self.JOB_NAME, started)
+            session.commit()
+        except SQLAlchemyError as e:
+            session.rollback()
+            self.logger.error(f"Search indexing failed: {str(e)}")
+            raise
+        finally:
+            session.close()
+
+        self.logger.info(
+            f"Search index: {summary['updated']}/{summary['checked']} documents updated, {summary['removed']} removed"
+        )
+        return summary
+
+    def search(self, query: str, limit: int = 20, min_similarity: float = 0.3) -> List[Dict[str, Any]]:
+        """
+        Typo-tolerant lookup of series and authors
+
+        Args:
+            query: Free text, with or without diacritics
+            limit: Maximum results
+            min_similarity: Minimum trigram Jaccard similarity (0-1)
+
+        Returns:
+            [{"doc_type", "doc_id", "label", "similarity"}], most similar first
+        """
+        grams = trigrams(fold_diacritics(query))
+        if not grams:
+            return []
+
+        session = self.db_client.get_session()
+        try:
+            rows = session.execute(_SEARCH_SQL, {
+                "grams": sorted(grams),
+                "query_count": len(grams),
+                "limit": limit,
+            }).fetchall()
+        except SQLAlchemyError as e:
+            self.logger.error(f"Search failed: {str(e)}")
+            return []
+        finally:
+            session.close()
+
+        results = []
+        for row in rows:
+            similarity = row.hits / (row.trigram_count + len(grams) - row.hits)
+            if similarity >= min_similarity:
+                results.append({
+                    "doc_type": row.doc_type,
+                    "doc_id": row.doc_id,
+                    "label": row.label,
+                    "similarity": round(similarity, 3),
+                })
+        return results
+
+    def _ensure_schema(self):
+        """Create the index tables on databases created before them"""
+        for model in (JobWatermark, SearchDocument, SearchTrigram):
+            model.__table__.create(bind=self.db_client.engine, checkfirst=True)
+
+    def _changed_documents(self, session, watermark: Optional[datetime]) -> List[tuple]:
+        """(doc_type, doc_id, label) of series updated after the watermark and their authors"""
+        if watermark is None:
+            series = session.execute(text("SELECT series_id, name FROM series")).fetchall()
+            authors = session.execute(text("SELECT code, label FROM author")).fetchall()
+            return [("series", row.series_id, row.name) for row in series] + \
+                   [("author", row.code, row.label) for row in authors]
+
+        series_ids = [row.series_id for row in session.execute(
+            text("SELECT series_id FROM series WHERE updated_at > :watermark"), {"watermark": watermark}
+        ).fetchall()]
+        return self._series_documents(session, series_ids)
+
+    def _series_documents(self, session, series_ids: List[int]) -> List[tuple]:
+        """(doc_type, doc_id, label) of the given series and their authors"""
+        if not series_ids:
+            return []
+        series = session.execute(
+            text("SELECT series_id, name FROM series WHERE series_id IN :ids").bindparams(
+                bindparam("ids", expanding=True)),
+            {"ids": series_ids}
+        ).fetchall()
+        authors = session.execute(
+            text("""
+                SELECT DISTINCT a.code, a.label FROM author a
+                JOIN series_author sa ON sa.code = a.code
+                WHERE sa.series_id IN :ids
+            """).bindparams(bindparam("ids", expanding=True)),
+            {"ids": series_ids}
+        ).fetchall()
+        return [("series", row.series_id, row.name) for row in series] + \
+               [("author", row.code, row.label) for row in authors]
+
+    def _index_batch(self, session, docs: List[tuple]) -> int:
+        """Rewrite the trigrams of documents whose folded text changed; returns how many"""
+        existing = {}
+        for doc_type in {doc[0] for doc in docs}:
+            ids = [doc[1] for doc in docs if doc[0] == doc_type]
+            for row in session.execute(
+                text("SELECT doc_id, folded FROM search_documents WHERE doc_type = :doc_type AND doc_id IN :ids")
+                .bindparams(bindparam("ids", expanding=True)),
+                {"doc_type": doc_type, "ids": ids}
+            ).fetchall():
+                existing[(doc_type, row.doc_id)] = row.folded
+
+        now = datetime.utcnow()
+        updated = 0
+        for doc_type, doc_id, label in docs:
+            folded = fold_diacritics(label)[:250]
+            if existing.get((doc_type, doc_id)) == folded:
+                continue
+            grams = trigrams(folded)
+            params = {"doc_type": doc_type, "doc_id": doc_id}
+            session.execute(text(
+                "DELETE FROM search_trigrams WHERE doc_type = :doc_type AND doc_id = :doc_id"
+            ), params)
+            if grams:
+                session.execute(text("""
+                    INSERT INTO search_trigrams (trigram, doc_type, doc_id) VALUES (:trigram, :doc_type, :doc_id)
+                """), [{"trigram": gram, **params} for gram in grams])
+            session.merge(SearchDocument(
+                doc_type=doc_type, doc_id=doc_id, label=label[:250], folded=folded,
+                trigram_count=len(grams), updated_at=now
+            ))
+            updated += 1
+        return updated
+
+    def _remove_orphans(self, session) -> int:
+        """Drop documents (and trigrams) of deleted series and authors"""
+        removed = 0
+        for doc_type, table, key in (("series", "series", "series_id"), ("author", "author", "code")):
+            orphan = f"doc_type = '{doc_type}' AND doc_id NOT IN (SELECT {key} FROM {table})"
+            session.execute(text(f"DELETE FROM search_trigrams WHERE {orphan}"))
+            removed += session.execute(text(f"DELETE FROM search_documents WHERE {orphan}")).rowcount
+        return removed
@@ -0,0 +1,157 @@
+"""
+Incremental trending / most-read series tables computed from view stats
+"""
+import logging
+from datetime import datetime, date, timedelta
+from typing import Dict, Any, Optional
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+
+from ..base.db_client import DatabaseClient
+from ..base.db_models import JobWatermark, SeriesWindowViews, SeriesTrending as SeriesTrendingRow
+
+
+# Sliding windows in days. Buckets are daily, so "24h" is the last completed day.
+TRENDING_WINDOWS = {
+    "24h": 1,
+    "7d": 7,
+    "30d": 30,
+}
+
+_APPLY_DAYS_SQL = """
+    INSERT INTO series_window_views (window_name, series_id, views)
+    SELECT * FROM (
+        SELECT :window AS w, c.series_id AS sid, SUM(s.`count`) * :sign AS delta
+        FROM chapter_view_stats_daily s
+        JOIN chapters c ON c.chapter_id = s.chapter_id
+        WHERE s.bucket_date >= :start AND s.bucket_date < :end
+        GROUP BY c.series_id
+    ) AS agg
+    ON DUPLICATE KEY UPDATE views = views + agg.delta
+"""
+
+
+class SeriesTrending:
+    """Maintain top-N most-read series for 24h/7d/30d sliding windows"""
+
+    JOB_PREFIX = "series_trending_"
+
+    def __init__(self, db_client: DatabaseClient, top_n: int = 100):
+        """
+        Initialize trending job
+
+        Args:
+            db_client: Database client
+            top_n: Number of ranked series kept per window
+        """
+        self.db_client = db_client
+        self.top_n = top_n
+        self.logger = logging.getLogger(__name__)
+
+    def run(self, today: Optional[date] = None) -> Dict[str, Any]:
+        """
+        Slide every window forward to the last completed day.
+
+        Only the days entering and leaving each window are read from
+        chapter_view_stats_daily; a window is rebuilt from scratch only on
+        the first run or when the job has not run for longer than the window.
+
+        Returns:
+            Summary per window
+        """
+        today = today or datetime.now().date()
+        last_day = datetime.combine(today, datetime.min.time()) - timedelta(days=1)
+        summary = {}
+
+        self._ensure_schema()
+
+        for window, days in TRENDING_WINDOWS.items():
+            session = self.db_client.get_session()
+            try:
+                summary[window] = self._advance_window(session, window, days, last_day)
+                session.commit()
+            except SQLAlchemyError as e:
+                session.rollback()
+                self.logger.error(f"Trending window {window} failed: {str(e)}")
+                raise
+            finally:
+                session.close()
+
+        return summary
+
+    def _ensure_schema(self):
+        """Create the trending tables on databases created before them"""
+        for model in (JobWatermark, SeriesWindowViews, SeriesTrendingRow):
+            model.__table__.create(bind=self.db_client.engine, checkfirst=True)
+
+    def _advance_window(self, session, window: str, days: int, last_day: datetime) -> Dict[str, Any]:
+        """Update running totals and the ranked table of one window"""
+        job_name = f"{self.JOB_PREFIX}{window}"
+        watermark = self.db_client.get_watermark(session, job_name)
+        one_day = timedelta(days=1)
+        result = {"mode": "unchanged", "ranked": None}
+
+        if watermark is None or (last_day - watermark).days >= days:
+            # Window holds no day in common with the previous run: rebuild it
+            session.execute(text("DELETE FROM series_window_views WHERE window_name = :window"), {"window": window})
+            self._apply_days(session, window, last_day - (days - 1) * one_day, last_day + one_day, 1)
+            result["mode"] = "rebuilt"
+        elif watermark < last_day:
+            # Add the newest buckets, subtract the ones that slid out
+            self._apply_days(session, window, watermark + one_day, last_day + one_day, 1)
+            self._apply_days(session, window, watermark - (days - 1) * one_day, last_day - (days - 1) * one_day, -1)
+            session.execute(
+                text("DELETE FROM series_window_views WHERE window_name = :window AND views <= 0"),
+                {"window": window}
+            )
+            result["mode"] = "incremental"
+        else:
+            return result
+
+        result["ranked"] = self._rank(session, window)
+        self.db_client.set_watermark(session, job_name, last_day)
+        self.logger.info(f"Trending window {window}: {result['mode']}, {result['ranked']} series ranked")
+        return result
+
+    def _apply_days(self, session, window: str, start: datetime, end: datetime, sign: int):
+        """Add (sign=1) or subtract (sign=-1) daily views in [start, end) to the window totals"""
+        if start >= end:
+            return
+        session.execute(text(_APPLY_DAYS_SQL), {
+            "window": window,
+            "sign": sign,
+            "start": start,
+            "end": end,
+        })
+
+    def _rank(self, session, window: str) -> int:
+        """Replace the ranked rows of a window with the current top-N"""
+        rows = session.execute(text("""
+            SELECT v.series_id, s.name, s.cover_url, v.views
+            FROM series_window_views v
+            JOIN series s ON s.series_id = v.series_id
+            WHERE v.window_name = :window
+            ORDER BY v.views DESC, v.series_id ASC
+            LIMIT :top_n
+        """), {"window": window, "top_n": self.top_n}).fetchall()
+
+        # Readers keep seeing the previous ranking until this transaction commits
+        session.execute(text("DELETE FROM series_trending WHERE window_name = :window"), {"window": window})
+        if rows:
+            now = datetime.utcnow()
+            session.execute(text("""
+                INSERT INTO series_trending (window_name, position, series_id, name, cover_url, views, updated_at)
+                VALUES (:window, :position, :series_id, :name, :cover_url, :views, :updated_at)
+            """), [
+                {
+                    "window": window,
+                    "position": position,
+                    "series_id": row.series_id,
+                    "name": row.name,
+                    "cover_url": row.cover_url,
+                    "views": row.views,
+                    "updated_at": now,
+                }
+                for position, row in enumerate(rows, start=1)
+            ])
+        return len(rows)
@@ -0,0 +1,154 @@
+"""
+Rollup and compaction job for chapter view statistics
+"""
+import logging
+from datetime import datetime, date, timedelta
+from typing import Dict, Any, Optional
+from sqlalchemy import inspect, text
+from sqlalchemy.exc import SQLAlchemyError
+
+from ..base.db_client import DatabaseClient
+from ..base.db_models import ChapterViewStatsDaily, ChapterViewStatsWeekly, ChapterViewStatsMonthly, JobWatermark
+from .series_trending import TRENDING_WINDOWS
+
+
+# Weekly buckets start on Monday, monthly buckets on the 1st of the month
+_ROLLUP_SQL = {
+    "chapter_view_stats_weekly": "DATE_SUB(DATE(bucket_date), INTERVAL WEEKDAY(bucket_date) DAY)",
+    "chapter_view_stats_monthly": "DATE_SUB(DATE(bucket_date), INTERVAL DAYOFMONTH(bucket_date) - 1 DAY)",
+}
+
+
+class ViewStatsRollup:
+    """Build weekly/monthly view aggregates from daily rows and compact old daily rows"""
+
+    JOB_NAME = "view_stats_rollup"
+
+    def __init__(self, db_client: DatabaseClient, retention_days: int = 0, delete_batch_size: int = 10000):
+        """
+        Initialize rollup job
+
+        Args:
+            db_client: Database client
+            retention_days: Daily rows older than this many days are deleted once rolled up
+                (0 = never; the site still reads all-time totals from the daily table)
+            delete_batch_size: Rows deleted per statement while compacting
+        """
+        self.db_client = db_client
+        self.retention_days = retention_days
+        self.delete_batch_size = delete_batch_size
+        self.logger = logging.getLogger(__name__)
+        
+        # Trending subtracts days leaving its windows from the daily rows, and may lag
+        # up to one window behind, so those days must still exist when it runs
+        min_retention = 2 * max(TRENDING_WINDOWS.values())
+        if 0 < self.retention_days < min_retention:
+            self.logger.warning(f"Retention of {self.retention_days} days is below the trending minimum, using {min_retention}")
+            self.retention_days = min_retention
+
+    def run(self, today: Optional[date] = None) -> Dict[str, Any]:
+        """
+        Roll up every completed day after the watermark, then compact old daily rows.
+
+        Today's bucket is still being incremented by the site, so it is never rolled up.
+
+        Returns:
+            Summary of the run
+        """
+        today = today or datetime.now().date()
+        today_start = datetime.combine(today, datetime.min.time())
+        summary = {
+            "days_processed": 0,
+            "weekly_rows": 0,
+            "monthly_rows": 0,
+            "daily_rows_deleted": 0,
+            "watermark": None,
+        }
+
+        self._ensure_schema()
+
+        session = self.db_client.get_session()
+        try:
+            watermark = self.db_client.get_watermark(session, self.JOB_NAME)
+            start = watermark + timedelta(days=1) if watermark else self._first_bucket(session)
+
+            if start is not None and start < today_start:
+                params = {"start": start, "end": today_start}
+                for table, bucket_expr in _ROLLUP_SQL.items():
+                    aggregate = f"""
+                        SELECT chapter_id, {bucket_expr} AS bucket, SUM(`count`) AS views
+                        FROM chapter_view_stats_daily
+                        WHERE bucket_date >= :start AND bucket_date < :end
+                        GROUP BY chapter_id, bucket
+                    """
+                    # rowcount of ON DUPLICATE KEY UPDATE counts an updated row twice,
+                    # so report the (chapter, bucket) keys written instead
+                    key = "weekly_rows" if table.endswith("weekly") else "monthly_rows"
+                    summary[key] = session.execute(
+                        text(f"SELECT COUNT(*) FROM ({aggregate}) AS agg"), params
+                    ).scalar() or 0
+                    session.execute(text(f"""
+                        INSERT INTO {table} (chapter_id, bucket_date, `count`)
+                        SELECT * FROM ({aggregate}) AS agg
+                        ON DUPLICATE KEY UPDATE `count` = `count` + agg.views
+                    """), params)
+
+                watermark = today_start - timedelta(days=1)
+                self.db_client.set_watermark(session, self.JOB_NAME, watermark)
+                summary["days_processed"] = (today_start - start).days
+
+            # Rollup and watermark are committed together so a day is never counted twice
+            session.commit()
+            summary["watermark"] = watermark.isoformat() if watermark else None
+
+            if watermark and self.retention_days:
+                summary["daily_rows_deleted"] = self._compact(session, today_start, watermark)
+
+            self.logger.info(
+                f"View stats rollup: {summary['days_processed']} day(s) processed, "
+                f"{summary['daily_rows_deleted']} daily row(s) compacted"
+            )
+            return summary
+
+        except SQLAlchemyError as e:
+            session.rollback()
+            self.logger.error(f"View stats rollup failed: {str(e)}")
+            raise
+        finally:
+            session.close()
+
+    def _first_bucket(self, session) -> Optional[datetime]:
+        """Start of the oldest daily bucket (first run processes the whole history once)"""
+        first = session.execute(text("SELECT MIN(bucket_date) FROM chapter_view_stats_daily")).scalar()
+        if first is None:
+            return None
+        return datetime.combine(first.date(), datetime.min.time())
+
+    def _compact(self, session, today_start: datetime, watermark: datetime) -> int:
+        """Delete daily rows past the retention window that are already rolled up"""
+        cutoff = min(today_start - timedelta(days=self.retention_days), watermark + timedelta(days=1))
+        deleted = 0
+
+        # Delete in batches to keep lock time short on the live table
+        while True:
+            result = session.execute(
+                text("DELETE FROM chapter_view_stats_daily WHERE bucket_date < :cutoff LIMIT :batch"),
+                {"cutoff": cutoff, "batch": self.delete_batch_size}
+            )
+            session.commit()
+            deleted += result.rowcount
+            if result.rowcount < self.delete_batch_size:
+                break
+
+        return deleted
+
+    def _ensure_schema(self):
+        """Create the rollup tables and the bucket_date index on databases created before them"""
+        for model in (JobWatermark, ChapterViewStatsWeekly, ChapterViewStatsMonthly):
+            model.__table__.create(bind=self.db_client.engine, checkfirst=True)
+        table = ChapterViewStatsDaily.__table__
+        existing = {ix["name"] for ix in inspect(self.db_client.engine).get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing:
+                self.logger.info(f"Creating index {index.name}")
+                index.create(bind=self.db_client.engine)
@@ -0,0 +1,101 @@
+"""
+Stored (uncompressed) CBZ/ZIP chapter archives streamed straight into S3
+"""
+import os
+import time
+import logging
+import zipfile
+from typing import TYPE_CHECKING, Dict, Any, List, Optional
+from xml.sax.saxutils import escape
+
+if TYPE_CHECKING:
+    from ..base.s3_uploader import S3Uploader
+
+
+ARCHIVE_CONTENT_TYPES = {
+    "cbz": "application/vnd.comicbook+zip",
+    "zip": "application/zip",
+}
+
+_CHUNK_SIZE = 1024 * 1024
+
+
+class ChapterArchiver:
+    """Build one archive per chapter while uploading it as an S3 multipart object"""
+
+    def __init__(self, uploader: 'S3Uploader', fmt: str = "cbz"):
+        """
+        Initialize archiver
+
+        Args:
+            uploader: S3Uploader used for the multipart upload and for pages no longer on disk
+            fmt: "cbz" (adds ComicInfo.xml) or "zip"
+        """
+        if fmt not in ARCHIVE_CONTENT_TYPES:
+            raise ValueError(f"Unsupported archive format: {fmt} (expected one of {', '.join(ARCHIVE_CONTENT_TYPES)})")
+        self.uploader = uploader
+        self.fmt = fmt
+        self.logger = logging.getLogger(__name__)
+
+    def archive_key(self, series_slug: str, chapter_slug: str) -> str:
+        """S3 key of a chapter archive"""
+        return f"stories/{series_slug}/{chapter_slug}.{self.fmt}"
+
+    def archive_chapter(self, pages: List[Dict[str, Any]], s3_key: str,
+                        comic_info: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Stream the pages of a chapter into a stored archive uploaded as it is written
+
+        Pages are read from local_path when the file is still on disk, otherwise from
+        their S3 object; the archive itself is never staged locally or in memory.
+
+        Args:
+            pages: Upload entries ({"filename", "local_path", "s3_key"}) in page order
+            s3_key: Archive object key
+            comic_info: Optional {"series", "number", "title"} for ComicInfo.xml (cbz only)
+
+        Returns:
+            {"s3_key", "s3_url", "bytes", "pages", "format"}
+        """
+        date_time = time.localtime()[:6]
+        with self.uploader.open_multipart(s3_key, ARCHIVE_CONTENT_TYPES[self.fmt]) as writer:
+            with zipfile.ZipFile(writer, "w", compression=zipfile.ZIP_STORED) as archive:
+                for page in pages:
+                    info = zipfile.ZipInfo(page["filename"], date_time=date_time)
+                    info.compress_type = zipfile.ZIP_STORED
+                    with archive.open(info, "w") as dest:
+                        for chunk in self._page_chunks(page):
+                            dest.write(chunk)
+                if self.fmt == "cbz" and comic_info:
+                    archive.writestr(
+                        zipfile.ZipInfo("ComicInfo.xml", date_time=date_time),
+                        self._comic_info_xml(comic_info, len(pages))
+                    )
+
+        self.logger.info(f"Archived {len(pages)} pages ({writer.bytes_written / 1e6:.1f} MB) to {writer.s3_url}")
+        return {
+            "s3_key": s3_key,
+            "s3_url": writer.s3_url,
+            "bytes": writer.bytes_written,
+            "pages": len(pages),
+            "format": self.fmt,
+        }
+
+    def _page_chunks(self, page: Dict[str, Any]):
+        local_path = page.get("local_path")
+        if local_path and os.path.exists(local_path):
+            with open(local_path, "rb") as f:
+                yield from iter(lambda: f.read(_CHUNK_SIZE), b"")
+        else:
+            yield from self.uploader.iter_object(page["s3_key"], _CHUNK_SIZE)
+
+    @staticmethod
+    def _comic_info_xml(comic_info: Dict[str, Any], page_count: int) -> str:
+        fields = [
+            ("Series", comic_info.get("series")),
+            ("Number", comic_info.get("number")),
+            ("Title", comic_info.get("title")),
+            ("PageCount", page_count),
+        ]
+        body = "".join(f"  <{tag}>{escape(str(value))}</{tag}>\n" for tag, value in fields if value is not None)
+        return f'<?xml version="1.0" encoding="utf-8"?>\n<ComicInfo>\n{body}</ComicInfo>\n'
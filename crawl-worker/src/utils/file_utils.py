@@ -4,6 +4,7 @@ Utilities for filesystem ops and image saving
 import os
 import re
 import hashlib
+import unicodedata
 from datetime import datetime
 from typing import Optional
 
@@ -31,6 +32,7 @@ _VIETNAMESE_MAP = {
 }
 
 _slug_re = re.compile(r"[^a-z0-9]+")
+_fold_table = str.maketrans(_VIETNAMESE_MAP)
 
 
 def slugify(value: str) -> str:
@@ -50,6 +52,16 @@ def slugify(value: str) -> str:
     return result or "unknown"
 
 
+def fold_diacritics(value: str) -> str:
+    """Lowercase, diacritic-free text with every run of other characters collapsed to one space"""
+    if not value:
+        return ""
+    # NFC so decomposed input (e + combining accent) hits the Vietnamese map; strip any other marks after
+    result = unicodedata.normalize("NFC", value).translate(_fold_table)
+    result = "".join(c for c in unicodedata.normalize("NFKD", result) if not unicodedata.combining(c))
+    return _slug_re.sub(" ", result.lower()).strip()
+
+
 def chapter_slugify(chapter_name: str) -> str:
     """Convert chapter name to simple number format"""
     if not chapter_name:
@@ -65,6 +77,20 @@ def chapter_slugify(chapter_name: str) -> str:
     return slugify(chapter_name)
 
 
+def chapter_title_from_name(chapter_name: str) -> str:
+    """Extract the chapter number string stored as chapters.title (e.g. "420" or "420.5")"""
+    # Bỏ tiền tố "Chương", "Chapter", "Chap"
+    value = re.sub(r'^(Chương|Chapter|Chap)\s*', '', chapter_name or "", flags=re.IGNORECASE)
+    
+    # Lấy số (có thể là số thập phân như 420.5)
+    number_match = re.search(r'(\d+\.?\d*)', value)
+    if number_match:
+        return number_match.group(1)
+    
+    # Không có số thì dùng nguyên tên chapter
+    return (chapter_name or "").strip()
+
+
 def ext_from_content_type(content_type: Optional[str]) -> Optional[str]:
     if not content_type:
         return None
@@ -0,0 +1,123 @@
+"""
+Header-only image format and dimension sniffing (no decoding)
+"""
+import struct
+from typing import Optional, Dict, Any, Callable
+
+
+# Bytes read up front; enough for PNG/GIF/WebP headers and the AVIF meta box
+HEAD_BYTES = 512
+_AVIF_SCAN_BYTES = 4096
+_JPEG_MAX_SEGMENTS = 64
+
+_FORMATS = {
+    "jpeg": (".jpg", "image/jpeg"),
+    "png": (".png", "image/png"),
+    "gif": (".gif", "image/gif"),
+    "webp": (".webp", "image/webp"),
+    "avif": (".avif", "image/avif"),
+}
+
+# Start-of-frame markers carrying the frame size (excludes DHT/JPG/DAC)
+_JPEG_SOF = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+
+def _result(fmt: str, width: Optional[int], height: Optional[int]) -> Dict[str, Any]:
+    ext, content_type = _FORMATS[fmt]
+    return {"format": fmt, "ext": ext, "content_type": content_type, "width": width, "height": height}
+
+
+def _probe_jpeg(read_at: Callable[[int, int], bytes]) -> Dict[str, Any]:
+    """Walk JPEG segment headers until a SOF marker, reading only marker/length bytes"""
+    offset = 2
+    for _ in range(_JPEG_MAX_SEGMENTS):
+        header = read_at(offset, 4)
+        if len(header) < 4 or header[0] != 0xFF:
+            break
+        marker = header[1]
+        if marker == 0xFF:
+            # Fill byte
+            offset += 1
+            continue
+        if marker in (0x01,) or 0xD0 <= marker <= 0xD7:
+            # Standalone markers have no length
+            offset += 2
+            continue
+        if marker in (0xD9, 0xDA):
+            # End of image / start of scan before any frame header
+            break
+        length = struct.unpack(">H", header[2:4])[0]
+        if marker in _JPEG_SOF:
+            frame = read_at(offset + 5, 4)
+            if len(frame) == 4:
+                height, width = struct.unpack(">HH", frame)
+                return _result("jpeg", width, height)
+            break
+        offset += 2 + length
+    return _result("jpeg", None, None)
+
+
+def _probe_webp(head: bytes) -> Dict[str, Any]:
+    chunk = head[12:16]
+    if chunk == b"VP8 " and len(head) >= 30:
+        width, height = struct.unpack("<HH", head[26:30])
+        return _result("webp", width & 0x3FFF, height & 0x3FFF)
+    if chunk == b"VP8L" and len(head) >= 25:
+        b0, b1, b2, b3 = head[21:25]
+        width = 1 + (((b1 & 0x3F) << 8) | b0)
+        height = 1 + (((b3 & 0x0F) << 10) | (b2 << 2) | ((b1 & 0xC0) >> 6))
+        return _result("webp", width, height)
+    if chunk == b"VP8X" and len(head) >= 30:
+        width = 1 + int.from_bytes(head[24:27], "little")
+        height = 1 + int.from_bytes(head[27:30], "little")
+        return _result("webp", width, height)
+    return _result("webp", None, None)
+
+
+def _probe_avif(head: bytes) -> Dict[str, Any]:
+    """Take the largest 'ispe' (image spatial extent) property found in the meta box"""
+    width = height = None
+    pos = head.find(b"ispe")
+    while pos != -1 and pos + 16 <= len(head):
+        w, h = struct.unpack(">II", head[pos + 8:pos + 16])
+        if width is None or w * h > width * height:
+            width, height = w, h
+        pos = head.find(b"ispe", pos + 4)
+    return _result("avif", width, height)
+
+
+def _sniff(head: bytes, read_at: Callable[[int, int], bytes]) -> Optional[Dict[str, Any]]:
+    if head[:3] == b"\xff\xd8\xff":
+        return _probe_jpeg(read_at)
+    if head[:8] == b"\x89PNG\r\n\x1a\n" and len(head) >= 24:
+        width, height = struct.unpack(">II", head[16:24])
+        return _result("png", width, height)
+    if head[:6] in (b"GIF87a", b"GIF89a") and len(head) >= 10:
+        width, height = struct.unpack("<HH", head[6:10])
+        return _result("gif", width, height)
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return _probe_webp(head)
+    if head[4:8] == b"ftyp" and head[8:12] in (b"avif", b"avis"):
+        return _probe_avif(read_at(0, _AVIF_SCAN_BYTES))
+    return None
+
+
+def sniff_image(data: bytes) -> Optional[Dict[str, Any]]:
+    """
+    Detect the real format and pixel size of an in-memory image from its headers
+
+    Returns:
+        {"format", "ext", "content_type", "width", "height"} or None if not a known image;
+        width/height are None when the header does not carry them
+    """
+    view = memoryview(data)
+    return _sniff(bytes(view[:HEAD_BYTES]), lambda offset, n: bytes(view[offset:offset + n]))
+
+
+def probe_file(path: str) -> Optional[Dict[str, Any]]:
+    """Same as sniff_image for a file on disk, reading only header bytes"""
+    with open(path, "rb") as f:
+        def read_at(offset: int, n: int) -> bytes:
+            f.seek(offset)
+            return f.read(n)
+        return _sniff(read_at(0, HEAD_BYTES), read_at)
@@ -0,0 +1,159 @@
+"""
+Re-encode chapter pages to WebP/AVIF (full width + mobile variant) in a process pool
+"""
+import os
+import shutil
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Any, List, Optional
+
+from .file_utils import ensure_dir, atomic_write
+
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.gif', '.webp', '.avif')
+
+_PIL_FORMATS = {
+    "webp": ("WEBP", ".webp"),
+    "avif": ("AVIF", ".avif"),
+}
+
+
+def transcode_page(src_path: str, out_path: str, fmt: str, quality: int, width: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Re-encode one page (runs in a worker process)
+
+    Args:
+        src_path: Source image
+        out_path: Destination file
+        fmt: "webp" or "avif"
+        quality: Encoder quality (0-100)
+        width: Downscale to this width if the page is wider (keeps aspect ratio)
+
+    Returns:
+        {"filename", "local_path", "bytes", "width", "height"}
+    """
+    import io
+    from PIL import Image
+    if fmt == "avif":
+        try:
+            import pillow_avif  # noqa: F401  (AVIF plugin for Pillow < 11.3)
+        except ImportError:
+            pass
+
+    pil_format = _PIL_FORMATS[fmt][0]
+    with Image.open(src_path) as img:
+        img.load()
+        # Keep transparency only where the source has it
+        has_alpha = img.mode in ("RGBA", "LA") or (img.mode == "P" and "transparency" in img.info)
+        mode = "RGBA" if has_alpha else "RGB"
+        if img.mode != mode:
+            img = img.convert(mode)
+        if width and img.width > width:
+            height = max(1, round(img.height * width / img.width))
+            img = img.resize((width, height), Image.LANCZOS)
+
+        buffer = io.BytesIO()
+        img.save(buffer, format=pil_format, quality=quality)
+        size = (img.width, img.height)
+
+    data = buffer.getvalue()
+    atomic_write(out_path, data)
+    return {
+        "filename": os.path.basename(out_path),
+        "local_path": out_path,
+        "bytes": len(data),
+        "width": size[0],
+        "height": size[1],
+    }
+
+
+class ImageTranscoder:
+    """Transcode chapter pages into web/ and mobile/ subdirectories of each chapter"""
+
+    def __init__(self, fmt: str = "webp", quality: int = 80, mobile_width: int = 720, max_workers: int = None):
+        """
+        Initialize transcoder
+
+        Args:
+            fmt: Output format ("webp" or "avif")
+            quality: Encoder quality (0-100)
+            mobile_width: Width of the mobile variant (0 to skip it)
+            max_workers: Worker processes (default: CPU count)
+        """
+        if fmt not in _PIL_FORMATS:
+            raise ValueError(f"Unsupported transcode format: {fmt} (expected one of {', '.join(_PIL_FORMATS)})")
+        try:
+            import PIL  # noqa: F401
+        except ImportError:
+            raise ImportError("Transcoding requires Pillow. Install it with: pip install Pillow")
+
+        self.fmt = fmt
+        self.ext = _PIL_FORMATS[fmt][1]
+        self.quality = quality
+        self.mobile_width = mobile_width
+        self.max_workers = max_workers or None
+        self.logger = logging.getLogger(__name__)
+
+    def transcode_chapters(self, chapter_dirs: List[str]) -> List[Dict[str, Any]]:
+        """
+        Transcode the pages of many chapters in one process pool
+
+        Args:
+            chapter_dirs: Local chapter directories
+
+        Returns:
+            One {"format", "quality", "web", "mobile", "failed"} dictionary per chapter, in input order
+        """
+        all_results = []
+        pending = []
+
+        with ProcessPoolExecutor(max_workers=self.max_workers) as pool:
+            for chapter_dir in chapter_dirs:
+                results = {
+                    "format": self.fmt,
+                    "quality": self.quality,
+                    "web": [],
+                    "mobile": [],
+                    "failed": [],
+                }
+                all_results.append(results)
+
+                if not os.path.exists(chapter_dir):
+                    self.logger.error(f"Chapter directory not found: {chapter_dir}")
+                    continue
+
+                variants = [("web", None)]
+                if self.mobile_width:
+                    variants.append(("mobile", self.mobile_width))
+                for variant, _ in variants:
+                    ensure_dir(os.path.join(chapter_dir, variant))
+
+                for filename in sorted(os.listdir(chapter_dir)):
+                    if not filename.lower().endswith(IMAGE_EXTENSIONS):
+                        continue
+                    src_path = os.path.join(chapter_dir, filename)
+                    stem = os.path.splitext(filename)[0]
+                    for variant, width in variants:
+                        out_path = os.path.join(chapter_dir, variant, f"{stem}{self.ext}")
+                        future = pool.submit(transcode_page, src_path, out_path, self.fmt, self.quality, width)
+                        pending.append((results, variant, src_path, future))
+
+            self.logger.info(f"Transcoding {len(pending)} images from {len(chapter_dirs)} chapter(s) to {self.fmt}")
+
+            for results, variant, src_path, future in pending:
+                try:
+                    results[variant].append(future.result())
+                except Exception as e:
+                    self.logger.warning(f"Failed to transcode {src_path}: {str(e)}")
+                    results["failed"].append({"local_path": src_path, "variant": variant, "error": str(e)})
+                    if variant == "web":
+                        # Keep the page set complete with the original file
+                        fallback = os.path.join(os.path.dirname(src_path), "web", os.path.basename(src_path))
+                        shutil.copyfile(src_path, fallback)
+                        results["web"].append({
+                            "filename": os.path.basename(fallback),
+                            "local_path": fallback,
+                            "bytes": os.path.getsize(fallback),
+                        })
+
+        return all_results
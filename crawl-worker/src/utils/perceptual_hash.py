@@ -0,0 +1,152 @@
+"""
+Perceptual hashing (dHash) and BK-tree lookup for near-duplicate filler pages
+"""
+import os
+import json
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Optional, List, Tuple, Any, Dict
+
+from .file_utils import ensure_dir, atomic_write
+
+
+def dhash_file(path: str, hash_size: int = 8) -> Optional[int]:
+    """
+    Difference hash of an image (runs in a worker process)
+
+    The page is downsampled to (hash_size + 1) x hash_size grayscale and each
+    bit says whether a pixel is brighter than its right neighbour, so
+    re-encoded or slightly resized copies of a page hash within a few bits.
+
+    Returns:
+        hash_size * hash_size bit integer, or None if the file cannot be read
+    """
+    import numpy as np
+    from PIL import Image
+
+    try:
+        with Image.open(path) as img:
+            img.draft("L", (hash_size * 8, hash_size * 8))  # Fast JPEG downscale while decoding
+            small = img.convert("L").resize((hash_size + 1, hash_size), Image.LANCZOS)
+            pixels = np.asarray(small, dtype=np.int16)
+    except Exception:
+        return None
+
+    bits = (pixels[:, 1:] > pixels[:, :-1]).flatten()
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+def hamming(a: int, b: int) -> int:
+    """Number of differing bits"""
+    return bin(a ^ b).count("1")
+
+
+class BKTree:
+    """Burkhard-Keller tree over Hamming distance; range queries visit only a fraction of nodes"""
+
+    def __init__(self):
+        self._root = None
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def add(self, value: int, item: Any = None) -> None:
+        """Insert a hash with an attached item"""
+        node = [value, item, {}]
+        self._size += 1
+        if self._root is None:
+            self._root = node
+            return
+
+        current = self._root
+        while True:
+            distance = hamming(value, current[0])
+            child = current[2].get(distance)
+            if child is None:
+                current[2][distance] = node
+                return
+            current = child
+
+    def search(self, value: int, max_distance: int) -> List[Tuple[int, int, Any]]:
+        """All (distance, hash, item) within max_distance, nearest first"""
+        if self._root is None:
+            return []
+
+        found = []
+        stack = [self._root]
+        while stack:
+            node = stack.pop()
+            distance = hamming(value, node[0])
+            if distance <= max_distance:
+                found.append((distance, node[0], node[1]))
+            # Triangle inequality: only children at distance d +/- max_distance can match
+            low, high = distance - max_distance, distance + max_distance
+            for child_distance, child in node[2].items():
+                if low <= child_distance <= high:
+                    stack.append(child)
+
+        found.sort(key=lambda match: match[0])
+        return found
+
+
+class FillerRegistry:
+    """Persisted set of known filler page hashes (credits, recruitment, ads)"""
+
+    def __init__(self, path: str = "data/filler_hashes.json"):
+        self.path = path
+        self.logger = logging.getLogger(__name__)
+        self.entries: List[Dict[str, Any]] = []
+        self.tree = BKTree()
+
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                self.entries = json.load(f).get("hashes", [])
+            for entry in self.entries:
+                self.tree.add(int(entry["hash"], 16), entry)
+
+    def match(self, value: int, max_distance: int) -> Optional[Tuple[int, Dict[str, Any]]]:
+        """Nearest known filler within max_distance as (distance, entry)"""
+        matches = self.tree.search(value, max_distance)
+        if not matches:
+            return None
+        return matches[0][0], matches[0][2]
+
+    def add(self, value: int, label: str, max_distance: int = 0) -> bool:
+        """Register a filler hash unless an equivalent one is already known"""
+        if self.match(value, max_distance):
+            return False
+        entry = {"hash": f"{value:016x}", "label": label, "added_at": datetime.now().isoformat()}
+        self.entries.append(entry)
+        self.tree.add(value, entry)
+        return True
+
+    def save(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            ensure_dir(directory)
+        atomic_write(self.path, json.dumps({"hashes": self.entries}, ensure_ascii=False, indent=2).encode("utf-8"))
+
+
+class PerceptualHasher:
+    """Batch dHash of page files in a process pool"""
+
+    def __init__(self, hash_size: int = 8, max_workers: int = None):
+        try:
+            import numpy  # noqa: F401
+            import PIL  # noqa: F401
+        except ImportError:
+            raise ImportError("Perceptual hashing requires NumPy and Pillow. Install them with: pip install numpy Pillow")
+
+        self.hash_size = hash_size
+        self.max_workers = max_workers or None
+
+    def hash_files(self, paths: List[str]) -> List[Optional[int]]:
+        """dHash of every path, in input order (None for unreadable files)"""
+        if not paths:
+            return []
+        workers = self.max_workers or os.cpu_count() or 1
+        chunksize = max(1, len(paths) // (4 * workers))
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(dhash_file, paths, [self.hash_size] * len(paths), chunksize=chunksize))
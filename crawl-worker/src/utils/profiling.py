@@ -0,0 +1,141 @@
+"""
+Per-stage CPU and memory profiling (cProfile or pyinstrument, plus tracemalloc)
+"""
+import io
+import os
+import sys
+import time
+import logging
+import pstats
+import cProfile
+import tracemalloc
+from datetime import datetime
+from typing import Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+_TRACEMALLOC_FRAMES = 10
+
+# Allocation frames of the profiler machinery itself
+_NOISE_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+
+
+def peak_rss_bytes() -> Optional[int]:
+    """Peak resident set size of this process so far (None where unavailable)"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _mb(value: Optional[int]) -> str:
+    return "n/a" if value is None else f"{value / (1024 * 1024):.1f} MB"
+
+
+class StageProfiler:
+    """
+    Context manager profiling one stage and writing a text report on exit
+
+    The report lists the top functions by cumulative and own time, the
+    allocation sites that grew most during the stage, the tracemalloc peak
+    and the process peak RSS. With cProfile a .prof file (pstats format,
+    e.g. for snakeviz) is written next to it.
+    """
+
+    def __init__(self, stage: str, output_dir: str = "data/profiles", sampling: bool = False, top: int = 30):
+        """
+        Initialize profiler
+
+        Args:
+            stage: Stage name, used in the report file name
+            output_dir: Directory of the reports
+            sampling: Use the pyinstrument sampling profiler when it is installed
+            top: Rows per report table
+        """
+        self.stage = stage
+        self.output_dir = output_dir
+        self.top = top
+        self.logger = logging.getLogger(__name__)
+        self.report_path: Optional[str] = None
+
+        self._sampler = None
+        if sampling:
+            try:
+                from pyinstrument import Profiler
+                self._sampler = Profiler()
+            except ImportError:
+                self.logger.warning("pyinstrument is not installed (pip install pyinstrument); using cProfile")
+        self._profile = None if self._sampler else cProfile.Profile()
+        self._own_tracemalloc = False
+        self._baseline = None
+        self._start = 0.0
+
+    def __enter__(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(_TRACEMALLOC_FRAMES)
+            self._own_tracemalloc = True
+        tracemalloc.reset_peak()
+        self._baseline = tracemalloc.take_snapshot().filter_traces(_NOISE_FILTERS)
+        self._start = time.perf_counter()
+        if self._sampler:
+            self._sampler.start()
+        else:
+            self._profile.enable()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self._sampler:
+            self._sampler.stop()
+        else:
+            self._profile.disable()
+        elapsed = time.perf_counter() - self._start
+        _, traced_peak = tracemalloc.get_traced_memory()
+        snapshot = tracemalloc.take_snapshot().filter_traces(_NOISE_FILTERS)
+        if self._own_tracemalloc:
+            tracemalloc.stop()
+
+        try:
+            self._write_report(elapsed, traced_peak, snapshot, failed=exc_type is not None)
+        except OSError as e:
+            self.logger.error(f"Failed to write profile of {self.stage}: {str(e)}")
+        return False
+
+    def _write_report(self, elapsed: float, traced_peak: int, snapshot, failed: bool):
+        os.makedirs(self.output_dir, exist_ok=True)
+        ts = datetime.now().strftime('%Y%m%d_%H%M%S')
+        base = os.path.join(self.output_dir, f"{self.stage}_{ts}")
+
+        out = io.StringIO()
+        out.write(f"Stage: {self.stage}{' (failed)' if failed else ''}\n")
+        out.write(f"Wall time: {elapsed:.2f}s\n")
+        out.write(f"Peak traced Python memory: {_mb(traced_peak)}\n")
+        out.write(f"Peak RSS (process so far): {_mb(peak_rss_bytes())}\n\n")
+
+        if self._sampler:
+            out.write("== Sampled call tree (pyinstrument) ==\n")
+            out.write(self._sampler.output_text(unicode=True, color=False))
+        else:
+            self._profile.dump_stats(f"{base}.prof")
+            for sort_key, title in (("cumulative", "cumulative time"), ("tottime", "own time")):
+                out.write(f"== Top {self.top} functions by {title} ==\n")
+                stats = pstats.Stats(self._profile, stream=out)
+                stats.strip_dirs().sort_stats(sort_key).print_stats(self.top)
+
+        out.write(f"\n== Top {self.top} allocation sites by growth during the stage ==\n")
+        for stat in snapshot.compare_to(self._baseline, "lineno")[:self.top]:
+            out.write(f"{stat}\n")
+
+        self.report_path = f"{base}.txt"
+        with open(self.report_path, "w", encoding="utf-8") as f:
+            f.write(out.getvalue())
+        self.logger.info(f"Profile of {self.stage} written to {self.report_path}")